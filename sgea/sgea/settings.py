@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,20 +42,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sgea_app.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'sgea_app.roteador.RoteamentoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sgea_app.streaming.StreamingAssincronoMiddleware',
 ]
 
 ROOT_URLCONF = 'sgea.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com medição do tempo de renderização (ver sgea_app/metricas.py)
+        'BACKEND': 'sgea_app.metricas.DjangoTemplatesMedidos',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,13 +78,100 @@ WSGI_APPLICATION = 'sgea.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfil de concorrência do SQLite (padrão). Defina SGEA_SQLITE_CONCORRENTE=0 para voltar
+# à configuração padrão do Django (journal DELETE, uma conexão por requisição).
+SGEA_SQLITE_CONCORRENTE = os.environ.get('SGEA_SQLITE_CONCORRENTE', '1') != '0'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SGEA_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # O banco de testes usa um arquivo (e não a memória compartilhada) para que
+        # os testes de concorrência possam abrir várias conexões com escrita.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+if SGEA_SQLITE_CONCORRENTE:
+    # Conexões persistentes: cada thread do servidor reaproveita a sua conexão
+    # (e os PRAGMAs abaixo) por até 10 minutos, verificando-a antes de reutilizar.
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['default']['OPTIONS'] = {
+        # WAL: leituras não bloqueiam a escrita (nem a escrita bloqueia as leituras).
+        # synchronous=NORMAL é seguro com WAL e evita um fsync a cada commit.
+        # mmap: leituras direto do mapa de memória (256 MB), sem cópias pelo cache de páginas.
+        # busy_timeout: espera até 5s pelo lock em vez de falhar com "database is locked".
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA mmap_size=268435456;'
+            'PRAGMA busy_timeout=5000;'
+            'PRAGMA temp_store=MEMORY;'
+        ),
+        # Todo transaction.atomic() começa com BEGIN IMMEDIATE: a inscrição pega o lock de
+        # escrita logo no início, e duas transações nunca ficam presas esperando para
+        # promover um lock de leitura (caso em que o SQLite falha sem respeitar o timeout).
+        'transaction_mode': 'IMMEDIATE',
+    }
+
+# Réplica de leitura. Defina SGEA_REPLICA_DB_PATH para ativar; localmente, basta um segundo
+# arquivo SQLite (copie o db.sqlite3 ou rode "migrate --database replica").
+# As views de relatório (@leitura_na_replica) leem dela; escritas vão sempre ao 'default'.
+if os.environ.get('SGEA_REPLICA_DB_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['SGEA_REPLICA_DB_PATH'],
+        # Nos testes a réplica aponta para o banco de testes do principal
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['sgea_app.roteador.RoteadorReplica']
+
+# Após uma escrita, as leituras do usuário ficam no principal por este tempo (atraso máximo esperado da réplica)
+SGEA_REPLICA_FIXACAO_SEGUNDOS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Em produção, defina SGEA_REDIS_URL (ex.: redis://localhost:6379/1) para usar o Redis.
+# Localmente, SGEA_CACHE_DIR usa arquivos em disco; sem nenhuma das duas, cache em memória.
+
+if os.environ.get('SGEA_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['SGEA_REDIS_URL'],
+        }
+    }
+elif os.environ.get('SGEA_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['SGEA_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Tempo máximo (em segundos) das páginas do catálogo no cache. Elas também expiram à meia-noite.
+SGEA_CATALOGO_CACHE_SEGUNDOS = 300
+
+
+# Métricas por view (sgea_app/metricas.py), expostas em /metricas/ no formato do Prometheus.
+# Requisições com mais consultas que o limite têm o SQL registrado no log (None desativa).
+SGEA_LIMITE_CONSULTAS = 30
+# Cabeçalho Server-Timing (tempos de banco/template/total) nas respostas; expõe detalhes internos
+SGEA_SERVER_TIMING = DEBUG
+# Token para o coletor do Prometheus (Authorization: Bearer <token>); sem ele, apenas a equipe
+SGEA_METRICAS_TOKEN = os.environ.get('SGEA_METRICAS_TOKEN', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,6 +209,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Arquivos enviados e gerados pelo sistema (banners de eventos e certificados em PDF)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -133,6 +229,10 @@ LOGIN_URL = 'login'
 
 LOGOUT_REDIRECT_URL = 'login'
 
+# Tarefas de fundo (ex.: gravação em lote da auditoria) rodam em uma thread do processo.
+# Com False, os itens ficam no buffer até o lote encher ou serem descarregados explicitamente.
+SGEA_PROCESSAMENTO_EM_SEGUNDO_PLANO = True
+
 # Habilita o uso de formatos de data/hora localizados nos formulários
 USE_L10N = True 
 
@@ -140,4 +240,11 @@ USE_L10N = True
 DATE_INPUT_FORMATS = [
     '%d/%m/%Y', # DD/MM/AAAA (padrão brasileiro)
     '%Y-%m-%d', # AAAA-MM-DD (padrão ISO)
-]
\ No newline at end of file
+]
+# E-mails: as rotas gravam na caixa de saída (sgea_app/emails.py) e o comando 'enviar_emails'
+# envia. Localmente são exibidos no console; para inspecioná-los em arquivos, use
+# SGEA_EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend (pasta SGEA_EMAIL_DIR).
+# Em produção, use o backend SMTP (EMAIL_HOST, EMAIL_PORT etc.).
+EMAIL_BACKEND = os.environ.get('SGEA_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('SGEA_EMAIL_DIR', BASE_DIR / 'emails_enviados')
+DEFAULT_FROM_EMAIL = os.environ.get('SGEA_EMAIL_REMETENTE', 'SGEA <nao-responda@sgea.br>')
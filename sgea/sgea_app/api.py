@@ -0,0 +1,253 @@
+"""
+API JSON (rotas /api/...) para o aplicativo móvel: eventos, inscrições e certificados.
+
+- As listagens são paginadas por cursor (paginacao.py), como o catálogo: 'proxima'
+  traz o endereço da página seguinte, com os mesmos parâmetros.
+- ?fields=nome,local,... escolhe as colunas da resposta; só elas (e as da ordenação)
+  são selecionadas. Os dados relacionados (professor, organizador, evento) vêm no
+  mesmo JOIN, e as linhas são lidas com values(), sem criar instâncias de modelo.
+- As escritas reutilizam as Regras de Negócio das páginas HTML: FormularioEvento
+  para eventos e o InscricaoManager para inscrições e cancelamentos.
+
+A autenticação é a mesma das páginas (sessão do Django), com a proteção CSRF: o
+aplicativo envia o cookie 'csrftoken' no cabeçalho X-CSRFToken nas escritas.
+"""
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from . import auditoria
+from .managers import InscricaoDuplicada, InscricaoNegada, VagasEsgotadas
+from .models import Certificado, Evento, Inscricao
+from .paginacao import paginar_por_chave
+
+# Itens por página das listagens (?limite= aceita até ITENS_POR_PAGINA_MAXIMO)
+ITENS_POR_PAGINA = 50
+ITENS_POR_PAGINA_MAXIMO = 200
+
+# Eventos aceitos em uma única inscrição em lote
+EVENTOS_POR_INSCRICAO_EM_LOTE = 50
+
+# Campos de cada recurso: nome na API -> caminho usado no values() (com os JOINs)
+CAMPOS_EVENTO = {
+    'id': 'id',
+    'nome': 'nome',
+    'tipo_evento': 'tipo_evento',
+    'local': 'local',
+    'data_inicial': 'data_inicial',
+    'data_final': 'data_final',
+    'horario': 'horario',
+    'quantidade_participantes': 'quantidade_participantes',
+    'vagas_restantes': 'vagas_restantes',
+    'professor_responsavel': 'professor_responsavel_id',
+    'professor_responsavel_nome': 'professor_responsavel__nome',
+    'organizador_nome': 'organizador__nome',
+    'atualizado_em': 'atualizado_em',
+}
+
+CAMPOS_INSCRICAO = {
+    'id': 'id',
+    'evento': 'evento_id',
+    'evento_nome': 'evento__nome',
+    'evento_data_inicial': 'evento__data_inicial',
+    'evento_data_final': 'evento__data_final',
+    'evento_local': 'evento__local',
+    'presenca_confirmada': 'presenca_confirmada',
+    'atualizado_em': 'atualizado_em',
+}
+
+CAMPOS_CERTIFICADO = {
+    'id': 'id',
+    'inscricao': 'inscricao_id',
+    'evento': 'inscricao__evento_id',
+    'evento_nome': 'inscricao__evento__nome',
+    'data_emissao': 'data_emissao',
+    'status_emissao': 'status_emissao',
+    'texto_certificado': 'texto_certificado',
+}
+
+ORDEM_EVENTOS = ('data_inicial', 'id')
+ORDEM_INSCRICOES = ('id',)
+ORDEM_CERTIFICADOS = ('id',)
+
+
+class ErroApi(Exception):
+    """ Erro devolvido ao cliente como {'erro': mensagem, ...} com o status HTTP indicado. """
+
+    def __init__(self, mensagem, status=400, **extra):
+        super().__init__(mensagem)
+        self.status = status
+        self.extra = extra
+
+    def resposta(self):
+        return JsonResponse({'erro': str(self), **self.extra}, status=self.status)
+
+
+def rota(*metodos):
+    """
+    Decorador das views da API: restringe os métodos HTTP e converte ErroApi em
+    resposta JSON (em vez das páginas de erro e dos redirecionamentos das views HTML).
+    """
+    def decorador(view):
+        @require_http_methods(metodos)
+        @wraps(view)
+        def view_api(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except ErroApi as erro:
+                return erro.resposta()
+        return view_api
+    return decorador
+
+
+def exigir_login(request, *perfis):
+    """ Retorna o usuário logado; 401 sem login e 403 se o perfil não estiver em 'perfis'. """
+    usuario = request.user
+    if not usuario.is_authenticated:
+        raise ErroApi("Autenticação necessária.", status=401)
+    if perfis and usuario.perfil not in perfis:
+        raise ErroApi("Seu perfil não tem acesso a esta operação.", status=403)
+    return usuario
+
+
+def ler_json(request):
+    """ Corpo da requisição como um objeto JSON. """
+    try:
+        dados = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ErroApi("O corpo da requisição não é um JSON válido.")
+    if not isinstance(dados, dict):
+        raise ErroApi("O corpo da requisição deve ser um objeto JSON.")
+    return dados
+
+
+def dados_do_formulario(request):
+    """
+    (data, files) para os formulários: JSON ou, para enviar o banner, multipart
+    (apenas no POST, o único método em que o Django lê multipart).
+    """
+    if request.content_type == 'multipart/form-data':
+        return request.POST, request.FILES
+    return ler_json(request), None
+
+
+def erro_de_formulario(form):
+    return ErroApi("Dados inválidos.", erros=form.errors.get_json_data())
+
+
+# --- Leitura ---
+
+def campos_solicitados(request, campos):
+    """ Campos de ?fields= (na ordem pedida), ou todos. Campos desconhecidos resultam em 400. """
+    parametro = request.GET.get('fields', '').strip()
+    if not parametro:
+        return list(campos)
+    selecionados = list(dict.fromkeys(nome.strip() for nome in parametro.split(',') if nome.strip()))
+    desconhecidos = [nome for nome in selecionados if nome not in campos]
+    if desconhecidos:
+        raise ErroApi(f"Campos desconhecidos: {', '.join(desconhecidos)}.", disponiveis=list(campos))
+    return selecionados
+
+
+def _selecionar(consulta, campos, selecionados, extras=()):
+    caminhos = dict.fromkeys([campos[nome] for nome in selecionados] + [campo.lstrip('-') for campo in extras])
+    return consulta.values(*caminhos)
+
+
+def _serializar(linha, campos, selecionados):
+    return {nome: linha[campos[nome]] for nome in selecionados}
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limite', ITENS_POR_PAGINA))
+    except ValueError:
+        raise ErroApi("O parâmetro 'limite' deve ser um número inteiro.")
+    return max(1, min(limite, ITENS_POR_PAGINA_MAXIMO))
+
+
+def pagina(request, consulta, campos, ordem):
+    """
+    Uma página da listagem: {'resultados': [...], 'proxima': url ou null}. As colunas
+    da ordenação entram no SELECT para gerar o cursor, mesmo fora de ?fields=.
+    """
+    selecionados = campos_solicitados(request, campos)
+    linhas, proximo_cursor = paginar_por_chave(
+        _selecionar(consulta, campos, selecionados, ordem), ordem, request.GET.get('cursor'), _limite(request),
+    )
+    proxima = None
+    if proximo_cursor:
+        parametros = request.GET.copy()
+        parametros['cursor'] = proximo_cursor
+        proxima = request.build_absolute_uri(f'{request.path}?{parametros.urlencode()}')
+    return {
+        'resultados': [_serializar(linha, campos, selecionados) for linha in linhas],
+        'proxima': proxima,
+    }
+
+
+def item(request, consulta, campos, nao_encontrado="Registro não encontrado."):
+    """ Um único registro (consulta já filtrada pela chave), com os campos de ?fields=. """
+    selecionados = campos_solicitados(request, campos)
+    linha = _selecionar(consulta, campos, selecionados).first()
+    if linha is None:
+        raise ErroApi(nao_encontrado, status=404)
+    return _serializar(linha, campos, selecionados)
+
+
+def consulta_eventos():
+    return Evento.objects.com_vagas_restantes()
+
+
+def consulta_inscricoes(usuario):
+    return Inscricao.objects.filter(usuario=usuario)
+
+
+def consulta_certificados(usuario):
+    return Certificado.objects.filter(inscricao__usuario=usuario)
+
+
+# --- Escrita ---
+
+def _ids_de_eventos(dados):
+    ids = dados.get('eventos')
+    if not isinstance(ids, list) or not ids or not all(isinstance(valor, int) and not isinstance(valor, bool) for valor in ids):
+        raise ErroApi("Informe 'eventos': uma lista com os IDs dos eventos.")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > EVENTOS_POR_INSCRICAO_EM_LOTE:
+        raise ErroApi(f"No máximo {EVENTOS_POR_INSCRICAO_EM_LOTE} eventos por requisição.")
+    return ids
+
+
+def inscrever_em_lote(usuario, dados):
+    """
+    Inscreve o usuário em vários eventos de uma vez. Os eventos são lidos em uma única
+    consulta; cada inscrição passa pelo InscricaoManager.inscrever na sua própria
+    transação, então um evento lotado não desfaz as demais. Retorna um resultado por evento.
+    """
+    ids = _ids_de_eventos(dados)
+    eventos = Evento.objects.only('nome', 'data_inicial').in_bulk(ids)
+    resultados = []
+    for evento_id in ids:
+        evento = eventos.get(evento_id)
+        if evento is None:
+            resultados.append({'evento': evento_id, 'inscrito': False, 'motivo': 'nao_encontrado', 'erro': "Evento não encontrado."})
+            continue
+        try:
+            inscricao = Inscricao.objects.inscrever(usuario, evento)
+        except InscricaoNegada as erro:
+            resultados.append({'evento': evento_id, 'inscrito': False, 'motivo': _motivo(erro), 'erro': str(erro)})
+            continue
+        auditoria.registrar(usuario, 'inscricao', evento)
+        resultados.append({'evento': evento_id, 'inscrito': True, 'inscricao': inscricao.pk})
+    return resultados
+
+
+def _motivo(erro):
+    if isinstance(erro, InscricaoDuplicada):
+        return 'duplicada'
+    if isinstance(erro, VagasEsgotadas):
+        return 'vagas_esgotadas'
+    return 'negada'
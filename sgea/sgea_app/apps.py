@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SgeaAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sgea_app'
+
+    def ready(self):
+        # Registra os receptores de sinais (invalidação do cache do catálogo
+        # e o medidor de consultas instalado em cada conexão)
+        from . import busca, metricas, signals
+
+        # O índice de busca textual não vem das migrações (tabela virtual FTS5 / índice GIN)
+        post_migrate.connect(busca.preparar_indice, sender=self)
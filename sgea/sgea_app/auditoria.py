@@ -0,0 +1,55 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .filas import ProcessadorEmLote
+from .models import Evento, RegistroAuditoria, Usuario
+
+
+def _gravar_registros(registros):
+    """ Grava um lote de registros de auditoria com um único INSERT. """
+    RegistroAuditoria.objects.bulk_create(registros)
+
+
+def _gravar_registro(registro):
+    """
+    Grava um registro de um lote que falhou. Se o usuário ou o evento foi removido
+    entre a ação e a gravação, o registro é mantido sem a referência, como o SET_NULL
+    faz com os registros já gravados.
+    """
+    try:
+        with transaction.atomic():
+            RegistroAuditoria.objects.bulk_create([registro])
+            return
+    except IntegrityError:
+        pass
+    if registro.usuario_id and not Usuario.objects.filter(pk=registro.usuario_id).exists():
+        registro.usuario_id = None
+    if registro.evento_id and not Evento.objects.filter(pk=registro.evento_id).exists():
+        registro.evento_id = None
+    RegistroAuditoria.objects.bulk_create([registro])
+
+
+# Buffer compartilhado pelo processo: as views apenas enfileiram, e a thread do
+# processador grava os registros em lote.
+processador = ProcessadorEmLote(
+    'auditoria', _gravar_registros, capacidade=10000, tamanho_lote=500, processar_item=_gravar_registro,
+)
+
+
+def registrar(usuario, acao, evento=None, descricao=''):
+    """
+    Registra uma ação para a auditoria sem fazer INSERT na requisição.
+    A data/hora é a do momento da ação, e não a da gravação do lote.
+    """
+    processador.enfileirar(RegistroAuditoria(
+        usuario_id=usuario.pk if usuario else None,
+        evento_id=evento.pk if evento else None,
+        acao=acao,
+        descricao=descricao[:255],
+        data_hora=timezone.now(),
+    ))
+
+
+def descarregar():
+    """ Grava imediatamente os registros que ainda estão no buffer. """
+    processador.descarregar()
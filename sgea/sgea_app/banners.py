@@ -0,0 +1,170 @@
+"""
+Banners dos eventos: validação do upload e geração das miniaturas (WebP e JPEG em
+várias larguras) usadas no atributo srcset dos templates.
+
+As miniaturas são geradas fora da requisição, pela fila 'banners', depois do commit.
+Enquanto não ficam prontas, os templates mostram o original. O comando
+'gerar_miniaturas_banners' gera as miniaturas dos banners já existentes.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import catalogo
+from .filas import ProcessadorEmLote
+from .models import Evento
+
+logger = logging.getLogger(__name__)
+
+# Larguras (px) das miniaturas. Cobrem o cartão do catálogo (80px) e o detalhe (160px)
+# em telas comuns e de alta densidade (2x e 4x).
+LARGURAS_MINIATURA = (160, 320, 640)
+
+# Extensão do arquivo -> formato do Pillow. O WebP é servido a quem o aceita; o JPEG é o fallback.
+FORMATOS_MINIATURA = {'webp': 'WEBP', 'jpg': 'JPEG'}
+QUALIDADE_MINIATURA = 80
+
+# Limites do upload
+TAMANHO_MAXIMO_BANNER = 5 * 1024 * 1024
+PIXELS_MAXIMOS_BANNER = 40_000_000
+FORMATOS_ACEITOS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+
+
+def validar_banner(arquivo):
+    """
+    Valida um banner enviado: tamanho do arquivo, formato e dimensões. A imagem é
+    apenas identificada (cabeçalho), sem decodificar os pixels.
+    """
+    if not isinstance(arquivo, UploadedFile):
+        return  # banner já gravado (edição sem novo upload) ou removido
+
+    if arquivo.size > TAMANHO_MAXIMO_BANNER:
+        raise ValidationError(f"O banner deve ter no máximo {TAMANHO_MAXIMO_BANNER // (1024 * 1024)} MB.")
+
+    arquivo.seek(0)
+    try:
+        with Image.open(arquivo) as imagem:
+            formato = imagem.format
+            largura, altura = imagem.size
+            imagem.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValidationError("O banner enviado não é uma imagem válida.")
+    finally:
+        arquivo.seek(0)
+
+    if formato not in FORMATOS_ACEITOS:
+        raise ValidationError(f"Formato de banner não aceito. Envie {', '.join(sorted(FORMATOS_ACEITOS))}.")
+    if largura * altura > PIXELS_MAXIMOS_BANNER:
+        raise ValidationError(f"O banner tem {largura}x{altura} pixels; reduza a imagem antes de enviar.")
+
+
+def caminho_miniatura(nome_banner, largura, extensao):
+    """ Caminho determinístico da miniatura: uma nova geração sobrescreve a anterior. """
+    pasta, arquivo = posixpath.split(nome_banner)
+    base = posixpath.splitext(arquivo)[0]
+    return posixpath.join(pasta, 'miniaturas', f'{base}_{largura}.{extensao}')
+
+
+def url_miniatura(nome_banner, largura, extensao):
+    return default_storage.url(caminho_miniatura(nome_banner, largura, extensao))
+
+
+def srcset(nome_banner, larguras, extensao):
+    """ Valor do atributo srcset ('url 160w, url 320w, ...'). """
+    return ', '.join(f'{url_miniatura(nome_banner, largura, extensao)} {largura}w' for largura in larguras)
+
+
+def _larguras_para(largura_original):
+    """ Não amplia a imagem: banners menores que 160px ganham uma única miniatura do próprio tamanho. """
+    return [largura for largura in LARGURAS_MINIATURA if largura <= largura_original] or [largura_original]
+
+
+def _abrir_rgb(arquivo):
+    imagem = Image.open(arquivo)
+    # JPEGs grandes são decodificados já reduzidos (escala do DCT), o que poupa a maior parte do trabalho
+    maior = max(LARGURAS_MINIATURA)
+    imagem.draft('RGB', (maior, maior))
+    imagem = ImageOps.exif_transpose(imagem)
+    if imagem.mode in ('RGBA', 'LA', 'P'):
+        # O JPEG não tem transparência: o banner é aplicado sobre um fundo branco
+        imagem = imagem.convert('RGBA')
+        fundo = Image.new('RGB', imagem.size, 'white')
+        fundo.paste(imagem, mask=imagem.getchannel('A'))
+        return fundo
+    return imagem.convert('RGB')
+
+
+def gerar_miniaturas(nome_banner):
+    """
+    Gera as miniaturas de um banner gravado no storage e retorna as larguras geradas.
+    Roda em threads ou processos de fundo: não acessa o banco.
+    """
+    with default_storage.open(nome_banner, 'rb') as arquivo:
+        imagem = _abrir_rgb(arquivo)
+
+    larguras = _larguras_para(imagem.width)
+    # Da maior para a menor: cada redução parte da anterior, que já é pequena
+    origem = imagem
+    for largura in sorted(larguras, reverse=True):
+        altura = max(1, round(imagem.height * largura / imagem.width))
+        origem = origem.resize((largura, altura), Image.Resampling.LANCZOS)
+        for extensao, formato in FORMATOS_MINIATURA.items():
+            buffer = BytesIO()
+            origem.save(buffer, formato, quality=QUALIDADE_MINIATURA, optimize=True)
+            nome = caminho_miniatura(nome_banner, largura, extensao)
+            if default_storage.exists(nome):
+                default_storage.delete(nome)
+            default_storage.save(nome, ContentFile(buffer.getvalue()))
+    return sorted(larguras)
+
+
+def gravar_larguras(resultados):
+    """
+    Grava as larguras geradas ({(evento_id, nome_banner): larguras}). O UPDATE é
+    condicional ao banner: se ele foi trocado durante a geração, o resultado é descartado
+    (o novo banner já está na fila). Retorna quantos eventos foram atualizados.
+    """
+    atualizados = 0
+    with transaction.atomic():
+        for (evento_id, nome_banner), larguras in resultados.items():
+            atualizados += Evento.objects.filter(pk=evento_id, banner=nome_banner).update(banner_larguras=larguras)
+    # O UPDATE não dispara post_save: as páginas do catálogo em cache ainda mostram o original
+    if atualizados:
+        transaction.on_commit(catalogo.invalidar_catalogo)
+    return atualizados
+
+
+def _processar_banners(lote):
+    resultados = {}
+    for evento_id, nome_banner in lote:
+        try:
+            resultados[(evento_id, nome_banner)] = gerar_miniaturas(nome_banner)
+        except Exception:
+            # Um banner com problema não impede os demais do lote
+            logger.exception("Falha ao gerar as miniaturas do banner '%s' (evento %s).", nome_banner, evento_id)
+    gravar_larguras(resultados)
+
+
+# Poucos itens por lote: cada banner leva dezenas de milissegundos para processar
+processador = ProcessadorEmLote('banners', _processar_banners, capacidade=1000, tamanho_lote=10)
+
+
+def agendar_miniaturas(evento):
+    """
+    Chamada após salvar um evento com banner novo: descarta as miniaturas do banner
+    anterior e enfileira a geração das novas para depois do commit.
+    """
+    # A instância pode ter sido lida antes de a geração anterior gravar as larguras: o
+    # UPDATE não depende do valor em memória
+    evento.banner_larguras = []
+    Evento.objects.filter(pk=evento.pk).update(banner_larguras=[])
+    if evento.banner:
+        item = (evento.pk, evento.banner.name)
+        transaction.on_commit(lambda: processador.enfileirar(item))
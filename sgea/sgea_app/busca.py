@@ -0,0 +1,161 @@
+"""
+Busca textual no catálogo de eventos (nome, local e tipo), com índice próprio do banco:
+
+- SQLite: tabela virtual FTS5 (EventoBusca) com o tokenizador unicode61 e
+  remove_diacritics 2 ("computacao" encontra "Computação"), índices de prefixo e
+  ranking bm25 com pesos por coluna (nome > local > tipo). A tabela é criada no
+  post_migrate e mantida pelos sinais de Evento (signals.py); caminhos em massa
+  (bulk_create, update()) chamam reconstruir_indice().
+- PostgreSQL: tsvector com a configuração 'sgea_portugues' (português + unaccent),
+  pesos A/B/C e um índice GIN sobre a mesma expressão; o próprio banco mantém o índice.
+
+Cada palavra digitada vira um prefixo ("semana comp" encontra "Semana da Computação"),
+e todas precisam estar presentes.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Evento, EventoBusca
+
+# Palavras consideradas por busca (o restante é ignorado)
+MAXIMO_TERMOS = 8
+
+PESOS_BM25 = (10.0, 2.0, 1.0)  # nome, local, tipo_evento
+
+SQL_SQLITE_CRIAR = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {EventoBusca._meta.db_table} USING fts5("
+    "nome, local, tipo_evento, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+# Expressão do tsvector; {tabela} permite qualificar as colunas nas consultas (com JOINs,
+# 'nome' também existe em Usuario). O índice usa a versão sem qualificação.
+EXPRESSAO_PG = (
+    "setweight(to_tsvector('sgea_portugues', coalesce({tabela}nome, '')), 'A') || "
+    "setweight(to_tsvector('sgea_portugues', coalesce({tabela}local, '')), 'B') || "
+    "setweight(to_tsvector('sgea_portugues', coalesce({tabela}tipo_evento, '')), 'C')"
+)
+
+SQL_PG_PREPARAR = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'sgea_portugues') THEN
+            CREATE TEXT SEARCH CONFIGURATION sgea_portugues (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION sgea_portugues
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END $$
+    """,
+    f"CREATE INDEX IF NOT EXISTS evento_busca_gin ON {Evento._meta.db_table} "
+    f"USING GIN (({EXPRESSAO_PG.format(tabela='')}))",
+)
+
+
+def _vendor(using):
+    return connections[using].vendor
+
+
+def termos(texto):
+    """ Palavras da busca, em minúsculas (letras e números; pontuação é descartada). """
+    return re.findall(r'\w+', (texto or '').lower())[:MAXIMO_TERMOS]
+
+
+def buscar(eventos, texto):
+    """
+    Restringe o queryset de Evento aos que correspondem à busca, do mais relevante para
+    o menos relevante. Os demais filtros (datas, vagas, inscrições) continuam no mesmo SQL.
+    """
+    palavras = termos(texto)
+    if not palavras:
+        return eventos.none()
+
+    vendor = _vendor(eventos.db)
+    if vendor == 'sqlite':
+        # "palavra"* : prefixo; aspas evitam que a palavra seja lida como operador (AND, NOT...)
+        consulta = ' '.join(f'"{palavra}"*' for palavra in palavras)
+        return eventos.filter(busca__documento__corresponde=consulta).annotate(
+            relevancia=F('busca__relevancia')
+        ).order_by('relevancia', 'id')
+
+    if vendor == 'postgresql':
+        consulta = ' & '.join(f'{palavra}:*' for palavra in palavras)
+        expressao = EXPRESSAO_PG.format(tabela=f'{Evento._meta.db_table}.')
+        return eventos.filter(
+            RawSQL(f"({expressao}) @@ to_tsquery('sgea_portugues', %s)", [consulta], output_field=BooleanField())
+        ).annotate(
+            relevancia=RawSQL(f"ts_rank({expressao}, to_tsquery('sgea_portugues', %s))", [consulta], output_field=FloatField())
+        ).order_by('-relevancia', 'id')
+
+    return buscar_sem_indice(eventos, texto)
+
+
+def buscar_sem_indice(eventos, texto):
+    """
+    Busca com icontains, que varre a tabela inteira e não ignora acentos. Usada nos
+    bancos sem índice textual e como referência no comando benchmark_busca.
+    """
+    for palavra in termos(texto):
+        eventos = eventos.filter(Q(nome__icontains=palavra) | Q(local__icontains=palavra) | Q(tipo_evento__icontains=palavra))
+    return eventos.order_by('data_inicial', 'id')
+
+
+# --- Manutenção do índice ---
+
+def _tabela():
+    return EventoBusca._meta.db_table
+
+
+def preparar_indice(using='default', **kwargs):
+    """
+    Receptor do post_migrate: cria o índice de busca se ainda não existir. No SQLite, a
+    tabela recém-criada é populada com os eventos já cadastrados.
+    """
+    conexao = connections[using]
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'sqlite':
+            existia = _tabela() in conexao.introspection.table_names(cursor)
+            cursor.execute(SQL_SQLITE_CRIAR)
+            if not existia:
+                pesos = ', '.join(str(peso) for peso in PESOS_BM25)
+                # Configuração persistente da coluna 'rank' (bm25 com pesos por coluna)
+                cursor.execute(f"INSERT INTO {_tabela()}({_tabela()}, rank) VALUES ('rank', 'bm25({pesos})')")
+                reconstruir_indice(using)
+        elif conexao.vendor == 'postgresql':
+            for sql in SQL_PG_PREPARAR:
+                cursor.execute(sql)
+
+
+def reconstruir_indice(using='default'):
+    """ Refaz o índice a partir da tabela de eventos (após bulk_create ou update() em massa). """
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return  # no PostgreSQL o índice GIN é mantido pelo próprio banco
+    with conexao.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {_tabela()}')
+        cursor.execute(
+            f'INSERT INTO {_tabela()}(rowid, nome, local, tipo_evento) '
+            f'SELECT id, nome, local, tipo_evento FROM {Evento._meta.db_table}'
+        )
+
+
+def indexar_evento(evento, using='default'):
+    """ Insere ou substitui o evento no índice (um único comando). """
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {_tabela()}(rowid, nome, local, tipo_evento) VALUES (%s, %s, %s, %s)',
+            [evento.pk, evento.nome, evento.local, evento.tipo_evento],
+        )
+
+
+def remover_evento(evento_id, using='default'):
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return
+    with conexao.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {_tabela()} WHERE rowid = %s', [evento_id])
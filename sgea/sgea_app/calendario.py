@@ -0,0 +1,114 @@
+"""
+Feeds iCalendar (RFC 5545) dos eventos: o catálogo público e a agenda de cada
+usuário (eventos em que está inscrito), para assinatura em aplicativos de calendário.
+
+Os aplicativos não fazem login: a agenda do usuário é acessada por um endereço com
+um token assinado (como o código de check-in). Os eventos são de dia inteiro, pois
+o horário é um texto livre; ele vai na descrição.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.http import StreamingHttpResponse
+
+# O salt separa estas assinaturas de outras feitas com a mesma SECRET_KEY
+SALT_AGENDA = 'sgea_app.agenda'
+
+# Linhas buscadas do banco por vez; a memória usada não depende do tamanho do feed
+TAMANHO_BLOCO = 2000
+
+# Colunas de Evento usadas no feed (values(): sem instâncias de modelo)
+CAMPOS_EVENTO = (
+    'id', 'nome', 'tipo_evento', 'local', 'data_inicial', 'data_final', 'horario',
+    'atualizado_em', 'professor_responsavel__nome',
+)
+
+
+def gerar_token_agenda(usuario_id):
+    return signing.Signer(salt=SALT_AGENDA).sign(str(usuario_id))
+
+
+def verificar_token_agenda(token):
+    """ Retorna o ID do usuário ou levanta signing.BadSignature, sem consultar o banco. """
+    valor = signing.Signer(salt=SALT_AGENDA).unsign(token)
+    if not valor.isdigit():
+        raise signing.BadSignature("Token de agenda malformado.")
+    return int(valor)
+
+
+def _escapar(texto):
+    """ Escapa um valor de texto (seção 3.3.11 da RFC 5545). """
+    return (
+        str(texto).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _dobrar(linha):
+    """ Quebra linhas com mais de 75 bytes (seção 3.1), sem partir caracteres UTF-8. """
+    if len(linha.encode()) <= 75:  # caso comum
+        return linha + '\r\n'
+    partes = []
+    atual, tamanho = [], 0
+    for caractere in linha:
+        bytes_caractere = len(caractere.encode())
+        if tamanho + bytes_caractere > 75:
+            partes.append(''.join(atual))
+            # As linhas de continuação começam com um espaço, que conta no limite
+            atual, tamanho = [' '], 1
+        atual.append(caractere)
+        tamanho += bytes_caractere
+    partes.append(''.join(atual))
+    return '\r\n'.join(partes) + '\r\n'
+
+
+def _formatar_instante(valor):
+    return valor.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _vevento(evento, url_evento):
+    alterado = _formatar_instante(evento['atualizado_em'])
+    descricao = f"Horário: {evento['horario']}\nProfessor responsável: {evento['professor_responsavel__nome']}"
+    linhas = (
+        'BEGIN:VEVENT',
+        f"UID:evento-{evento['id']}@sgea",
+        f'DTSTAMP:{alterado}',
+        f'LAST-MODIFIED:{alterado}',
+        f"DTSTART;VALUE=DATE:{evento['data_inicial']:%Y%m%d}",
+        # DTEND de dia inteiro é exclusivo: o dia seguinte ao último dia do evento
+        f"DTEND;VALUE=DATE:{evento['data_final'] + timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{_escapar(evento['nome'])} ({_escapar(evento['tipo_evento'])})",
+        f"LOCATION:{_escapar(evento['local'])}",
+        f'DESCRIPTION:{_escapar(descricao)}',
+        f"URL:{url_evento(evento['id'])}",
+        'END:VEVENT',
+    )
+    return ''.join(_dobrar(linha) for linha in linhas)
+
+
+def gerar_ics(eventos, nome_calendario, url_evento):
+    """
+    Gera o calendário em pedaços (um por evento), a partir de um queryset de Evento.
+    'url_evento' recebe o ID e devolve o endereço absoluto da página do evento.
+    """
+    yield ''.join(_dobrar(linha) for linha in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//SGEA//Eventos Acadêmicos//PT-BR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escapar(nome_calendario)}',
+    ))
+    consulta = eventos.order_by('data_inicial', 'id').values(*CAMPOS_EVENTO)
+    for evento in consulta.iterator(chunk_size=TAMANHO_BLOCO):
+        yield _vevento(evento, url_evento)
+    yield _dobrar('END:VCALENDAR')
+
+
+def resposta_ics(eventos, nome_calendario, nome_arquivo, url_evento):
+    """ Feed enviado evento a evento por um StreamingHttpResponse. """
+    resposta = StreamingHttpResponse(
+        gerar_ics(eventos, nome_calendario, url_evento), content_type='text/calendar; charset=utf-8',
+    )
+    resposta['Content-Disposition'] = f'inline; filename="{nome_arquivo}.ics"'
+    return resposta
@@ -0,0 +1,269 @@
+import hashlib
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import busca
+from .models import Evento, Inscricao
+from .paginacao import apaginar_por_chave, codificar_cursor, decodificar_cursor, paginar_por_chave
+
+# Quantidade de eventos por página na listagem pública
+EVENTOS_POR_PAGINA = 20
+
+# Resultados exibidos por busca (os mais relevantes; a busca não é paginada)
+RESULTADOS_DA_BUSCA = 50
+
+# Colunas usadas pelos cartões de 'lista_eventos.html'. Apenas elas são buscadas,
+# junto com os nomes do professor e do organizador (carregados no mesmo JOIN).
+CAMPOS_CARTAO_EVENTO = (
+    'id', 'nome', 'tipo_evento', 'local', 'data_inicial', 'data_final', 'horario',
+    'banner', 'banner_larguras', 'quantidade_participantes', 'vagas_ocupadas',
+    'professor_responsavel__nome', 'organizador__nome',
+)
+
+ORDEM_CATALOGO = ('data_inicial', 'id')
+
+# Chaves do cache. As páginas dependem da versão do catálogo, que muda a cada
+# alteração de Evento; as inscrições do usuário têm chave própria, removida quando uma
+# inscrição daquele usuário muda. As vagas de cada evento ficam em uma chave com a
+# versão das vagas do evento, trocada (por um valor nunca usado antes) a cada inscrição:
+# um valor lido do banco antes da troca vai para a chave antiga, que ninguém mais lê.
+CHAVE_VERSAO = 'catalogo:versao'
+CHAVE_PAGINA = 'catalogo:pagina:{dia}:{versao}:{com_vagas}:{cursor}'
+CHAVE_VERSAO_VAGAS = 'catalogo:vagas:{evento_id}:versao'
+CHAVE_VAGAS = 'catalogo:vagas:{evento_id}:{versao}'
+CHAVE_INSCRITOS = 'catalogo:inscritos:{usuario_id}'
+
+
+def _tempo_de_vida():
+    """
+    As páginas valem no máximo até a meia-noite: o corte 'data_inicial > hoje' muda
+    de um dia para o outro (e o dia também faz parte da chave).
+    """
+    agora = timezone.now()
+    meia_noite = datetime.combine(agora.date() + timedelta(days=1), time.min, tzinfo=agora.tzinfo)
+    ate_meia_noite = int((meia_noite - agora).total_seconds()) + 1
+    return min(ate_meia_noite, getattr(settings, 'SGEA_CATALOGO_CACHE_SEGUNDOS', 300))
+
+
+def consulta_catalogo(hoje, somente_com_vagas=False):
+    """
+    Eventos que ainda não começaram. Professor e organizador vêm no mesmo JOIN,
+    evitando duas consultas por cartão, e as vagas restantes são calculadas pelo
+    banco na mesma consulta.
+    """
+    eventos = Evento.objects.filter(
+        data_inicial__gt=hoje
+    ).select_related(
+        'professor_responsavel', 'organizador'
+    ).only(*CAMPOS_CARTAO_EVENTO).com_vagas_restantes()
+
+    # Eventos lotados são removidos no SQL, e não depois em Python
+    if somente_com_vagas:
+        eventos = eventos.com_vagas_disponiveis()
+    return eventos
+
+
+async def abuscar_no_catalogo(texto, usuario=None, somente_com_vagas=False):
+    """
+    Busca textual no catálogo (busca.py), do mais relevante para o menos relevante.
+    Os filtros do catálogo (eventos futuros, com vagas) e o de inscrições do usuário
+    entram no mesmo SQL, junto com o índice de busca. Não passa pelo cache.
+    """
+    eventos = busca.buscar(consulta_catalogo(timezone.now().date(), somente_com_vagas), texto)
+    if usuario is not None:
+        eventos = eventos.exclude(inscricoes__usuario=usuario)
+    return [evento async for evento in eventos[:RESULTADOS_DA_BUSCA]]
+
+
+def versao_catalogo():
+    return cache.get(CHAVE_VERSAO, 0)
+
+
+def _chave_pagina(hoje, versao, cursor, somente_com_vagas):
+    return CHAVE_PAGINA.format(
+        dia=hoje.isoformat(),
+        versao=versao,
+        com_vagas=int(somente_com_vagas),
+        cursor=hashlib.md5(cursor.encode()).hexdigest() if cursor else 'inicio',
+    )
+
+
+def _cursor_valido(cursor):
+    """ Cursores inválidos viram a primeira página (e não poluem o cache com chaves novas). """
+    if decodificar_cursor(cursor, Evento, ORDEM_CATALOGO) is None:
+        return None
+    return cursor
+
+
+def _nova_versao():
+    return uuid.uuid4().hex
+
+
+def _chaves_vagas(eventos, versoes):
+    """ {chave das vagas na versão atual: evento}, a partir de {chave da versão: versão}. """
+    return {
+        CHAVE_VAGAS.format(evento_id=evento.id, versao=versoes[CHAVE_VERSAO_VAGAS.format(evento_id=evento.id)]): evento
+        for evento in eventos
+    }
+
+
+def _versoes_vagas(eventos):
+    """ Versões atuais das vagas dos eventos. Uma versão que saiu do cache é recriada com um valor novo. """
+    chaves = [CHAVE_VERSAO_VAGAS.format(evento_id=evento.id) for evento in eventos]
+    versoes = cache.get_many(chaves)
+    faltando = [chave for chave in chaves if chave not in versoes]
+    if faltando:
+        for chave in faltando:
+            cache.add(chave, _nova_versao(), timeout=None)
+        versoes.update(cache.get_many(faltando))
+    return versoes
+
+
+async def _aversoes_vagas(eventos):
+    chaves = [CHAVE_VERSAO_VAGAS.format(evento_id=evento.id) for evento in eventos]
+    versoes = await cache.aget_many(chaves)
+    faltando = [chave for chave in chaves if chave not in versoes]
+    if faltando:
+        for chave in faltando:
+            await cache.aadd(chave, _nova_versao(), timeout=None)
+        versoes.update(await cache.aget_many(faltando))
+    return versoes
+
+
+def _aplicar_vagas(eventos, ocupadas, somente_com_vagas):
+    for evento in eventos:
+        evento.vagas_ocupadas = ocupadas.get(evento.id, evento.vagas_ocupadas)
+        evento.vagas_restantes = evento.quantidade_participantes - evento.vagas_ocupadas
+    if somente_com_vagas:
+        eventos = [evento for evento in eventos if evento.vagas_restantes > 0]
+    return eventos
+
+
+def pagina_do_catalogo(cursor, somente_com_vagas=False):
+    """
+    Página do catálogo público, igual para todos os visitantes e servida do cache.
+    Retorna (eventos, proximo_cursor). As vagas restantes de cada evento são lidas
+    de chaves próprias, atualizadas a cada inscrição sem invalidar a página. As vagas
+    lidas junto com uma página nova não vão para o cache: a versão das vagas não foi
+    lida antes delas, e elas podem ser anteriores a uma inscrição.
+    """
+    hoje = timezone.now().date()
+    cursor = _cursor_valido(cursor)
+    chave = _chave_pagina(hoje, versao_catalogo(), cursor, somente_com_vagas)
+
+    pagina = cache.get(chave)
+    if pagina is None:
+        pagina = paginar_por_chave(consulta_catalogo(hoje, somente_com_vagas), ORDEM_CATALOGO, cursor, EVENTOS_POR_PAGINA)
+        cache.set(chave, pagina, _tempo_de_vida())
+        return pagina
+
+    eventos, proximo_cursor = pagina
+    return _aplicar_vagas(eventos, _vagas_ocupadas(eventos), somente_com_vagas), proximo_cursor
+
+
+async def apagina_do_catalogo(cursor, somente_com_vagas=False):
+    """ Versão assíncrona de pagina_do_catalogo (cache e ORM assíncronos), usada pela view async. """
+    hoje = timezone.now().date()
+    cursor = _cursor_valido(cursor)
+    chave = _chave_pagina(hoje, await cache.aget(CHAVE_VERSAO, 0), cursor, somente_com_vagas)
+
+    pagina = await cache.aget(chave)
+    if pagina is None:
+        pagina = await apaginar_por_chave(consulta_catalogo(hoje, somente_com_vagas), ORDEM_CATALOGO, cursor, EVENTOS_POR_PAGINA)
+        await cache.aset(chave, pagina, _tempo_de_vida())
+        return pagina
+
+    eventos, proximo_cursor = pagina
+    return _aplicar_vagas(eventos, await _avagas_ocupadas(eventos), somente_com_vagas), proximo_cursor
+
+
+async def acompletar_pagina(eventos, proximo_cursor, somente_com_vagas=False, ocultos=frozenset()):
+    """
+    Remove da página os eventos em 'ocultos' (as inscrições do usuário) e, se ela
+    ficar curta, continua lendo as páginas seguintes do cache até juntar
+    EVENTOS_POR_PAGINA eventos. Se sobrar, o cursor passa a apontar para logo depois
+    do último evento exibido. Retorna (eventos, proximo_cursor).
+    """
+    eventos = [evento for evento in eventos if evento.id not in ocultos]
+    while len(eventos) < EVENTOS_POR_PAGINA and proximo_cursor:
+        seguintes, proximo_cursor = await apagina_do_catalogo(proximo_cursor, somente_com_vagas)
+        eventos += [evento for evento in seguintes if evento.id not in ocultos]
+
+    if len(eventos) > EVENTOS_POR_PAGINA:
+        eventos = eventos[:EVENTOS_POR_PAGINA]
+        proximo_cursor = codificar_cursor(eventos[-1], ORDEM_CATALOGO)
+    return eventos, proximo_cursor
+
+
+def _vagas_ocupadas(eventos):
+    """
+    Lê as vagas ocupadas do cache; as que faltarem vêm do banco em uma única consulta
+    e são guardadas na versão lida antes dela.
+    """
+    chaves = _chaves_vagas(eventos, _versoes_vagas(eventos))
+    ocupadas = {chaves[chave].id: valor for chave, valor in cache.get_many(chaves).items()}
+
+    faltando = [evento.id for evento in eventos if evento.id not in ocupadas]
+    if faltando:
+        do_banco = dict(Evento.objects.filter(pk__in=faltando).values_list('id', 'vagas_ocupadas'))
+        cache.set_many({chave: do_banco[evento.id] for chave, evento in chaves.items() if evento.id in do_banco})
+        ocupadas.update(do_banco)
+    return ocupadas
+
+
+async def _avagas_ocupadas(eventos):
+    chaves = _chaves_vagas(eventos, await _aversoes_vagas(eventos))
+    ocupadas = {chaves[chave].id: valor for chave, valor in (await cache.aget_many(chaves)).items()}
+
+    faltando = [evento.id for evento in eventos if evento.id not in ocupadas]
+    if faltando:
+        do_banco = {
+            evento_id: valor
+            async for evento_id, valor in Evento.objects.filter(pk__in=faltando).values_list('id', 'vagas_ocupadas')
+        }
+        await cache.aset_many({chave: do_banco[evento.id] for chave, evento in chaves.items() if evento.id in do_banco})
+        ocupadas.update(do_banco)
+    return ocupadas
+
+
+def eventos_inscritos(usuario):
+    """ IDs dos eventos em que o usuário está inscrito, guardados no cache por usuário. """
+    chave = CHAVE_INSCRITOS.format(usuario_id=usuario.pk)
+    ids = cache.get(chave)
+    if ids is None:
+        ids = frozenset(Inscricao.objects.filter(usuario=usuario).values_list('evento_id', flat=True))
+        cache.set(chave, ids, getattr(settings, 'SGEA_CATALOGO_CACHE_SEGUNDOS', 300))
+    return ids
+
+
+async def aeventos_inscritos(usuario):
+    chave = CHAVE_INSCRITOS.format(usuario_id=usuario.pk)
+    ids = await cache.aget(chave)
+    if ids is None:
+        ids = frozenset([
+            evento_id async for evento_id in Inscricao.objects.filter(usuario=usuario).values_list('evento_id', flat=True)
+        ])
+        await cache.aset(chave, ids, getattr(settings, 'SGEA_CATALOGO_CACHE_SEGUNDOS', 300))
+    return ids
+
+
+# --- Invalidação (chamada pelos sinais em signals.py) ---
+
+def invalidar_catalogo():
+    """ Muda a versão do catálogo: as páginas antigas deixam de ser usadas e expiram sozinhas. """
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO, 1, timeout=None)
+
+
+def invalidar_vagas(evento_id):
+    cache.set(CHAVE_VERSAO_VAGAS.format(evento_id=evento_id), _nova_versao(), timeout=None)
+
+
+def invalidar_inscritos(usuario_id):
+    cache.delete(CHAVE_INSCRITOS.format(usuario_id=usuario_id))
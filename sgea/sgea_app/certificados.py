@@ -0,0 +1,311 @@
+import os
+import socket
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import estatisticas
+from .models import Certificado, Evento, Inscricao
+from .pdf import renderizar_certificado
+
+# Quantidade de certificados renderizados e gravados por lote (um bulk_create por lote)
+TAMANHO_LOTE = 500
+
+# Tempo após o qual a reserva de um evento é considerada abandonada (processo morto)
+PRAZO_RESERVA = timedelta(minutes=30)
+
+ResultadoEmissao = namedtuple('ResultadoEmissao', ['emitidos', 'segundos', 'por_segundo'])
+
+
+def caminho_do_arquivo(evento_id, inscricao_id):
+    """ Caminho padrão do PDF; se já estiver ocupado, o storage grava com um sufixo no nome. """
+    return f'certificados/evento_{evento_id}/inscricao_{inscricao_id}.pdf'
+
+
+def inscricoes_pendentes(evento):
+    """ Inscrições com presença confirmada que ainda não têm certificado. """
+    return Inscricao.objects.filter(
+        evento=evento,
+        presenca_confirmada=True,
+        certificado__isnull=True,
+    )
+
+
+def _inserir_certificados(certificados, using='default'):
+    """
+    Cria os certificados com um INSERT ... ON CONFLICT DO NOTHING RETURNING (SQLite e
+    PostgreSQL) e retorna os IDs das inscrições cujos certificados foram de fato
+    inseridos: os que outra execução emitiu ao mesmo tempo ficam de fora.
+    """
+    conexao = connections[using]
+    nome = conexao.ops.quote_name
+    campos = [Certificado._meta.get_field(campo) for campo in (
+        'inscricao', 'data_emissao', 'texto_certificado', 'status_emissao', 'arquivo_certificado',
+    )]
+    hoje = timezone.now().date()
+    valores = []
+    for certificado in certificados:
+        certificado.data_emissao = hoje
+        valores += [campo.get_db_prep_save(getattr(certificado, campo.attname), conexao) for campo in campos]
+
+    linha = f'({", ".join(["%s"] * len(campos))})'
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {nome(Certificado._meta.db_table)} ({", ".join(nome(campo.column) for campo in campos)}) '
+            f'VALUES {", ".join([linha] * len(certificados))} '
+            f'ON CONFLICT ({nome(campos[0].column)}) DO NOTHING RETURNING {nome(campos[0].column)}',
+            valores,
+        )
+        return {inscricao_id for inscricao_id, in cursor.fetchall()}
+
+
+def _gravar_lote(evento_id, renderizados):
+    """
+    Salva os PDFs do lote no storage e só então cria os registros de Certificado, em
+    uma transação curta: a gravação dos arquivos não segura a trava de escrita do banco.
+    Os arquivos dos certificados que outra execução emitiu ao mesmo tempo são
+    descartados. Retorna quantos foram inseridos.
+    """
+    # 1. Arquivos primeiro. O storage escolhe outro nome se o caminho já existir, então
+    # o arquivo de uma execução concorrente nunca é sobrescrito
+    salvos = {}
+    try:
+        for inscricao_id, _, pdf in renderizados:
+            salvos[inscricao_id] = default_storage.save(caminho_do_arquivo(evento_id, inscricao_id), ContentFile(pdf))
+
+        # 2. Registros, com um único INSERT
+        with transaction.atomic():
+            inseridos = _inserir_certificados([
+                Certificado(
+                    inscricao_id=inscricao_id,
+                    texto_certificado=texto,
+                    status_emissao='Emitido',
+                    arquivo_certificado=salvos[inscricao_id],
+                )
+                for inscricao_id, texto, _ in renderizados
+            ])
+    except Exception:
+        for salvo in salvos.values():
+            default_storage.delete(salvo)
+        raise
+
+    # 3. Descarta os arquivos que ficaram sem registro. Quando o caminho padrão já estava
+    # ocupado e o registro é desta execução, o arquivo de lá não pertence a nenhum
+    # certificado (sobra de uma execução interrompida antes de gravar o seu registro)
+    for inscricao_id, salvo in salvos.items():
+        nome = caminho_do_arquivo(evento_id, inscricao_id)
+        if inscricao_id not in inseridos:
+            default_storage.delete(salvo)
+        elif salvo != nome:
+            default_storage.delete(nome)
+    return len(inseridos)
+
+
+def emitir_certificados_evento(evento, processos=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Emite os certificados pendentes do evento.
+
+    Os PDFs são renderizados em um pool de processos (um por CPU, por padrão) e os
+    registros são criados em lotes com bulk_create. A operação é idempotente e
+    retomável: cada lote é gravado ao terminar, e uma nova execução só processa as
+    inscrições que ainda não têm certificado.
+    """
+    processos = processos or os.cpu_count() or 1
+    campos = (
+        'id', 'usuario__nome', 'evento__nome', 'evento__tipo_evento',
+        'evento__data_inicial', 'evento__data_final', 'evento__local',
+    )
+    pendentes = inscricoes_pendentes(evento).values(*campos).order_by('id')
+
+    emitidos = 0
+    ultimo_id = 0
+    inicio = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+    try:
+        while True:
+            # Percorre as pendentes por chave (id), um lote de cada vez
+            lote = list(pendentes.filter(id__gt=ultimo_id)[:tamanho_lote])
+            if not lote:
+                break
+            ultimo_id = lote[-1]['id']
+
+            if pool:
+                renderizados = list(pool.map(renderizar_certificado, lote, chunksize=max(1, len(lote) // (processos * 4))))
+            else:
+                renderizados = [renderizar_certificado(dados) for dados in lote]
+
+            emitidos += _gravar_lote(evento.pk, renderizados)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    # Um recálculo das estatísticas do evento ao final, em vez de um incremento por
+    # certificado; também conta o que uma execução interrompida deixou gravado
+    estatisticas.recalcular_evento(evento.pk)
+
+    segundos = time.perf_counter() - inicio
+    por_segundo = emitidos / segundos if segundos > 0 else 0.0
+    return ResultadoEmissao(emitidos, segundos, por_segundo)
+
+
+# --- Emissão automática dos eventos encerrados ---
+
+def identificador_trabalhador():
+    """ Identifica o processo que reservou um evento (máquina e PID). """
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _disponiveis(agora, prazo_reserva=PRAZO_RESERVA):
+    """ Eventos não processados, ou cuja reserva expirou (o processo que os reservou morreu). """
+    return Q(emissao_status='Aguardando') | Q(
+        emissao_status='Em Processamento', emissao_reservada_em__lt=agora - prazo_reserva,
+    )
+
+
+def consulta_eventos_encerrados(prazo_reserva=PRAZO_RESERVA):
+    """
+    Eventos já encerrados que ainda precisam de emissão, mais antigos primeiro.
+    Uma única consulta sobre o índice (emissao_status, data_final).
+    """
+    agora = timezone.now()
+    return Evento.objects.filter(
+        _disponiveis(agora, prazo_reserva),
+        data_final__lt=agora.date(),
+    ).order_by('data_final', 'id')
+
+
+def eventos_encerrados_pendentes(limite=100, prazo_reserva=PRAZO_RESERVA):
+    """ IDs dos próximos 'limite' eventos a processar. """
+    return list(consulta_eventos_encerrados(prazo_reserva).values_list('id', flat=True)[:limite])
+
+
+def reservar_evento(evento_id, trabalhador, prazo_reserva=PRAZO_RESERVA):
+    """
+    Reserva o evento para este processo com um UPDATE condicional: de vários processos
+    que tentarem ao mesmo tempo, só um altera a linha. Retorna True se a reserva foi obtida.
+    """
+    agora = timezone.now()
+    return Evento.objects.filter(
+        _disponiveis(agora, prazo_reserva), pk=evento_id,
+    ).update(
+        emissao_status='Em Processamento', emissao_reservada_por=trabalhador, emissao_reservada_em=agora,
+    ) == 1
+
+
+def marcar_emitidos(evento_id, trabalhador=None):
+    """
+    Grava o evento como processado. Com 'trabalhador', só conclui se a reserva ainda é
+    deste processo (se ela expirou e outro processo a retomou, ele concluirá).
+    """
+    eventos = Evento.objects.filter(pk=evento_id)
+    if trabalhador is not None:
+        eventos = eventos.filter(emissao_status='Em Processamento', emissao_reservada_por=trabalhador)
+    return eventos.update(
+        emissao_status='Emitidos', emissao_reservada_por='', emissao_reservada_em=None,
+        certificados_emitidos_em=timezone.now(),
+    ) == 1
+
+
+def liberar_reserva(evento_id, trabalhador):
+    """ Devolve o evento à fila após uma falha, para uma nova tentativa. """
+    Evento.objects.filter(
+        pk=evento_id, emissao_status='Em Processamento', emissao_reservada_por=trabalhador,
+    ).update(emissao_status='Aguardando', emissao_reservada_por='', emissao_reservada_em=None)
+
+
+def solicitar_emissao(evento_id):
+    """
+    Devolve o evento à fila da emissão automática (emitir_certificados --encerrados),
+    por exemplo para emitir presenças confirmadas depois da última emissão. Um evento
+    reservado por outro processo não é alterado: a emissão em andamento o concluirá.
+    Retorna True se o evento foi enfileirado.
+    """
+    return Evento.objects.filter(pk=evento_id).exclude(emissao_status='Em Processamento').update(
+        emissao_status='Aguardando', emissao_reservada_por='', emissao_reservada_em=None,
+    ) == 1
+
+def emitir_eventos_encerrados(trabalhador=None, limite=100, processos=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Processa os eventos encerrados pendentes: reserva cada um, emite os certificados
+    em lotes (emitir_certificados_evento) e marca o evento como processado.
+    Pode rodar em vários processos ao mesmo tempo e ser repetido sem efeitos duplicados.
+    Retorna uma lista de (evento, ResultadoEmissao) dos eventos processados por este processo.
+    """
+    trabalhador = trabalhador or identificador_trabalhador()
+    processados = []
+    for evento_id in eventos_encerrados_pendentes(limite):
+        if not reservar_evento(evento_id, trabalhador):
+            continue  # outro processo reservou primeiro
+        evento = Evento.objects.get(pk=evento_id)
+        try:
+            resultado = emitir_certificados_evento(evento, processos, tamanho_lote)
+        except Exception:
+            liberar_reserva(evento_id, trabalhador)
+            raise
+        if marcar_emitidos(evento_id, trabalhador):
+            processados.append((evento, resultado))
+    return processados
+
+
+class _BufferZip:
+    """
+    Destino de escrita do ZipFile que apenas acumula os bytes até serem consumidos.
+    Como não tem seek(), o zipfile grava os tamanhos em descritores após cada arquivo.
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def gerar_zip_certificados(evento, tamanho_bloco=64 * 1024):
+    """
+    Gera o ZIP com todos os certificados emitidos do evento em pedaços de bytes,
+    para ser enviado por um StreamingHttpResponse. Cada PDF é lido em blocos e o
+    buffer é esvaziado a cada bloco, então a memória usada não depende do tamanho do evento.
+    """
+    certificados = Certificado.objects.filter(
+        inscricao__evento=evento,
+    ).exclude(arquivo_certificado='').values_list(
+        'arquivo_certificado', 'inscricao__usuario__login',
+    ).order_by('pk')
+
+    buffer = _BufferZip()
+    # PDFs já são comprimidos internamente; ZIP_STORED evita gastar CPU sem ganho
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for caminho, login in certificados.iterator(chunk_size=TAMANHO_LOTE):
+            if not default_storage.exists(caminho):
+                continue
+            with default_storage.open(caminho, 'rb') as origem, \
+                    arquivo_zip.open(f'{login}.pdf', mode='w', force_zip64=True) as destino:
+                for bloco in origem.chunks(tamanho_bloco):
+                    destino.write(bloco)
+                    yield buffer.esvaziar()
+            yield buffer.esvaziar()
+    # Diretório central do ZIP, escrito ao fechar o arquivo
+    yield buffer.esvaziar()
@@ -0,0 +1,25 @@
+from django.core import signing
+
+# O salt separa estas assinaturas de outras feitas com a mesma SECRET_KEY
+SALT_CHECKIN = 'sgea_app.checkin'
+
+
+def gerar_token_checkin(inscricao_id, evento_id):
+    """
+    Gera o código de check-in da inscrição: os IDs da inscrição e do evento seguidos
+    de um HMAC (assinado com a SECRET_KEY). É este texto que vai no QR Code.
+    """
+    return signing.Signer(salt=SALT_CHECKIN).sign(f'{inscricao_id}-{evento_id}')
+
+
+def verificar_token_checkin(token):
+    """
+    Valida a assinatura do código sem consultar o banco.
+    Retorna (inscricao_id, evento_id) ou levanta signing.BadSignature.
+    """
+    valor = signing.Signer(salt=SALT_CHECKIN).unsign(token)
+    try:
+        inscricao_id, evento_id = (int(parte) for parte in valor.split('-'))
+    except ValueError:
+        raise signing.BadSignature("Código de check-in malformado.")
+    return inscricao_id, evento_id
@@ -0,0 +1,28 @@
+from django.core import signing
+
+# O salt separa estas assinaturas de outras feitas com a mesma SECRET_KEY
+SALT_CONFIRMACAO = 'sgea_app.confirmacao'
+
+# Validade do link de confirmação de cadastro
+VALIDADE_SEGUNDOS = 3 * 24 * 60 * 60
+
+
+def gerar_token_confirmacao(usuario):
+    """
+    Token do link de confirmação de cadastro: o ID e o login do usuário, com data e
+    assinatura (HMAC com a SECRET_KEY). O login no token invalida links antigos se o
+    e-mail da conta mudar.
+    """
+    return signing.TimestampSigner(salt=SALT_CONFIRMACAO).sign_object({'id': usuario.pk, 'login': usuario.login})
+
+
+def verificar_token_confirmacao(token):
+    """
+    Valida a assinatura e a validade do token sem consultar o banco.
+    Retorna (usuario_id, login) ou levanta signing.BadSignature (SignatureExpired se venceu).
+    """
+    dados = signing.TimestampSigner(salt=SALT_CONFIRMACAO).unsign_object(token, max_age=VALIDADE_SEGUNDOS)
+    try:
+        return int(dados['id']), str(dados['login'])
+    except (KeyError, TypeError, ValueError):
+        raise signing.BadSignature("Token de confirmação malformado.")
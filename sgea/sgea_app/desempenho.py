@@ -0,0 +1,308 @@
+"""
+Suíte de desempenho: popula uma base sintética em escala configurável (bulk_create)
+e mede, para cada rota, as latências (percentis) e as consultas SQL por requisição.
+
+Usada pelo comando 'benchmark_rotas' (resultados em JSON) e pelos testes de
+orçamento de consultas (OrcamentoConsultasTests), que falham se alguma rota passar
+do seu orçamento em ORCAMENTO_CONSULTAS.
+"""
+import io
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import busca
+from .models import Evento, Inscricao, ListaEspera, Usuario
+
+# Máximo de consultas SQL por requisição em cada medição, igual ao medido: qualquer
+# consulta nova estoura o orçamento e precisa ser justificada aqui. Os números não
+# dependem do tamanho da base (uma consulta por linha exibida, N+1, também estoura).
+# Medidos com o cache ativo, como em produção (o catálogo é servido do cache).
+ORCAMENTO_CONSULTAS = {
+    'home (anônimo)': 0,  # página e vagas no cache
+    'home (aluno)': 2,  # sessão e usuário; as inscrições do aluno ficam no cache
+    'detalhe_evento (aluno)': 4,
+    'dashboard (aluno)': 4,  # inclui as listas de espera do usuário
+    'dashboard (organizador)': 3,
+    'inscrever_evento': 10,  # inclui os três contadores das estatísticas
+    'desinscrever_evento': 13,  # inclui a busca do primeiro da lista de espera e as estatísticas
+    'criar_evento (formulário)': 3,
+    'criar_evento (envio)': 6,  # inclui a linha do índice de busca (busca.py)
+    'editar_evento (promove a fila)': 19,  # promoção em lote: não cresce com os promovidos
+    'lista_inscritos': 4,
+    'estatisticas (organizador)': 5,
+    'estatisticas_evento': 5,
+    'admin: usuários': 5,
+    'admin: eventos': 5,
+    'api: eventos (anônimo)': 1,
+    'api: inscrições (aluno)': 3,
+}
+
+SENHA_PADRAO = 'Senha@123'
+
+# Lista de espera do evento lotado e promovidos a cada edição do limite de vagas
+TAMANHO_FILA = 500
+PROMOVIDOS_POR_EDICAO = 5
+
+
+def _em_lotes(itens, tamanho):
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def popular_base(usuarios=10_000, eventos=100, inscricoes_por_evento=50, tamanho_lote=5000, semente=42):
+    """
+    Cria a base sintética com bulk_create, em lotes (a memória não depende da escala).
+    1% dos usuários são professores, 0,1% organizadores e o resto alunos; metade dos
+    eventos já terminou. O primeiro aluno e o primeiro organizador são os usuários de
+    referência das medições. Retorna um dicionário com as quantidades criadas.
+    """
+    aleatorio = random.Random(semente)
+    senha = make_password(SENHA_PADRAO)  # um único hash para todos
+    hoje = timezone.now().date()
+
+    quantidade_organizadores = max(1, usuarios // 1000)
+    quantidade_professores = max(1, usuarios // 100)
+    quantidade_alunos = max(1, usuarios - quantidade_organizadores - quantidade_professores)
+
+    Usuario.objects.create_superuser(
+        'admin@bench.sgea', SENHA_PADRAO, nome='Administrador',
+        telefone='(11) 90000-0000', instituicao_ensino='UniSGEA',
+    )
+
+    def gerar_usuarios():
+        for perfil, quantidade in (
+            ('Organizador', quantidade_organizadores),
+            ('Professor', quantidade_professores),
+            ('Aluno', quantidade_alunos),
+        ):
+            for i in range(quantidade):
+                yield Usuario(
+                    login=f'{perfil.lower()}{i}@bench.sgea', password=senha, perfil=perfil,
+                    nome=f'{perfil} {i}', telefone='(11) 90000-0000',
+                    instituicao_ensino='UniSGEA', is_active=True,
+                )
+
+    for lote in _em_lotes(gerar_usuarios(), tamanho_lote):
+        Usuario.objects.bulk_create(lote)
+
+    ids = {
+        perfil: list(Usuario.objects.filter(perfil=perfil, login__endswith='@bench.sgea', is_superuser=False)
+                     .order_by('id').values_list('id', flat=True))
+        for perfil in ('Organizador', 'Professor', 'Aluno')
+    }
+
+    def gerar_eventos():
+        for i in range(eventos):
+            # Eventos pares já terminaram; os ímpares acontecem no próximo ano
+            deslocamento = -aleatorio.randint(2, 365) if i % 2 == 0 else aleatorio.randint(1, 365)
+            inicio = hoje + timedelta(days=deslocamento)
+            yield Evento(
+                nome=f'Evento {i}', tipo_evento='Palestra', local=f'Sala {i % 50}',
+                data_inicial=inicio, data_final=inicio + timedelta(days=1), horario='14:00',
+                quantidade_participantes=inscricoes_por_evento * 2,
+                organizador_id=ids['Organizador'][i % len(ids['Organizador'])],
+                professor_responsavel_id=ids['Professor'][i % len(ids['Professor'])],
+            )
+
+    for lote in _em_lotes(gerar_eventos(), tamanho_lote):
+        Evento.objects.bulk_create(lote)
+    # bulk_create não dispara os sinais que mantêm o índice de busca
+    busca.reconstruir_indice()
+
+    alunos = ids['Aluno']
+    aluno_referencia = alunos[0]
+    # O aluno de referência participa de ~20 eventos, para o dashboard ter o que listar
+    passo_referencia = max(1, eventos // 20)
+    por_evento = min(inscricoes_por_evento, len(alunos))
+
+    def gerar_inscricoes():
+        eventos_criados = Evento.objects.filter(nome__startswith='Evento ').order_by('id').values_list('id', flat=True)
+        for posicao, evento_id in enumerate(eventos_criados.iterator(chunk_size=tamanho_lote)):
+            escolhidos = set(aleatorio.sample(alunos, por_evento))
+            if posicao % passo_referencia == 0:
+                escolhidos.add(aluno_referencia)
+            for usuario_id in escolhidos:
+                yield Inscricao(usuario_id=usuario_id, evento_id=evento_id, presenca_confirmada=aleatorio.random() < 0.7)
+
+    total_inscricoes = 0
+    for lote in _em_lotes(gerar_inscricoes(), tamanho_lote):
+        Inscricao.objects.bulk_create(lote)
+        total_inscricoes += len(lote)
+
+    # bulk_create não passa pelo InscricaoManager: o contador desnormalizado e as
+    # tabelas de resumo das estatísticas são recalculados
+    call_command('recalcular_vagas', stdout=io.StringIO())
+    call_command('recalcular_estatisticas', stdout=io.StringIO())
+
+    return {
+        'usuarios': len(ids['Organizador']) + len(ids['Professor']) + len(alunos) + 1,
+        'eventos': eventos,
+        'inscricoes': total_inscricoes,
+    }
+
+
+def _cenarios(contexto):
+    """
+    Cada cenário é uma lista de passos executados em ordem a cada repetição:
+    (rótulo, usuário, método, url, dados). 'usuário' é uma chave de 'contexto' ou None (anônimo);
+    'dados' pode ser uma função que recebe o número da rodada.
+    """
+    evento = contexto['evento_aberto']
+    evento_organizado = contexto['evento_organizado']
+    amanha = timezone.now().date() + timedelta(days=1)
+    novo_evento = {
+        'nome': 'Evento do Benchmark', 'tipo_evento': 'Palestra',
+        'data_inicial': amanha.isoformat(), 'data_final': amanha.isoformat(), 'horario': '14:00',
+        'local': 'Auditório', 'quantidade_participantes': 10,
+        'professor_responsavel': contexto['professor'].pk,
+    }
+    evento_lotado = contexto['evento_lotado']
+    limite_inicial = evento_lotado.quantidade_participantes
+
+    def aumento_do_limite(rodada):
+        # A cada rodada o limite sobe e os próximos da lista de espera são promovidos
+        return {
+            'nome': evento_lotado.nome, 'tipo_evento': evento_lotado.tipo_evento,
+            'data_inicial': evento_lotado.data_inicial.isoformat(), 'data_final': evento_lotado.data_final.isoformat(),
+            'horario': evento_lotado.horario, 'local': evento_lotado.local,
+            'quantidade_participantes': limite_inicial + PROMOVIDOS_POR_EDICAO * (rodada + 1),
+            'professor_responsavel': evento_lotado.professor_responsavel_id,
+        }
+
+    return [
+        [('home (anônimo)', None, 'get', reverse('home'), None)],
+        [('home (aluno)', 'aluno', 'get', reverse('home'), None)],
+        [('detalhe_evento (aluno)', 'aluno', 'get', reverse('detalhe_evento', args=[evento.pk]), None)],
+        [('dashboard (aluno)', 'aluno', 'get', reverse('dashboard'), None)],
+        [('dashboard (organizador)', 'organizador', 'get', reverse('dashboard'), None)],
+        [
+            ('inscrever_evento', 'aluno', 'post', reverse('inscrever_evento', args=[evento.pk]), None),
+            ('desinscrever_evento', 'aluno', 'post', reverse('desinscrever_evento', args=[evento.pk]), None),
+        ],
+        [('criar_evento (formulário)', 'organizador', 'get', reverse('criar_evento'), None)],
+        [('criar_evento (envio)', 'organizador', 'post', reverse('criar_evento'), novo_evento)],
+        [('editar_evento (promove a fila)', 'organizador', 'post', reverse('editar_evento', args=[evento_lotado.pk]), aumento_do_limite)],
+        [('lista_inscritos', 'organizador', 'get', reverse('lista_inscritos', args=[evento_organizado.pk]), None)],
+        [('estatisticas (organizador)', 'organizador', 'get', reverse('estatisticas_organizador'), None)],
+        [('estatisticas_evento', 'organizador', 'get', reverse('estatisticas_evento', args=[evento_organizado.pk]), None)],
+        [('admin: usuários', 'admin', 'get', reverse('admin:sgea_app_usuario_changelist'), None)],
+        [('admin: eventos', 'admin', 'get', reverse('admin:sgea_app_evento_changelist'), None)],
+        [('api: eventos (anônimo)', None, 'get', reverse('api_eventos'), None)],
+        [('api: inscrições (aluno)', 'aluno', 'get', reverse('api_inscricoes'), None)],
+    ]
+
+
+def _contexto():
+    """ Usuários e eventos de referência (criados por popular_base). """
+    organizador = Usuario.objects.get(login='organizador0@bench.sgea')
+    professor = Usuario.objects.get(login='professor0@bench.sgea')
+    inicio = timezone.now().date() + timedelta(days=30)
+    # Evento futuro, com vagas de sobra, em que o aluno de referência não está inscrito
+    evento_aberto, _ = Evento.objects.get_or_create(
+        nome='Evento Aberto do Benchmark',
+        defaults=dict(
+            tipo_evento='Palestra', local='Auditório', data_inicial=inicio, data_final=inicio,
+            horario='14:00', quantidade_participantes=1_000_000,
+            organizador=organizador, professor_responsavel=professor,
+        ),
+    )
+    # Evento lotado com lista de espera, para medir a promoção após o aumento do limite
+    evento_lotado, _ = Evento.objects.get_or_create(
+        nome='Evento Lotado do Benchmark',
+        defaults=dict(
+            tipo_evento='Palestra', local='Auditório', data_inicial=inicio, data_final=inicio,
+            horario='14:00', quantidade_participantes=1,
+            organizador=organizador, professor_responsavel=professor,
+        ),
+    )
+    fora_do_evento = Usuario.objects.filter(perfil='Aluno', login__endswith='@bench.sgea').exclude(
+        inscricoes__evento=evento_lotado,
+    ).order_by('-id').values_list('id', flat=True)[:TAMANHO_FILA]
+    ListaEspera.objects.bulk_create(
+        [ListaEspera(usuario_id=usuario_id, evento=evento_lotado) for usuario_id in fora_do_evento],
+        ignore_conflicts=True,
+    )
+    evento_lotado.refresh_from_db()
+
+    return {
+        'aluno': Usuario.objects.get(login='aluno0@bench.sgea'),
+        'organizador': organizador,
+        'professor': professor,
+        'admin': Usuario.objects.get(login='admin@bench.sgea'),
+        'evento_aberto': evento_aberto,
+        'evento_lotado': evento_lotado,
+        'evento_organizado': Evento.objects.filter(organizador=organizador, inscricoes__isnull=False).first(),
+    }
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def medir_rotas(repeticoes=50, aquecimento=2, host='testserver'):
+    """
+    Executa cada cenário 'aquecimento + repeticoes' vezes pelo cliente de testes do
+    Django (middlewares, sessão e templates incluídos) e devolve, por rótulo, os
+    percentis de latência (ms), as consultas por requisição e o orçamento.
+    'host' deve ser aceito por ALLOWED_HOSTS ('testserver' só é aceito nos testes).
+    """
+    contexto = _contexto()
+    clientes = {None: Client(HTTP_HOST=host)}
+    for chave in ('aluno', 'organizador', 'admin'):
+        clientes[chave] = Client(HTTP_HOST=host)
+        clientes[chave].force_login(contexto[chave])
+
+    medicoes = {}
+    for cenario in _cenarios(contexto):
+        for rodada in range(aquecimento + repeticoes):
+            for rotulo, usuario, metodo, url, dados in cenario:
+                cliente = clientes[usuario]
+                if callable(dados):
+                    dados = dados(rodada)
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    resposta = getattr(cliente, metodo)(url, dados)
+                    duracao = time.perf_counter() - inicio
+                if resposta.status_code >= 400:
+                    raise RuntimeError(f"{rotulo}: {metodo.upper()} {url} respondeu {resposta.status_code}.")
+                if rodada < aquecimento:
+                    continue
+                medicao = medicoes.setdefault(rotulo, {'latencias': [], 'consultas': []})
+                medicao['latencias'].append(duracao * 1000)
+                medicao['consultas'].append(len(consultas))
+
+    resultados = {}
+    for rotulo, medicao in medicoes.items():
+        latencias = sorted(medicao['latencias'])
+        consultas = max(medicao['consultas'])
+        orcamento = ORCAMENTO_CONSULTAS.get(rotulo)
+        resultados[rotulo] = {
+            'requisicoes': len(latencias),
+            'latencia_ms': {
+                'media': round(statistics.mean(latencias), 3),
+                'p50': round(_percentil(latencias, 0.50), 3),
+                'p90': round(_percentil(latencias, 0.90), 3),
+                'p99': round(_percentil(latencias, 0.99), 3),
+                'max': round(latencias[-1], 3),
+            },
+            'consultas_por_requisicao': consultas,
+            'orcamento_consultas': orcamento,
+            'dentro_do_orcamento': orcamento is None or consultas <= orcamento,
+        }
+    return resultados
@@ -0,0 +1,183 @@
+"""
+Caixa de saída de e-mails (MensagemEmail).
+
+As rotas não falam com o servidor de e-mail: elas gravam a mensagem na tabela, na
+mesma transação da alteração que a gerou (um rollback descarta também o e-mail). O
+comando 'enviar_emails' reserva lotes com um UPDATE condicional (vários processos
+podem rodar ao mesmo tempo) e envia cada lote por uma única conexão SMTP.
+
+Uma falha devolve a mensagem à fila com espera exponencial (1, 2, 4... minutos, até
+ESPERA_MAXIMA); depois de MAXIMO_TENTATIVAS, ela fica como 'Falhou'.
+"""
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .certificados import identificador_trabalhador
+from .models import MensagemEmail
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 100
+MAXIMO_TENTATIVAS = 6
+ESPERA_INICIAL = timedelta(minutes=1)
+ESPERA_MAXIMA = timedelta(hours=6)
+
+# Reservas mais antigas que isto são de um processo que morreu durante o envio
+PRAZO_RESERVA = timedelta(minutes=10)
+
+ResultadoEnvio = namedtuple('ResultadoEnvio', ['enviadas', 'falhas', 'segundos', 'por_segundo'])
+
+
+def enfileirar(destinatario, assunto, corpo):
+    """ Grava uma mensagem na caixa de saída (na transação de quem chamou). """
+    return MensagemEmail.objects.create(destinatario=destinatario, assunto=assunto, corpo=corpo)
+
+
+def enfileirar_varias(mensagens):
+    """ Grava várias mensagens (destinatario, assunto, corpo) com um único INSERT. """
+    return MensagemEmail.objects.bulk_create([
+        MensagemEmail(destinatario=destinatario, assunto=assunto, corpo=corpo)
+        for destinatario, assunto, corpo in mensagens
+    ])
+
+
+def espera(tentativas):
+    """ Tempo até a próxima tentativa, após 'tentativas' falhas (exponencial, com teto). """
+    return min(ESPERA_INICIAL * 2 ** (tentativas - 1), ESPERA_MAXIMA)
+
+
+# --- Envio ---
+
+def _disponiveis(agora, prazo_reserva=PRAZO_RESERVA):
+    """ Pendentes cuja hora chegou, ou reservas abandonadas (o processo morreu no meio do envio). """
+    return Q(status='Pendente', proxima_tentativa_em__lte=agora) | Q(
+        status='Enviando', reservada_em__lt=agora - prazo_reserva,
+    )
+
+
+def reservar_lote(trabalhador, tamanho=TAMANHO_LOTE, prazo_reserva=PRAZO_RESERVA):
+    """
+    Reserva as próximas mensagens para este processo: um SELECT pelo índice
+    (status, proxima_tentativa_em) e um UPDATE condicional, que só altera as linhas
+    ainda disponíveis. Retorna as mensagens reservadas por este processo.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            MensagemEmail.objects.filter(_disponiveis(agora, prazo_reserva))
+            .order_by('proxima_tentativa_em', 'id').values_list('id', flat=True)[:tamanho]
+        )
+        if not ids:
+            return []
+        MensagemEmail.objects.filter(_disponiveis(agora, prazo_reserva), pk__in=ids).update(
+            status='Enviando', reservada_por=trabalhador, reservada_em=agora,
+        )
+    return list(MensagemEmail.objects.filter(
+        pk__in=ids, status='Enviando', reservada_por=trabalhador, reservada_em=agora,
+    ).order_by('id'))
+
+
+def _email(mensagem):
+    return EmailMessage(
+        subject=mensagem.assunto, body=mensagem.corpo, from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[mensagem.destinatario],
+    )
+
+
+def _registrar_falha(mensagem, trabalhador, erro):
+    tentativas = mensagem.tentativas + 1
+    desistir = tentativas >= MAXIMO_TENTATIVAS
+    MensagemEmail.objects.filter(pk=mensagem.pk, status='Enviando', reservada_por=trabalhador).update(
+        status='Falhou' if desistir else 'Pendente',
+        tentativas=tentativas,
+        proxima_tentativa_em=timezone.now() + espera(tentativas),
+        ultimo_erro=f'{type(erro).__name__}: {erro}'[:255],
+        reservada_por='', reservada_em=None,
+    )
+    logger.warning(
+        "Falha ao enviar e-mail %s para %s (tentativa %d%s): %s",
+        mensagem.pk, mensagem.destinatario, tentativas, ', desistindo' if desistir else '', erro,
+    )
+
+
+def enviar_lote(mensagens, trabalhador, conexao):
+    """
+    Envia as mensagens reservadas pela conexão aberta 'conexao'. Se a conexão cair, ela
+    é reaberta para as mensagens seguintes; se não reabrir, as restantes voltam à fila
+    sem contar tentativa. Retorna (enviadas, falhas).
+    """
+    enviadas, falhas = [], 0
+    restantes = list(mensagens)
+    try:
+        while restantes:
+            mensagem = restantes.pop(0)
+            try:
+                conexao.send_messages([_email(mensagem)])
+            except Exception as erro:
+                falhas += 1
+                _registrar_falha(mensagem, trabalhador, erro)
+                # O erro pode ter derrubado a sessão SMTP: começa uma nova
+                conexao.close()
+                conexao.open()
+            else:
+                enviadas.append(mensagem.pk)
+    finally:
+        if restantes:
+            MensagemEmail.objects.filter(
+                pk__in=[mensagem.pk for mensagem in restantes], status='Enviando', reservada_por=trabalhador,
+            ).update(status='Pendente', reservada_por='', reservada_em=None)
+        # Um único UPDATE para as mensagens enviadas do lote
+        MensagemEmail.objects.filter(pk__in=enviadas, reservada_por=trabalhador).update(
+            status='Enviada', enviada_em=timezone.now(), ultimo_erro='', reservada_por='', reservada_em=None,
+        )
+    return len(enviadas), falhas
+
+
+def enviar_pendentes(trabalhador=None, tamanho_lote=TAMANHO_LOTE, maximo=None, conexao=None):
+    """
+    Envia as mensagens disponíveis, lote a lote, reutilizando uma única conexão com o
+    servidor de e-mail até a fila esvaziar (ou até 'maximo' mensagens).
+    """
+    trabalhador = trabalhador or identificador_trabalhador()
+    enviadas = falhas = 0
+    inicio = time.perf_counter()
+    conexao = conexao or get_connection()
+    with conexao:
+        while maximo is None or enviadas + falhas < maximo:
+            tamanho = tamanho_lote if maximo is None else min(tamanho_lote, maximo - enviadas - falhas)
+            lote = reservar_lote(trabalhador, tamanho)
+            if not lote:
+                break
+            enviadas_lote, falhas_lote = enviar_lote(lote, trabalhador, conexao)
+            enviadas += enviadas_lote
+            falhas += falhas_lote
+    segundos = time.perf_counter() - inicio
+    return ResultadoEnvio(enviadas, falhas, segundos, enviadas / segundos if segundos else 0.0)
+
+
+# --- Métricas ---
+
+def totais_por_status():
+    """ Quantidade de mensagens em cada status (uma consulta agrupada sobre o índice da fila). """
+    totais = dict.fromkeys((status for status, _ in MensagemEmail.STATUS_CHOICES), 0)
+    totais.update(
+        MensagemEmail.objects.order_by().values_list('status').annotate(total=Count('id'))
+    )
+    return totais
+
+
+def texto_prometheus():
+    """ Situação da caixa de saída no formato do Prometheus (vazão: rate() sobre as enviadas). """
+    nome = 'sgea_emails'
+    linhas = [f'# HELP {nome} Mensagens da caixa de saída por status.', f'# TYPE {nome} gauge']
+    for status, total in totais_por_status().items():
+        linhas.append(f'{nome}{{status="{status}"}} {total}')
+    return '\n'.join(linhas) + '\n'
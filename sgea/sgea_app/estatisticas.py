@@ -0,0 +1,305 @@
+"""
+Estatísticas dos eventos para o Organizador (inscrições ao longo do tempo, taxas de
+ocupação e de presença, certificados e o público por perfil e instituição).
+
+As páginas leem apenas as tabelas de resumo (EstatisticaEvento, EstatisticaPublico e
+EstatisticaDiaria), cujo tamanho depende dos eventos e não das inscrições:
+
+- Operações de uma inscrição (inscrição, cancelamento, check-in) somam nos contadores
+  com um INSERT ... ON CONFLICT DO UPDATE por tabela, na transação da operação.
+- Operações em lote (confirmação de presença em massa, emissão de certificados)
+  recalculam o resumo do evento uma vez, a partir das inscrições dele.
+- Cargas que não passam pelo InscricaoManager (bulk_create, admin, exclusão de
+  usuários) são corrigidas pelo comando 'recalcular_estatisticas' (reconstruir()).
+"""
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+from django.db import connections, transaction
+from django.db.models import Count, F, IntegerField, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Evento, EstatisticaDiaria, EstatisticaEvento, EstatisticaPublico, Inscricao
+
+CONTADORES = ('inscricoes', 'presencas', 'certificados')
+
+# Instituições listadas individualmente; as demais são somadas em 'Outras'
+LIMITE_INSTITUICOES = 20
+
+# Linhas de resumo gravadas por bulk_create na reconstrução
+TAMANHO_LOTE = 5000
+
+ResultadoReconstrucao = namedtuple('ResultadoReconstrucao', ['eventos', 'linhas_publico', 'linhas_diarias', 'segundos'])
+
+
+# --- Atualização incremental ---
+
+def _somar(modelo, chave, deltas, using):
+    """
+    Soma 'deltas' aos contadores da linha de 'chave', criando-a se não existir, em um
+    único comando (SQLite e PostgreSQL): incrementos simultâneos nunca se perdem.
+    """
+    conexao = connections[using]
+    nome = conexao.ops.quote_name
+    tabela = nome(modelo._meta.db_table)
+    contadores = [
+        campo for campo in modelo._meta.concrete_fields
+        if isinstance(campo, IntegerField) and not campo.primary_key and not campo.is_relation
+    ]
+    chaves = [modelo._meta.get_field(campo) for campo in chave]
+    valores = [campo.get_db_prep_value(chave[campo.name], conexao) for campo in chaves]
+    valores += [deltas.get(campo.name, 0) for campo in contadores]
+
+    colunas = ', '.join(nome(campo.column) for campo in chaves + contadores)
+    atualizacoes = ', '.join(
+        f'{nome(campo.column)} = {tabela}.{nome(campo.column)} + excluded.{nome(campo.column)}'
+        for campo in contadores if campo.name in deltas
+    )
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {tabela} ({colunas}) VALUES ({", ".join(["%s"] * len(valores))}) '
+            f'ON CONFLICT ({", ".join(nome(campo.column) for campo in chaves)}) DO UPDATE SET {atualizacoes}',
+            valores,
+        )
+
+
+def _registrar(evento_id, perfil, instituicao_ensino, dia=None, using='default', **deltas):
+    # A linha de totais vem primeiro: no PostgreSQL, ela serializa os incrementos do
+    # evento com o recálculo em lote (recalcular_evento)
+    _somar(EstatisticaEvento, {'evento': evento_id}, deltas, using)
+    _somar(EstatisticaPublico, {'evento': evento_id, 'perfil': perfil, 'instituicao_ensino': instituicao_ensino}, deltas, using)
+    if dia is not None:
+        _somar(EstatisticaDiaria, {'evento': evento_id, 'dia': dia}, {'inscricoes': deltas['inscricoes']}, using)
+
+
+def registrar_inscricao(inscricao, usuario, using='default'):
+    """ Conta uma nova inscrição (InscricaoManager.inscrever, na mesma transação). """
+    _registrar(
+        inscricao.evento_id, usuario.perfil, usuario.instituicao_ensino,
+        dia=timezone.localdate(inscricao.inscrito_em), using=using, inscricoes=1,
+    )
+
+
+def registrar_inscricoes(inscricoes, using='default'):
+    """
+    Conta várias inscrições novas do mesmo evento (promoção em lote da lista de espera):
+    um incremento por grupo de perfil e instituição e um por dia, em vez de um por inscrição.
+    """
+    evento_id = inscricoes[0].evento_id
+    publico = Counter((inscricao.usuario.perfil, inscricao.usuario.instituicao_ensino) for inscricao in inscricoes)
+    dias = Counter(timezone.localdate(inscricao.inscrito_em) for inscricao in inscricoes)
+
+    _somar(EstatisticaEvento, {'evento': evento_id}, {'inscricoes': len(inscricoes)}, using)
+    for (perfil, instituicao_ensino), quantidade in publico.items():
+        _somar(EstatisticaPublico, {
+            'evento': evento_id, 'perfil': perfil, 'instituicao_ensino': instituicao_ensino,
+        }, {'inscricoes': quantidade}, using)
+    for dia, quantidade in dias.items():
+        _somar(EstatisticaDiaria, {'evento': evento_id, 'dia': dia}, {'inscricoes': quantidade}, using)
+
+def registrar_cancelamento(inscricao, usuario, certificados=0, using='default'):
+    """ Desconta uma inscrição removida (e a presença e os certificados removidos com ela). """
+    _registrar(
+        inscricao.evento_id, usuario.perfil, usuario.instituicao_ensino,
+        dia=timezone.localdate(inscricao.inscrito_em), using=using,
+        inscricoes=-1, presencas=-int(inscricao.presenca_confirmada), certificados=-certificados,
+    )
+
+
+def registrar_presenca(inscricao_id, using='default'):
+    """ Conta a presença confirmada no check-in (o perfil e a instituição vêm em um único SELECT). """
+    evento_id, perfil, instituicao_ensino = Inscricao.objects.using(using).filter(pk=inscricao_id).values_list(
+        'evento_id', 'usuario__perfil', 'usuario__instituicao_ensino',
+    ).get()
+    _registrar(evento_id, perfil, instituicao_ensino, using=using, presencas=1)
+
+
+# --- Recálculo a partir das inscrições ---
+
+def _agrupar_publico(inscricoes):
+    """ Contadores por (evento, perfil, instituição): um GROUP BY com os JOINs de usuário e certificado. """
+    return inscricoes.order_by().values(
+        'evento_id', perfil=F('usuario__perfil'), instituicao_ensino=F('usuario__instituicao_ensino'),
+    ).annotate(
+        inscricoes=Count('id'),
+        presencas=Count('id', filter=Q(presenca_confirmada=True)),
+        certificados=Count('certificado'),
+    )
+
+
+def _agrupar_dias(inscricoes):
+    return inscricoes.order_by().values('evento_id', dia=TruncDate('inscrito_em')).annotate(inscricoes=Count('id'))
+
+
+def recalcular_evento(evento_id, using='default'):
+    """
+    Recalcula os totais e o público do evento a partir das inscrições dele (após
+    operações em lote, que não passam pelos incrementos). A série diária não muda
+    com presenças e certificados e não é recalculada.
+    """
+    with transaction.atomic(using=using):
+        # Garante a linha de totais e a trava: os incrementos do evento esperam o recálculo
+        EstatisticaEvento.objects.using(using).bulk_create([EstatisticaEvento(evento_id=evento_id)], ignore_conflicts=True)
+        totais = EstatisticaEvento.objects.using(using).select_for_update().get(pk=evento_id)
+
+        grupos = list(_agrupar_publico(Inscricao.objects.using(using).filter(evento_id=evento_id)))
+        EstatisticaPublico.objects.using(using).filter(evento_id=evento_id).delete()
+        EstatisticaPublico.objects.using(using).bulk_create([EstatisticaPublico(**grupo) for grupo in grupos])
+
+        for contador in CONTADORES:
+            setattr(totais, contador, sum(grupo[contador] for grupo in grupos))
+        totais.save(using=using)
+
+
+def _gravar_em_lotes(modelo, linhas, using, tamanho_lote):
+    gravadas = 0
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, tamanho_lote)):
+        modelo.objects.using(using).bulk_create([modelo(**linha) for linha in lote])
+        gravadas += len(lote)
+    return gravadas
+
+
+def reconstruir(using='default', tamanho_lote=TAMANHO_LOTE):
+    """
+    Refaz todas as tabelas de resumo a partir das inscrições, em uma transação: dois
+    GROUP BY sobre as inscrições, lidos em lotes (iterator) e gravados com bulk_create.
+    """
+    inicio = time.perf_counter()
+    inscricoes = Inscricao.objects.using(using).all()
+    totais = {}
+
+    def acumular(grupos):
+        # Os totais do evento saem da mesma leitura do público
+        for grupo in grupos:
+            soma = totais.setdefault(grupo['evento_id'], dict.fromkeys(CONTADORES, 0))
+            for contador in CONTADORES:
+                soma[contador] += grupo[contador]
+            yield grupo
+
+    with transaction.atomic(using=using):
+        for modelo in (EstatisticaDiaria, EstatisticaPublico, EstatisticaEvento):
+            modelo.objects.using(using).all().delete()
+        linhas_publico = _gravar_em_lotes(
+            EstatisticaPublico, acumular(_agrupar_publico(inscricoes).iterator(chunk_size=tamanho_lote)), using, tamanho_lote,
+        )
+        linhas_diarias = _gravar_em_lotes(
+            EstatisticaDiaria, _agrupar_dias(inscricoes).iterator(chunk_size=tamanho_lote), using, tamanho_lote,
+        )
+        _gravar_em_lotes(
+            EstatisticaEvento, ({'evento_id': evento_id, **soma} for evento_id, soma in totais.items()), using, tamanho_lote,
+        )
+    return ResultadoReconstrucao(len(totais), linhas_publico, linhas_diarias, time.perf_counter() - inicio)
+
+
+# --- Leitura (páginas de estatísticas) ---
+
+def _taxa(parte, total):
+    """ Percentual com uma casa decimal, ou None quando não há base de cálculo. """
+    return round(100 * parte / total, 1) if total else None
+
+
+def _com_taxas(linha, vagas=None):
+    linha['taxa_presenca'] = _taxa(linha['presencas'], linha['inscricoes'])
+    linha['taxa_certificacao'] = _taxa(linha['certificados'], linha['presencas'])
+    if vagas is not None:
+        linha['vagas'] = vagas
+        linha['taxa_ocupacao'] = _taxa(linha['inscricoes'], vagas)
+    return linha
+
+
+def _somar_por(linhas, campo):
+    somas = {}
+    for linha in linhas:
+        soma = somas.setdefault(linha[campo], dict.fromkeys(CONTADORES, 0))
+        for contador in CONTADORES:
+            soma[contador] += linha[contador]
+    return sorted(
+        ({'rotulo': rotulo, **soma} for rotulo, soma in somas.items() if any(soma.values())),
+        key=lambda linha: (-linha['inscricoes'], linha['rotulo']),
+    )
+
+
+def _publico(linhas):
+    """ Linhas (perfil, instituição) somadas por perfil e por instituição, mais inscritas primeiro. """
+    linhas = list(linhas)
+    por_perfil = _somar_por(linhas, 'perfil')
+    por_instituicao = _somar_por(linhas, 'instituicao_ensino')
+    if len(por_instituicao) > LIMITE_INSTITUICOES:
+        outras = {'rotulo': 'Outras', **{
+            contador: sum(linha[contador] for linha in por_instituicao[LIMITE_INSTITUICOES:]) for contador in CONTADORES
+        }}
+        por_instituicao = por_instituicao[:LIMITE_INSTITUICOES] + [outras]
+    return {
+        'por_perfil': [_com_taxas(linha) for linha in por_perfil],
+        'por_instituicao': [_com_taxas(linha) for linha in por_instituicao],
+    }
+
+
+def _serie(linhas):
+    """ Inscrições por dia, com o acumulado e a largura da barra (% do maior dia). """
+    serie = [linha for linha in linhas if linha['inscricoes']]
+    maior = max((linha['inscricoes'] for linha in serie), default=0)
+    acumulado = 0
+    for linha in serie:
+        acumulado += linha['inscricoes']
+        linha['acumulado'] = acumulado
+        linha['largura'] = round(100 * linha['inscricoes'] / maior) if maior else 0
+    return serie
+
+
+def _totais(evento):
+    try:
+        estatistica = evento.estatistica
+    except EstatisticaEvento.DoesNotExist:
+        estatistica = EstatisticaEvento(evento=evento)
+    return {contador: getattr(estatistica, contador) for contador in CONTADORES}
+
+
+def resumo_evento(evento):
+    """
+    Estatísticas de um evento: três leituras nas tabelas de resumo (os totais vêm no
+    JOIN do evento quando ele foi buscado com select_related('estatistica')).
+    """
+    publico = EstatisticaPublico.objects.filter(evento=evento).values('perfil', 'instituicao_ensino', *CONTADORES)
+    dias = EstatisticaDiaria.objects.filter(evento=evento).order_by('dia').values('dia', 'inscricoes')
+    return {
+        'totais': _com_taxas(_totais(evento), evento.quantidade_participantes),
+        **_publico(publico),
+        'serie': _serie(dias),
+    }
+
+
+def resumo_organizador(organizador):
+    """
+    Estatísticas de todos os eventos do organizador: os eventos com os totais no mesmo
+    JOIN e duas agregações sobre as tabelas de resumo (público e série diária).
+    """
+    eventos = Evento.objects.filter(organizador=organizador).select_related('estatistica').order_by('data_inicial', 'id')
+    linhas_eventos = [
+        {'evento': evento, **_com_taxas(_totais(evento), evento.quantidade_participantes)}
+        for evento in eventos
+    ]
+    totais = {contador: sum(linha[contador] for linha in linhas_eventos) for contador in CONTADORES}
+
+    # As somas têm outro nome na consulta: uma anotação não pode repetir o nome de um campo
+    publico = EstatisticaPublico.objects.filter(evento__organizador=organizador).order_by().values(
+        'perfil', 'instituicao_ensino',
+    ).annotate(**{f'soma_{contador}': Sum(contador) for contador in CONTADORES})
+    publico = [
+        {'perfil': linha['perfil'], 'instituicao_ensino': linha['instituicao_ensino'],
+         **{contador: linha[f'soma_{contador}'] for contador in CONTADORES}}
+        for linha in publico
+    ]
+    dias = EstatisticaDiaria.objects.filter(evento__organizador=organizador).order_by('dia').values('dia').annotate(
+        soma_inscricoes=Sum('inscricoes'),
+    )
+    dias = [{'dia': linha['dia'], 'inscricoes': linha['soma_inscricoes']} for linha in dias]
+    return {
+        'totais': _com_taxas(totais, sum(linha['vagas'] for linha in linhas_eventos)),
+        'eventos': linhas_eventos,
+        **_publico(publico),
+        'serie': _serie(dias),
+    }
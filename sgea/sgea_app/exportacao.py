@@ -0,0 +1,84 @@
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+try:
+    # Dependência opcional: apenas o formato XLSX precisa do openpyxl
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Linhas buscadas do banco por vez; a memória usada não depende do total exportado
+TAMANHO_BLOCO = 2000
+
+# (cabeçalho, campo) de cada coluna exportada: Inscricao com os dados do Usuario e do Evento
+COLUNAS = (
+    ('Inscrição', 'id'),
+    ('Evento ID', 'evento_id'),
+    ('Evento', 'evento__nome'),
+    ('Nome', 'usuario__nome'),
+    ('Login (E-mail)', 'usuario__login'),
+    ('Telefone', 'usuario__telefone'),
+    ('Instituição de Ensino', 'usuario__instituicao_ensino'),
+    ('Perfil', 'usuario__perfil'),
+    ('Presença Confirmada', 'presenca_confirmada'),
+)
+
+
+def xlsx_disponivel():
+    return openpyxl is not None
+
+
+def _linhas(inscricoes):
+    """ Percorre as inscrições em blocos com .iterator(), já como tuplas simples (sem instâncias de modelo). """
+    campos = [campo for _, campo in COLUNAS]
+    consulta = inscricoes.order_by('evento_id', 'id').values_list(*campos)
+    for linha in consulta.iterator(chunk_size=TAMANHO_BLOCO):
+        *inicio, presenca = linha
+        yield (*inicio, 'Sim' if presenca else 'Não')
+
+
+class _Eco:
+    """ "Arquivo" que devolve o que recebe: o csv.writer formata a linha e nós a repassamos. """
+
+    def write(self, valor):
+        return valor
+
+
+def resposta_csv(inscricoes, nome_arquivo):
+    """ CSV enviado linha a linha por um StreamingHttpResponse. """
+    escritor = csv.writer(_Eco())
+
+    def gerar():
+        # BOM para o Excel reconhecer o UTF-8 (acentos) ao abrir o arquivo
+        yield '\ufeff' + escritor.writerow([cabecalho for cabecalho, _ in COLUNAS])
+        for linha in _linhas(inscricoes):
+            yield escritor.writerow(linha)
+
+    resposta = StreamingHttpResponse(gerar(), content_type='text/csv; charset=utf-8')
+    resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.csv"'
+    return resposta
+
+
+def resposta_xlsx(inscricoes, nome_arquivo):
+    """
+    XLSX gerado com o modo write_only do openpyxl, que grava as linhas em disco à
+    medida que chegam (memória constante). O arquivo temporário é enviado em blocos.
+    """
+    livro = openpyxl.Workbook(write_only=True)
+    planilha = livro.create_sheet('Inscrições')
+    planilha.append([cabecalho for cabecalho, _ in COLUNAS])
+    for linha in _linhas(inscricoes):
+        planilha.append(linha)
+
+    # O arquivo temporário é apagado quando a resposta termina de ser enviada e o fecha
+    arquivo = tempfile.TemporaryFile()
+    livro.save(arquivo)
+    arquivo.seek(0)
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=f'{nome_arquivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
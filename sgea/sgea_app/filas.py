@@ -0,0 +1,105 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessadorEmLote:
+    """
+    Buffer em memória consumido por uma thread em segundo plano, que processa os
+    itens em lotes (por exemplo, com um único bulk_create por lote).
+
+    A fila tem capacidade limitada. Quando ela enche, quem enfileira espera até
+    'espera_maxima' segundos (backpressure); se ainda assim não houver espaço, o
+    item é processado na própria requisição, para que nada seja perdido.
+
+    Se o lote falhar, cada item é reprocessado sozinho (com 'processar_item', ou com
+    'processar_lote' e um lote de um item): um item inválido não leva os demais junto.
+    Só os itens que falharem de novo são descartados, com o erro no log.
+
+    Com settings.SGEA_PROCESSAMENTO_EM_SEGUNDO_PLANO = False nenhuma thread é
+    iniciada: os itens são processados quando o lote enche ou em descarregar().
+    """
+
+    def __init__(self, nome, processar_lote, capacidade=10000, tamanho_lote=500, intervalo=1.0, espera_maxima=0.5,
+                 processar_item=None):
+        self.nome = nome
+        self.processar_lote = processar_lote
+        self.processar_item = processar_item or (lambda item: processar_lote([item]))
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._thread = None
+        self._trava = threading.Lock()
+
+    def enfileirar(self, item):
+        """ Adiciona um item ao buffer sem fazer I/O na maior parte das chamadas. """
+        if not getattr(settings, 'SGEA_PROCESSAMENTO_EM_SEGUNDO_PLANO', True):
+            self._fila.put(item)
+            if self._fila.qsize() >= self.tamanho_lote:
+                self.descarregar()
+            return
+
+        self._iniciar_thread()
+        try:
+            self._fila.put(item, timeout=self.espera_maxima)
+        except queue.Full:
+            logger.warning("Fila '%s' cheia; processando item na requisição.", self.nome)
+            self._processar([item])
+
+    def descarregar(self):
+        """ Processa imediatamente tudo o que está no buffer (usado em testes e ao encerrar o processo). """
+        while True:
+            lote = self._retirar_lote(bloquear=False)
+            if not lote:
+                return
+            self._processar(lote)
+
+    def _iniciar_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._trava:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name=f'sgea-{self.nome}', daemon=True)
+                self._thread.start()
+                atexit.register(self.descarregar)
+
+    def _retirar_lote(self, bloquear):
+        """ Retira até 'tamanho_lote' itens; se 'bloquear', espera até 'intervalo' pelo primeiro. """
+        lote = []
+        try:
+            lote.append(self._fila.get(timeout=self.intervalo) if bloquear else self._fila.get_nowait())
+            while len(lote) < self.tamanho_lote:
+                lote.append(self._fila.get_nowait())
+        except queue.Empty:
+            pass
+        return lote
+
+    def _processar(self, lote):
+        try:
+            self.processar_lote(lote)
+            return
+        except Exception:
+            logger.warning(
+                "Falha ao processar lote de %d item(ns) da fila '%s'; reprocessando um a um.",
+                len(lote), self.nome, exc_info=True,
+            )
+        for item in lote:
+            try:
+                self.processar_item(item)
+            except Exception:
+                logger.exception("Item descartado da fila '%s': %r", self.nome, item)
+
+    def _executar(self):
+        while True:
+            lote = self._retirar_lote(bloquear=True)
+            if lote:
+                self._processar(lote)
+                # A thread mantém sua própria conexão; descarta-a se expirou ou caiu
+                close_old_connections()
@@ -3,11 +3,51 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import re # Usado para validação de formato (Regex)
+import csv
+import io
+from datetime import datetime, time, timedelta
 from .models import *
+from .banners import validar_banner
 
 # Obtém o modelo de usuário customizado (sgea_app.Usuario)
 Usuario = get_user_model()
 
+# --- Regras de validação do cadastro ---
+# Compartilhadas pelo CadastroUsuarioForm e pela importação em massa (importar_usuarios).
+
+# Regex para validar o formato (XX) XXXXX-XXXX
+PADRAO_TELEFONE = r'^\(\d{2}\) \d{4,5}-\d{4}$'
+
+def validar_telefone(telefone):
+    """ Requisito: Formato (XX) XXXX-XXXX ou (XX) XXXXX-XXXX. """
+    if not re.match(PADRAO_TELEFONE, telefone or ''):
+        raise ValidationError(
+            "O telefone deve estar no formato (XX) XXXX-XXXX ou (XX) XXXXX-XXXX."
+        )
+
+def validar_senha(senha):
+    """ Requisito: Mínimo 8 caracteres, contendo letras, números e caracteres especiais. """
+    if len(senha) < 8:
+        raise ValidationError("A senha deve ter no mínimo 8 caracteres.")
+    if not re.search(r'[a-zA-Z]', senha):
+        raise ValidationError("A senha deve conter letras.")
+    if not re.search(r'\d', senha):
+        raise ValidationError("A senha deve conter números.")
+    if not re.search(r'[^a-zA-Z0-9]', senha):
+        raise ValidationError("A senha deve conter caracteres especiais.")
+
+def validar_perfil(perfil):
+    """ O perfil deve ser um dos definidos em Usuario.PERFIL_CHOICES. """
+    if perfil not in dict(Usuario.PERFIL_CHOICES):
+        raise ValidationError(f"Perfil inválido: '{perfil}'.")
+
+def validar_instituicao(perfil, instituicao):
+    """ Regra de Negócio: Instituição de Ensino obrigatória para Aluno/Professor. """
+    if perfil in ['Aluno', 'Professor'] and not instituicao:
+        raise ValidationError(
+            "A Instituição de Ensino é obrigatória para perfis Aluno e Professor."
+        )
+
 class CadastroUsuarioForm(forms.ModelForm):
     """
     Formulário para o cadastro de novos usuários, aplicando as regras de negócio
@@ -42,14 +82,8 @@ class CadastroUsuarioForm(forms.ModelForm):
         Requisito: Formato (XX) XXXXX-XXXX.
         """
         telefone = self.cleaned_data.get('telefone')
-        # Regex para validar o formato (XX) XXXXX-XXXX
         # Nota: O front-end usará máscara, mas o backend deve validar.
-        padrao_telefone = r'^\(\d{2}\) \d{4,5}-\d{4}$'
-        
-        if not re.match(padrao_telefone, telefone):
-            raise ValidationError(
-                "O telefone deve estar no formato (XX) XXXX-XXXX ou (XX) XXXXX-XXXX."
-            )
+        validar_telefone(telefone)
         return telefone
 
     def clean_password(self):
@@ -58,16 +92,7 @@ class CadastroUsuarioForm(forms.ModelForm):
         Requisito: Mínimo 8 caracteres, contendo letras, números e caracteres especiais.
         """
         senha = self.cleaned_data.get('password')
-
-        if len(senha) < 8:
-            raise ValidationError("A senha deve ter no mínimo 8 caracteres.")
-        if not re.search(r'[a-zA-Z]', senha):
-            raise ValidationError("A senha deve conter letras.")
-        if not re.search(r'\d', senha):
-            raise ValidationError("A senha deve conter números.")
-        if not re.search(r'[^a-zA-Z0-9]', senha):
-            raise ValidationError("A senha deve conter caracteres especiais.")
-        
+        validar_senha(senha)
         return senha
 
     def clean(self):
@@ -85,13 +110,7 @@ class CadastroUsuarioForm(forms.ModelForm):
             )
 
         # Regra de Negócio: Instituição de Ensino obrigatória para Aluno/Professor
-        perfil = cleaned_data.get('perfil')
-        instituicao = cleaned_data.get('instituicao_ensino')
-        
-        if perfil in ['Aluno', 'Professor'] and not instituicao:
-            raise ValidationError(
-                "A Instituição de Ensino é obrigatória para perfis Aluno e Professor."
-            )
+        validar_instituicao(cleaned_data.get('perfil'), cleaned_data.get('instituicao_ensino'))
             
         return cleaned_data
         
@@ -162,6 +181,12 @@ class FormularioEvento(forms.ModelForm):
                 "A data de início do evento não pode ser anterior à data atual."
             )
         return data_inicial
+
+    def clean_banner(self):
+        """ Tamanho, formato e dimensões do banner (banners.validar_banner). """
+        banner = self.cleaned_data.get('banner')
+        validar_banner(banner)
+        return banner
         
     def clean(self):
         """
@@ -176,4 +201,61 @@ class FormularioEvento(forms.ModelForm):
                 "A data final do evento não pode ser anterior à data inicial."
             )
             
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class FormularioPresencaCSV(forms.Form):
+    """
+    Upload de um CSV com os logins (e-mails) dos participantes presentes.
+    O login deve estar na primeira coluna; uma linha de cabeçalho 'login' é ignorada.
+    """
+    arquivo = forms.FileField(label="Arquivo CSV de presença")
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data.get('arquivo')
+        if arquivo and not arquivo.name.lower().endswith('.csv'):
+            raise ValidationError("Envie um arquivo no formato .csv.")
+        return arquivo
+
+    def logins(self):
+        """ Lê os logins do arquivo linha a linha, sem carregar o CSV inteiro na memória. """
+        texto = io.TextIOWrapper(self.cleaned_data['arquivo'].file, encoding='utf-8-sig')
+        for linha in csv.reader(texto):
+            if not linha or not linha[0].strip():
+                continue
+            login = linha[0].strip()
+            if login.lower() == 'login':
+                continue
+            yield login
+
+
+class FiltroAuditoriaForm(forms.Form):
+    """
+    Filtros da tela de auditoria. Cada filtro corresponde a um índice de
+    RegistroAuditoria, e todos são opcionais.
+    """
+    login = forms.CharField(required=False, label="Login do Usuário")
+    evento = forms.IntegerField(required=False, min_value=1, label="ID do Evento")
+    acao = forms.ChoiceField(required=False, label="Ação", choices=[('', 'Todas')] + RegistroAuditoria.ACAO_CHOICES)
+    data_inicio = forms.DateField(required=False, label="De", widget=forms.DateInput(attrs={'type': 'date'}))
+    data_fim = forms.DateField(required=False, label="Até", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filtrar(self, registros):
+        """ Aplica ao queryset os filtros preenchidos. """
+        dados = self.cleaned_data
+        if dados.get('login'):
+            registros = registros.filter(usuario__login=dados['login'].strip())
+        if dados.get('evento'):
+            registros = registros.filter(evento_id=dados['evento'])
+        if dados.get('acao'):
+            registros = registros.filter(acao=dados['acao'])
+        # O período vira um intervalo de data/hora, para que o banco use o índice de data_hora
+        if dados.get('data_inicio'):
+            registros = registros.filter(data_hora__gte=self._inicio_do_dia(dados['data_inicio']))
+        if dados.get('data_fim'):
+            registros = registros.filter(data_hora__lt=self._inicio_do_dia(dados['data_fim'] + timedelta(days=1)))
+        return registros
+
+    @staticmethod
+    def _inicio_do_dia(dia):
+        return timezone.make_aware(datetime.combine(dia, time.min))
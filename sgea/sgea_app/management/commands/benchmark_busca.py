@@ -0,0 +1,113 @@
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sgea_app import busca
+from sgea_app.catalogo import RESULTADOS_DA_BUSCA, consulta_catalogo
+from sgea_app.models import Evento, Usuario
+
+# Vocabulário dos eventos sintéticos (com acentos, para exercitar a busca sem acentos)
+TEMAS = ('Semana', 'Congresso', 'Jornada', 'Encontro', 'Simpósio', 'Oficina', 'Ciclo de Debates', 'Mostra')
+AREAS = (
+    'Computação', 'Inteligência Artificial', 'Educação', 'Física', 'Química', 'Biologia',
+    'Matemática', 'História', 'Engenharia Elétrica', 'Ciência de Dados', 'Economia', 'Letras',
+    'Administração', 'Psicologia', 'Arquitetura', 'Direito', 'Medicina Veterinária', 'Música',
+)
+LOCAIS = ('Auditório Central', 'Laboratório de Informática', 'Sala de Reuniões', 'Biblioteca', 'Ginásio', 'Anfiteatro')
+TIPOS = [tipo for tipo, _ in Evento.TIPO_EVENTO_CHOICES]
+
+# Buscas medidas: termos completos, prefixos, sem acento, várias palavras e sem resultado
+BUSCAS = ('computacao', 'intelig artif', 'semana quimica', 'auditorio', 'simpósio educação', 'xilofone')
+
+
+class Command(BaseCommand):
+    """
+    Compara a busca com índice (FTS5) com a busca por icontains em uma base sintética
+    (100 mil eventos por padrão), em um arquivo SQLite próprio. As duas consultas usam os
+    mesmos filtros do catálogo (eventos futuros) e o mesmo limite de resultados.
+    """
+    help = "Mede a busca textual do catálogo (índice FTS5 x icontains) em uma base sintética."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=100_000, help="Eventos da base.")
+        parser.add_argument('--repeticoes', type=int, default=20, help="Execuções medidas por busca.")
+        parser.add_argument('--banco', help="Arquivo SQLite da base (padrão: temporário, apagado ao final).")
+        # Uso interno: roda no processo filho, já apontando para o banco do benchmark
+        parser.add_argument('--filho', action='store_true', help="(interno)")
+
+    def handle(self, *args, **options):
+        if options['filho']:
+            return self.executar(options)
+
+        with tempfile.TemporaryDirectory() as pasta:
+            banco = options['banco'] or os.path.join(pasta, 'busca.sqlite3')
+            comando = [
+                sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_busca', '--filho',
+                '--eventos', str(options['eventos']), '--repeticoes', str(options['repeticoes']),
+            ]
+            ambiente = dict(os.environ, SGEA_DB_PATH=banco)
+            ambiente.pop('SGEA_REPLICA_DB_PATH', None)
+            if subprocess.run(comando, env=ambiente).returncode != 0:
+                raise CommandError("O benchmark de busca falhou.")
+
+    def executar(self, options):
+        call_command('migrate', verbosity=0)
+        if not Evento.objects.exists():
+            inicio = time.perf_counter()
+            self.popular(options['eventos'])
+            self.stdout.write(f"{options['eventos']} eventos criados em {time.perf_counter() - inicio:.1f}s.")
+        inicio = time.perf_counter()
+        busca.reconstruir_indice()
+        self.stdout.write(f"Índice de busca construído em {time.perf_counter() - inicio:.2f}s.")
+
+        hoje = timezone.now().date()
+        self.stdout.write(f"{'Busca':<22}{'FTS5 (ms)':>11}{'achados':>9}{'icontains (ms)':>16}{'achados':>9}{'ganho':>8}")
+        for texto in BUSCAS:
+            indice, achados_indice = self.medir(lambda: busca.buscar(consulta_catalogo(hoje), texto), options['repeticoes'])
+            varredura, achados_varredura = self.medir(lambda: busca.buscar_sem_indice(consulta_catalogo(hoje), texto), options['repeticoes'])
+            self.stdout.write(
+                f"{texto:<22}{indice:>11.2f}{achados_indice:>9}{varredura:>16.2f}{achados_varredura:>9}"
+                f"{varredura / max(indice, 1e-9):>7.1f}x"
+            )
+        self.stdout.write(
+            "'achados' conta até o limite de resultados; o icontains não ignora acentos "
+            "nem maiúsculas acentuadas, por isso encontra menos."
+        )
+
+    def medir(self, consulta, repeticoes):
+        """ Mediana (ms) de 'repeticoes' execuções, após uma execução de aquecimento. """
+        resultados = list(consulta()[:RESULTADOS_DA_BUSCA])
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            list(consulta()[:RESULTADOS_DA_BUSCA])
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos), len(resultados)
+
+    def popular(self, quantidade, tamanho_lote=5000):
+        aleatorio = random.Random(42)
+        organizador = Usuario.objects.create_user('organizador@busca.sgea', perfil='Organizador', nome='Organizador')
+        professor = Usuario.objects.create_user('professor@busca.sgea', perfil='Professor', nome='Professor')
+        hoje = timezone.now().date()
+        for inicio_lote in range(0, quantidade, tamanho_lote):
+            lote = []
+            for i in range(inicio_lote, min(inicio_lote + tamanho_lote, quantidade)):
+                # Metade dos eventos já aconteceu: o filtro de data do catálogo também pesa
+                data = hoje + timedelta(days=aleatorio.randint(-365, 365) or 1)
+                lote.append(Evento(
+                    nome=f'{aleatorio.choice(TEMAS)} de {aleatorio.choice(AREAS)} {2000 + i % 30}',
+                    local=aleatorio.choice(LOCAIS), tipo_evento=aleatorio.choice(TIPOS),
+                    data_inicial=data, data_final=data, horario='14:00', quantidade_participantes=100,
+                    organizador=organizador, professor_responsavel=professor,
+                ))
+            Evento.objects.bulk_create(lote)
@@ -0,0 +1,105 @@
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app import desempenho
+from sgea_app.models import Usuario
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de todas as rotas principais sobre uma base sintética. A base é criada em
+    um arquivo SQLite próprio (--banco), nunca no banco configurado em settings; se o
+    arquivo já estiver populado, é reaproveitado (popular 1M de usuários leva minutos).
+    Os resultados (percentis de latência, consultas por requisição e orçamentos) são
+    gravados em JSON; o comando termina com erro se alguma rota passar do orçamento.
+    """
+    help = "Popula uma base sintética e mede latência e consultas por requisição de cada rota."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10_000, help="Usuários da base (10 mil a 1 milhão).")
+        parser.add_argument('--eventos', type=int, default=100, help="Eventos da base (100 a 100 mil).")
+        parser.add_argument('--inscricoes-por-evento', type=int, default=50, help="Inscrições por evento.")
+        parser.add_argument('--repeticoes', type=int, default=50, help="Requisições medidas por rota.")
+        parser.add_argument('--banco', help="Arquivo SQLite da base (padrão: temporário, apagado ao final).")
+        parser.add_argument('--saida', default='desempenho.json', help="Arquivo JSON com os resultados.")
+        # Uso interno: roda no processo filho, já apontando para o banco do benchmark
+        parser.add_argument('--filho', action='store_true', help="(interno)")
+
+    def handle(self, *args, **options):
+        if options['filho']:
+            return self.executar(options)
+
+        with tempfile.TemporaryDirectory() as pasta:
+            banco = options['banco'] or os.path.join(pasta, 'benchmark.sqlite3')
+            comando = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_rotas', '--filho'] + [
+                argumento
+                for opcao in ('usuarios', 'eventos', 'inscricoes_por_evento', 'repeticoes', 'saida')
+                for argumento in (f"--{opcao.replace('_', '-')}", str(options[opcao]))
+            ]
+            ambiente = dict(os.environ, SGEA_DB_PATH=banco)
+            ambiente.pop('SGEA_REPLICA_DB_PATH', None)
+            if subprocess.run(comando, env=ambiente).returncode != 0:
+                raise CommandError("O benchmark falhou ou alguma rota passou do orçamento de consultas.")
+
+    def executar(self, options):
+        call_command('migrate', verbosity=0)
+
+        escala = {
+            'usuarios': options['usuarios'],
+            'eventos': options['eventos'],
+            'inscricoes_por_evento': options['inscricoes_por_evento'],
+        }
+        if Usuario.objects.filter(login='admin@bench.sgea').exists():
+            self.stdout.write("Base já populada: reaproveitando.")
+            criados = None
+        else:
+            inicio = time.perf_counter()
+            criados = desempenho.popular_base(**escala)
+            self.stdout.write(f"Base populada em {time.perf_counter() - inicio:.1f}s: {criados}")
+
+        # 'localhost' é aceito com DEBUG e ALLOWED_HOSTS vazio; senão, o primeiro host configurado
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        rotas = desempenho.medir_rotas(repeticoes=options['repeticoes'], host=host.lstrip('.'))
+        resultado = {
+            'escala': escala,
+            'criados': criados,
+            'ambiente': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'sqlite_concorrente': settings.SGEA_SQLITE_CONCORRENTE,
+                'cache': settings.CACHES['default']['BACKEND'],
+            },
+            'rotas': rotas,
+        }
+        with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+        self.stdout.write(f"{'Rota':<28}{'p50 (ms)':>10}{'p90 (ms)':>10}{'p99 (ms)':>10}{'consultas':>11}{'orçamento':>11}")
+        estourados = []
+        for rotulo, medicao in rotas.items():
+            latencia = medicao['latencia_ms']
+            linha = (
+                f"{rotulo:<28}{latencia['p50']:>10.1f}{latencia['p90']:>10.1f}{latencia['p99']:>10.1f}"
+                f"{medicao['consultas_por_requisicao']:>11}{'-' if medicao['orcamento_consultas'] is None else medicao['orcamento_consultas']:>11}"
+            )
+            if medicao['dentro_do_orcamento']:
+                self.stdout.write(linha)
+            else:
+                estourados.append(rotulo)
+                self.stdout.write(self.style.ERROR(linha))
+        self.stdout.write(f"Resultados gravados em {options['saida']}.")
+
+        if estourados:
+            raise CommandError(f"Rotas acima do orçamento de consultas: {', '.join(estourados)}.")
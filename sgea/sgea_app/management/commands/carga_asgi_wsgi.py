@@ -0,0 +1,132 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Compara um worker WSGI (gunicorn) com um worker ASGI (uvicorn) sob a mesma carga:
+    muitos clientes lentos, que enviam os cabeçalhos da requisição aos poucos (como
+    conexões móveis ruins). Os servidores são iniciados pelo próprio comando, com o
+    banco configurado em settings, e os dois recebem exatamente o mesmo tráfego.
+    """
+    help = "Mede requisições/s e latência de um worker WSGI e de um worker ASGI com clientes lentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--caminho', default='/', help="Rota requisitada (padrão: o catálogo).")
+        parser.add_argument('--clientes', type=int, default=100, help="Clientes simultâneos.")
+        parser.add_argument('--atraso', type=float, default=0.5, help="Segundos que cada cliente leva para enviar a requisição.")
+        parser.add_argument('--duracao', type=float, default=10.0, help="Duração de cada medição em segundos.")
+        parser.add_argument('--classe-wsgi', default='sync', choices=['sync', 'gthread'], help="Tipo do worker do gunicorn.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads do worker WSGI (apenas com gthread).")
+        parser.add_argument('--porta', type=int, default=8765, help="Porta usada pelos servidores.")
+
+    def handle(self, *args, **options):
+        for modulo in ('gunicorn', 'uvicorn'):
+            if importlib.util.find_spec(modulo) is None:
+                raise CommandError(f"O benchmark precisa do pacote '{modulo}' (pip install {modulo}).")
+
+        endereco = f"127.0.0.1:{options['porta']}"
+        servidores = {
+            'WSGI': [
+                sys.executable, '-m', 'gunicorn', 'sgea.wsgi:application', '--bind', endereco,
+                '--workers', '1', '--worker-class', options['classe_wsgi'], '--threads', str(options['threads']),
+                '--timeout', '120', '--log-level', 'warning',
+            ],
+            'ASGI': [
+                sys.executable, '-m', 'uvicorn', 'sgea.asgi:application', '--host', '127.0.0.1',
+                '--port', str(options['porta']), '--workers', '1', '--log-level', 'warning',
+            ],
+        }
+
+        descricoes = {
+            'WSGI': f"1 worker {options['classe_wsgi']}" + (f", {options['threads']} threads" if options['classe_wsgi'] == 'gthread' else ''),
+            'ASGI': '1 worker',
+        }
+        resultados = {}
+        for nome, comando in servidores.items():
+            processo = subprocess.Popen(comando, cwd=settings.BASE_DIR, env=dict(os.environ))
+            try:
+                self.aguardar_servidor(options['porta'])
+                resultados[nome] = asyncio.run(self.carga(options))
+            finally:
+                processo.terminate()
+                processo.wait()
+
+            r = resultados[nome]
+            self.stdout.write(
+                f"{nome} ({descricoes[nome]}): "
+                f"{r['por_segundo']:7.1f} req/s | p50 {r['p50']:7.1f} ms | p95 {r['p95']:7.1f} ms | erros: {r['erros']}"
+            )
+
+        ganho = resultados['ASGI']['por_segundo'] / max(resultados['WSGI']['por_segundo'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"ASGI: x{ganho:.2f} requisições/s com {options['clientes']} clientes lentos ({options['atraso']}s cada)."
+        ))
+
+    def aguardar_servidor(self, porta, limite=20.0):
+        fim = time.perf_counter() + limite
+        while time.perf_counter() < fim:
+            try:
+                socket.create_connection(('127.0.0.1', porta), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"O servidor não respondeu na porta {porta}.")
+
+    async def carga(self, options):
+        latencias = []
+        erros = 0
+        fim = time.perf_counter() + options['duracao']
+        cabecalhos = [
+            f"GET {options['caminho']} HTTP/1.1\r\n".encode(),
+            b"Host: localhost\r\n",
+            b"User-Agent: sgea-carga\r\n",
+            b"Accept: text/html\r\n",
+            b"Connection: close\r\n",
+            b"\r\n",
+        ]
+        # Os pedaços da requisição são enviados espaçados ao longo de 'atraso' segundos
+        intervalo = options['atraso'] / (len(cabecalhos) - 1)
+
+        async def cliente():
+            nonlocal erros
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                try:
+                    leitor, escritor = await asyncio.open_connection('127.0.0.1', options['porta'])
+                    for i, pedaco in enumerate(cabecalhos):
+                        if i:
+                            await asyncio.sleep(intervalo)
+                        escritor.write(pedaco)
+                        await escritor.drain()
+                    resposta = await leitor.read()
+                    escritor.close()
+                    if resposta.startswith(b'HTTP/1.1 200') or resposta.startswith(b'HTTP/1.0 200'):
+                        latencias.append(time.perf_counter() - inicio)
+                    else:
+                        erros += 1
+                except OSError:
+                    erros += 1
+
+        comeco = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(options['clientes'])))
+        segundos = time.perf_counter() - comeco
+
+        latencias.sort()
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000 if latencias else 0.0
+        return {
+            'por_segundo': len(latencias) / segundos,
+            'p50': percentil(0.50),
+            'p95': percentil(0.95),
+            'media': statistics.mean(latencias) * 1000 if latencias else 0.0,
+            'erros': erros,
+        }
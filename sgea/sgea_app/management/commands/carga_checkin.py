@@ -0,0 +1,103 @@
+import http.cookiejar
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app.checkin import gerar_token_checkin
+from sgea_app.models import Inscricao
+
+
+class Command(BaseCommand):
+    """
+    Teste de carga do check-in: vários "leitores" em paralelo enviam os códigos das
+    inscrições de um evento para o servidor de desenvolvimento (runserver) e o
+    comando informa a vazão sustentada (check-ins/s) e as latências.
+    """
+    help = "Dispara check-ins em paralelo contra um servidor em execução e mede check-ins/s."
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento_id', type=int, help="Evento cujas inscrições serão lidas.")
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Endereço do servidor.")
+        parser.add_argument('--login', required=True, help="Login do Organizador do evento.")
+        parser.add_argument('--senha', required=True, help="Senha do Organizador.")
+        parser.add_argument('--leitores', type=int, default=8, help="Leitores (threads) simultâneos.")
+        parser.add_argument('--duracao', type=float, default=10.0, help="Duração do teste em segundos.")
+
+    def autenticar(self, base, login, senha):
+        """ Faz login como um navegador faria e devolve os cookies de sessão e CSRF. """
+        cookies = http.cookiejar.CookieJar()
+        abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+        url_login = f'{base}/contas/login/'
+        abridor.open(url_login).read()
+        csrf = next((c.value for c in cookies if c.name == 'csrftoken'), '')
+        dados = urllib.parse.urlencode({'username': login, 'password': senha, 'csrfmiddlewaretoken': csrf})
+        abridor.open(urllib.request.Request(url_login, data=dados.encode(), headers={'Referer': url_login})).read()
+
+        valores = {c.name: c.value for c in cookies}
+        if 'sessionid' not in valores:
+            raise CommandError("Não foi possível autenticar com as credenciais informadas.")
+        return valores
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        tokens = [
+            gerar_token_checkin(inscricao_id, options['evento_id'])
+            for inscricao_id in Inscricao.objects.filter(evento_id=options['evento_id']).values_list('pk', flat=True)
+        ]
+        if not tokens:
+            raise CommandError("O evento não tem inscrições.")
+
+        cookies = self.autenticar(base, options['login'], options['senha'])
+        cabecalhos = {
+            'Cookie': f"sessionid={cookies['sessionid']}; csrftoken={cookies['csrftoken']}",
+            'X-CSRFToken': cookies['csrftoken'],
+            'Referer': base,
+        }
+
+        latencias = []
+        erros = []
+        trava = threading.Lock()
+        fim = time.perf_counter() + options['duracao']
+
+        def leitor(inicio):
+            # Cada leitor percorre os códigos a partir de uma posição diferente; ao dar a
+            # volta na lista, os códigos são lidos de novo (o que o servidor deve tolerar).
+            posicao = inicio
+            while time.perf_counter() < fim:
+                url = f'{base}/checkin/{urllib.parse.quote(tokens[posicao % len(tokens)])}/'
+                antes = time.perf_counter()
+                try:
+                    urllib.request.urlopen(urllib.request.Request(url, data=b'', headers=cabecalhos)).read()
+                    with trava:
+                        latencias.append(time.perf_counter() - antes)
+                except urllib.error.URLError as erro:
+                    with trava:
+                        erros.append(erro)
+                posicao += 1
+
+        passo = max(1, len(tokens) // options['leitores'])
+        threads = [threading.Thread(target=leitor, args=(i * passo,)) for i in range(options['leitores'])]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        segundos = time.perf_counter() - inicio
+
+        if not latencias:
+            raise CommandError(f"Nenhum check-in concluído ({len(erros)} erro(s)).")
+        latencias.sort()
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(latencias)} check-ins em {segundos:.1f}s: {len(latencias) / segundos:.1f} check-ins/s "
+            f"com {options['leitores']} leitor(es)."
+        ))
+        self.stdout.write(
+            f"Latência (ms): média {statistics.mean(latencias) * 1000:.1f} | p50 {percentil(0.50):.1f} | "
+            f"p95 {percentil(0.95):.1f} | p99 {percentil(0.99):.1f} | erros: {len(erros)}"
+        )
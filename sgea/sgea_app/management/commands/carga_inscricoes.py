@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from sgea_app.models import Evento, Usuario
+
+# Perfis comparados: o valor vai para a variável SGEA_SQLITE_CONCORRENTE do processo filho
+PERFIS = {'padrao': '0', 'concorrente': '1'}
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de inscrições concorrentes no SQLite. Para cada perfil, um processo filho
+    cria um banco temporário, migra, e várias threads inscrevem e cancelam inscrições
+    pelo fluxo completo de requisição (middlewares, sessão, views). O comando compara
+    as requisições por segundo e os erros (ex.: "database is locked") de cada perfil.
+    O banco configurado em settings nunca é usado.
+    """
+    help = "Compara requisições/s de inscrição com o perfil padrão e o perfil concorrente do SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Usuários (threads) simultâneos.")
+        parser.add_argument('--duracao', type=float, default=10.0, help="Duração de cada medição em segundos.")
+        parser.add_argument('--eventos', type=int, default=4, help="Eventos disputados pelas threads.")
+        parser.add_argument(
+            '--perfis', default=','.join(PERFIS),
+            help=f"Perfis a medir, separados por vírgula ({', '.join(PERFIS)}).",
+        )
+        # Uso interno: executa a medição no processo filho e imprime o resultado em JSON
+        parser.add_argument('--filho', action='store_true', help="(interno)")
+
+    def handle(self, *args, **options):
+        if options['filho']:
+            self.stdout.write(json.dumps(self.medir(options['threads'], options['duracao'], options['eventos'])))
+            return
+
+        resultados = {}
+        for perfil in options['perfis'].split(','):
+            if perfil not in PERFIS:
+                raise CommandError(f"Perfil desconhecido: {perfil}.")
+            resultados[perfil] = self.executar_perfil(perfil, options)
+            r = resultados[perfil]
+            self.stdout.write(
+                f"{perfil:>12}: {r['requisicoes'] / r['segundos']:8.1f} req/s | "
+                f"{r['requisicoes']} requisições | {r['erros']} erro(s)"
+            )
+
+        if len(resultados) == 2:
+            padrao, concorrente = (resultados[p] for p in PERFIS)
+            ganho = (concorrente['requisicoes'] / concorrente['segundos']) / max(padrao['requisicoes'] / padrao['segundos'], 1e-9)
+            self.stdout.write(self.style.SUCCESS(f"Perfil concorrente: x{ganho:.2f} requisições/s."))
+
+    def executar_perfil(self, perfil, options):
+        """ Roda a medição em um processo novo, com o perfil e um banco temporário próprios. """
+        with tempfile.TemporaryDirectory() as pasta:
+            ambiente = dict(
+                os.environ,
+                SGEA_SQLITE_CONCORRENTE=PERFIS[perfil],
+                SGEA_DB_PATH=os.path.join(pasta, 'carga.sqlite3'),
+            )
+            comando = [
+                sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'carga_inscricoes', '--filho',
+                '--threads', str(options['threads']),
+                '--duracao', str(options['duracao']),
+                '--eventos', str(options['eventos']),
+            ]
+            saida = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if saida.returncode != 0:
+            raise CommandError(f"A medição do perfil '{perfil}' falhou:\n{saida.stderr}")
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+    def medir(self, quantidade_threads, duracao, quantidade_eventos):
+        """ Executado no processo filho, já apontando para o banco temporário. """
+        call_command('migrate', verbosity=0)
+
+        # Sem senha utilizável: as threads entram com force_login, sem custo de hash
+        organizador = Usuario.objects.create_user('organizador@carga.sgea', perfil='Organizador', nome='Organizador')
+        inicio = timezone.now().date() + timedelta(days=30)
+        eventos = Evento.objects.bulk_create([
+            Evento(
+                nome=f'Evento de Carga {i}', tipo_evento='Palestra',
+                data_inicial=inicio, data_final=inicio, horario='14:00', local='Auditório',
+                quantidade_participantes=quantidade_threads, organizador=organizador,
+                professor_responsavel=organizador,
+            ) for i in range(quantidade_eventos)
+        ])
+        alunos = Usuario.objects.bulk_create([
+            Usuario(login=f'aluno{i}@carga.sgea', password=make_password(None), perfil='Aluno', nome=f'Aluno {i}')
+            for i in range(quantidade_threads)
+        ])
+        close_old_connections()
+
+        requisicoes = []
+        erros = []
+        trava = threading.Lock()
+        fim = time.perf_counter() + duracao
+
+        def usuario(aluno):
+            # 'localhost' é aceito com DEBUG e ALLOWED_HOSTS vazio (o 'testserver' não)
+            cliente = Client(raise_request_exception=False, HTTP_HOST='localhost')
+            cliente.force_login(aluno)
+            feitas = falhas = 0
+            posicao = 0
+            while time.perf_counter() < fim:
+                evento = eventos[posicao % len(eventos)]
+                for rota in ('inscrever_evento', 'desinscrever_evento'):
+                    # Como o handler WSGI: conexões são fechadas ou reaproveitadas
+                    # entre as requisições conforme CONN_MAX_AGE
+                    close_old_connections()
+                    resposta = cliente.post(reverse(rota, args=[evento.pk]))
+                    close_old_connections()
+                    feitas += 1
+                    # As duas rotas terminam em redirect; qualquer outra resposta é erro
+                    falhas += resposta.status_code != 302
+                posicao += 1
+            with trava:
+                requisicoes.append(feitas)
+                erros.append(falhas)
+
+        threads = [threading.Thread(target=usuario, args=(aluno,)) for aluno in alunos]
+        comeco = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'requisicoes': sum(requisicoes),
+            'erros': sum(erros),
+            'segundos': time.perf_counter() - comeco,
+        }
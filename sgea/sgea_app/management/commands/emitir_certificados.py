@@ -0,0 +1,157 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from sgea_app.certificados import (
+    PRAZO_RESERVA, TAMANHO_LOTE, emitir_certificados_evento, emitir_eventos_encerrados, identificador_trabalhador,
+)
+from sgea_app.models import Certificado, Evento, Inscricao, Usuario
+
+
+class Command(BaseCommand):
+    """
+    Emite os certificados pendentes de um evento pela linha de comando, ou mede a
+    vazão da emissão com diferentes quantidades de processos (--benchmark).
+
+    Com --encerrados, processa todos os eventos que já terminaram e ainda não tiveram
+    os certificados emitidos (para agendar no cron, ou com --continuo como serviço).
+    Cada evento é reservado por um UPDATE condicional, então vários processos podem
+    rodar ao mesmo tempo sem emitir duas vezes; repetir a execução não tem efeito.
+    """
+    help = "Emite os certificados pendentes de um evento e informa a vazão (certificados/s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento_id', nargs='?', type=int, help="ID do evento.")
+        parser.add_argument('--processos', type=int, default=None, help="Tamanho do pool (padrão: número de CPUs).")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Certificados por lote de bulk_create.")
+        parser.add_argument(
+            '--benchmark', type=int, metavar='N', default=None,
+            help="Emite os certificados de um evento com N participantes, em um banco temporário, "
+                 "com 1, 2, 4... processos e compara a vazão.",
+        )
+        parser.add_argument('--encerrados', action='store_true', help="Emite os certificados de todos os eventos encerrados.")
+        parser.add_argument('--limite', type=int, default=100, help="Eventos processados por rodada (com --encerrados).")
+        parser.add_argument('--continuo', action='store_true', help="Repete a rodada indefinidamente (com --encerrados).")
+        parser.add_argument('--intervalo', type=float, default=60.0, help="Segundos entre rodadas (com --continuo).")
+        # Uso interno: executa o benchmark no processo filho, já apontando para o banco temporário
+        parser.add_argument('--filho', action='store_true', help="(interno)")
+
+    def handle(self, *args, **options):
+        if options['benchmark'] and options['filho']:
+            return self.benchmark(options['benchmark'], options['processos'] or os.cpu_count() or 1, options['lote'])
+        if options['benchmark']:
+            return self.executar_benchmark(options)
+
+        if options['encerrados']:
+            return self.encerrados(options)
+
+        if options['evento_id'] is None:
+            raise CommandError("Informe o ID do evento ou use --encerrados ou --benchmark.")
+        try:
+            evento = Evento.objects.get(pk=options['evento_id'])
+        except Evento.DoesNotExist:
+            raise CommandError(f"Evento {options['evento_id']} não encontrado.")
+
+        resultado = emitir_certificados_evento(evento, options['processos'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.emitidos} certificado(s) emitido(s) em {resultado.segundos:.2f}s "
+            f"({resultado.por_segundo:.1f} certificados/s)."
+        ))
+
+    def encerrados(self, options):
+        trabalhador = identificador_trabalhador()
+        self.stdout.write(
+            f"Processando eventos encerrados como '{trabalhador}' "
+            f"(reservas abandonadas há mais de {PRAZO_RESERVA} são retomadas)."
+        )
+        while True:
+            processados = emitir_eventos_encerrados(trabalhador, options['limite'], options['processos'], options['lote'])
+            for evento, resultado in processados:
+                self.stdout.write(
+                    f"Evento {evento.pk} ({evento.nome}): {resultado.emitidos} certificado(s) "
+                    f"em {resultado.segundos:.2f}s."
+                )
+            self.stdout.write(self.style.SUCCESS(f"{len(processados)} evento(s) processado(s)."))
+
+            # Uma rodada cheia indica que há mais eventos na fila: segue sem esperar
+            if not options['continuo']:
+                return
+            if len(processados) < options['limite']:
+                time.sleep(options['intervalo'])
+
+    def executar_benchmark(self, options):
+        """ Roda o benchmark em um processo novo, com um banco temporário: o banco configurado nunca é usado. """
+        with tempfile.TemporaryDirectory() as pasta:
+            ambiente = dict(os.environ, SGEA_DB_PATH=os.path.join(pasta, 'certificados.sqlite3'))
+            ambiente.pop('SGEA_REPLICA_DB_PATH', None)
+            comando = [
+                sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'emitir_certificados', '--filho',
+                '--benchmark', str(options['benchmark']),
+                '--processos', str(options['processos'] or os.cpu_count() or 1),
+                '--lote', str(options['lote']),
+            ]
+            processo = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+            self.stdout.write(processo.stdout, ending='')
+            if processo.returncode != 0:
+                raise CommandError(f"O benchmark falhou:\n{processo.stderr}")
+
+    def benchmark(self, quantidade, max_processos, tamanho_lote):
+        """
+        Mede a emissão completa (consulta das pendentes, renderização no pool de processos,
+        gravação dos PDFs e INSERT dos registros) de um evento encerrado com 'quantidade'
+        presenças confirmadas. Cada rodada apaga os certificados da anterior e emite de novo.
+        """
+        call_command('migrate', verbosity=0)
+        evento = self.popular_evento(quantidade)
+
+        with tempfile.TemporaryDirectory() as midia, override_settings(MEDIA_ROOT=midia):
+            processos = 1
+            base = None
+            while True:
+                Certificado.objects.all().delete()
+                shutil.rmtree(os.path.join(midia, 'certificados'), ignore_errors=True)
+                resultado = emitir_certificados_evento(evento, processos, tamanho_lote)
+                base = base or resultado.por_segundo
+                self.stdout.write(
+                    f"{processos:>3} processo(s): {resultado.por_segundo:10.1f} certificados/s  "
+                    f"(x{resultado.por_segundo / base:.2f}, {resultado.emitidos} em {resultado.segundos:.2f}s)"
+                )
+
+                if processos >= max_processos:
+                    break
+                processos = min(processos * 2, max_processos)
+
+    def popular_evento(self, quantidade):
+        """ Evento encerrado com 'quantidade' participantes com presença confirmada (bulk_create). """
+        senha = make_password(None)
+        organizador, professor = Usuario.objects.bulk_create([
+            Usuario(login=f'{perfil.lower()}@certificados.sgea', password=senha, perfil=perfil, nome=perfil,
+                    telefone='(11) 90000-0000', instituicao_ensino='UniSGEA', is_active=True)
+            for perfil in ('Organizador', 'Professor')
+        ])
+        inicio = timezone.now().date() - timedelta(days=3)
+        evento = Evento.objects.create(
+            nome='Semana Acadêmica de Computação', tipo_evento='Semana Acadêmica', local='Auditório Central',
+            data_inicial=inicio, data_final=inicio + timedelta(days=1), horario='14:00',
+            quantidade_participantes=quantidade, organizador=organizador, professor_responsavel=professor,
+        )
+        participantes = Usuario.objects.bulk_create([
+            Usuario(login=f'participante{i}@certificados.sgea', password=senha, perfil='Aluno',
+                    nome=f'Participante {i}', telefone='(11) 90000-0000', instituicao_ensino='UniSGEA', is_active=True)
+            for i in range(quantidade)
+        ], batch_size=TAMANHO_LOTE)
+        Inscricao.objects.bulk_create([
+            Inscricao(usuario=participante, evento=evento, presenca_confirmada=True) for participante in participantes
+        ], batch_size=TAMANHO_LOTE)
+        return evento
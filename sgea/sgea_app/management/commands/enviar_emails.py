@@ -0,0 +1,80 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from sgea_app.certificados import identificador_trabalhador
+from sgea_app.emails import MAXIMO_TENTATIVAS, TAMANHO_LOTE, enviar_pendentes
+from sgea_app.smtp_local import ServidorSMTPLocal
+
+
+class Command(BaseCommand):
+    """
+    Envia os e-mails da caixa de saída (emails.py) em lotes, por uma única conexão com
+    o servidor de e-mail, e informa a vazão (e-mails/s). Com --continuo, roda como
+    serviço; vários processos podem rodar ao mesmo tempo (cada lote é reservado por um
+    UPDATE condicional).
+
+    Com --benchmark N, compara uma conexão SMTP por mensagem com a conexão reutilizada,
+    enviando N mensagens sintéticas a um servidor SMTP local (sem usar o banco).
+    """
+    help = "Envia os e-mails pendentes da caixa de saída e informa a vazão (e-mails/s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Mensagens reservadas por lote.")
+        parser.add_argument('--maximo', type=int, default=None, help="Máximo de mensagens por rodada.")
+        parser.add_argument('--continuo', action='store_true', help="Repete a rodada indefinidamente.")
+        parser.add_argument('--intervalo', type=float, default=5.0, help="Segundos entre rodadas (com --continuo).")
+        parser.add_argument('--benchmark', type=int, metavar='N', default=None, help="Mede a vazão com N mensagens sintéticas.")
+        parser.add_argument(
+            '--latencia', type=float, default=20.0,
+            help="Custo simulado (ms) de abrir uma conexão no servidor local (com --benchmark).",
+        )
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['benchmark'], options['latencia'] / 1000)
+
+        trabalhador = identificador_trabalhador()
+        self.stdout.write(f"Enviando a caixa de saída como '{trabalhador}' (até {MAXIMO_TENTATIVAS} tentativas por mensagem).")
+        while True:
+            try:
+                resultado = enviar_pendentes(trabalhador, options['lote'], options['maximo'])
+            except Exception as erro:
+                # Servidor de e-mail fora do ar: as mensagens voltaram à fila; tenta na próxima rodada
+                if not options['continuo']:
+                    raise
+                self.stderr.write(f"Falha na conexão com o servidor de e-mail: {erro}")
+            else:
+                if resultado.enviadas or resultado.falhas or not options['continuo']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{resultado.enviadas} e-mail(s) enviado(s) e {resultado.falhas} falha(s) "
+                        f"em {resultado.segundos:.2f}s ({resultado.por_segundo:.1f} e-mails/s)."
+                    ))
+            if not options['continuo']:
+                return
+            time.sleep(options['intervalo'])
+
+    def benchmark(self, quantidade, latencia):
+        mensagens = [
+            EmailMessage(f"Mensagem {i}", "Corpo da mensagem de teste.", 'sgea@localhost', [f'usuario{i}@localhost'])
+            for i in range(quantidade)
+        ]
+        with ServidorSMTPLocal(latencia=latencia) as servidor:
+            def conexao():
+                return get_connection('django.core.mail.backends.smtp.EmailBackend', host='127.0.0.1', port=servidor.porta)
+
+            inicio = time.perf_counter()
+            for mensagem in mensagens:
+                conexao().send_messages([mensagem])  # abre e fecha uma conexão por mensagem
+            uma_por_mensagem = quantidade / (time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            with conexao() as reutilizada:
+                for mensagem in mensagens:
+                    reutilizada.send_messages([mensagem])
+            reutilizando = quantidade / (time.perf_counter() - inicio)
+
+        self.stdout.write(f"Servidor SMTP local com {latencia * 1000:.0f} ms por conexão aberta, {quantidade} mensagens:")
+        self.stdout.write(f"  uma conexão por mensagem: {uma_por_mensagem:10.1f} e-mails/s")
+        self.stdout.write(f"  conexão reutilizada:      {reutilizando:10.1f} e-mails/s  (x{reutilizando / uma_por_mensagem:.1f})")
@@ -0,0 +1,71 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from sgea_app.banners import gerar_miniaturas, gravar_larguras
+from sgea_app.models import Evento
+
+
+def _gerar(item):
+    """ Executada nos processos do pool: um banner com problema não interrompe os demais. """
+    evento_id, nome_banner = item
+    try:
+        return evento_id, nome_banner, gerar_miniaturas(nome_banner), None
+    except Exception as erro:
+        return evento_id, nome_banner, None, str(erro)
+
+
+class Command(BaseCommand):
+    """
+    Gera as miniaturas dos banners já existentes (eventos criados antes do pipeline de
+    banners, ou cuja geração falhou). A decodificação e a redução das imagens usam CPU,
+    então os banners são divididos entre vários processos; as larguras geradas são
+    gravadas no banco pelo processo principal, em lotes.
+    """
+    help = "Gera as miniaturas (WebP e JPEG) dos banners de eventos que ainda não as têm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=None, help="Tamanho do pool (padrão: número de CPUs).")
+        parser.add_argument('--lote', type=int, default=100, help="Banners gravados no banco por transação.")
+        parser.add_argument('--todos', action='store_true', help="Regera também as miniaturas já existentes.")
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.exclude(banner='').exclude(banner__isnull=True)
+        if not options['todos']:
+            eventos = eventos.filter(banner_larguras=[])
+        pendentes = list(eventos.order_by('id').values_list('id', 'banner'))
+        if not pendentes:
+            self.stdout.write(self.style.SUCCESS("Nenhum banner pendente."))
+            return
+
+        processos = options['processos'] or os.cpu_count() or 1
+        inicio = time.perf_counter()
+        gerados, falhas, resultados = 0, 0, {}
+
+        def registrar(evento_id, nome_banner, larguras, erro):
+            nonlocal gerados, falhas
+            if erro:
+                falhas += 1
+                self.stderr.write(f"Evento {evento_id} ({nome_banner}): {erro}")
+                return
+            resultados[(evento_id, nome_banner)] = larguras
+            if len(resultados) >= options['lote']:
+                gerados += gravar_larguras(resultados)
+                resultados.clear()
+
+        if processos == 1:
+            for item in pendentes:
+                registrar(*_gerar(item))
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as pool:
+                for resultado in pool.map(_gerar, pendentes, chunksize=max(1, len(pendentes) // (processos * 4))):
+                    registrar(*resultado)
+        gerados += gravar_larguras(resultados)
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Miniaturas geradas para {gerados} banner(s) em {segundos:.2f}s "
+            f"({len(pendentes) / segundos:.1f} banners/s, {processos} processo(s)); falhas: {falhas}."
+        ))
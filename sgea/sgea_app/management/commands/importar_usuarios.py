@@ -0,0 +1,154 @@
+import csv
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from sgea_app.forms import validar_instituicao, validar_perfil, validar_senha, validar_telefone
+from sgea_app.models import Usuario
+
+COLUNAS_OBRIGATORIAS = ('nome', 'telefone', 'instituicao_ensino', 'login', 'perfil')
+
+# Campos de texto livre conferidos contra o modelo (obrigatoriedade e max_length), como
+# faz o CadastroUsuarioForm; o perfil é conferido contra as opções por validar_perfil
+CAMPOS_DO_MODELO = [Usuario._meta.get_field(campo) for campo in ('nome', 'telefone', 'instituicao_ensino', 'login')]
+
+
+class Command(BaseCommand):
+    """
+    Importa usuários em massa a partir de um CSV com as colunas
+    nome, telefone, instituicao_ensino, login, perfil e (opcional) senha.
+
+    O arquivo é lido em fluxo e processado em lotes: validação com as mesmas regras
+    do CadastroUsuarioForm, uma consulta de logins existentes por lote, hash das
+    senhas (PBKDF2, CPU-bound) em um pool de processos e um bulk_create por lote.
+    Linhas sem senha recebem uma senha inutilizável (o usuário define a sua depois).
+    """
+    help = "Importa usuários de um CSV em lotes, com hash de senhas em paralelo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Caminho do arquivo CSV.")
+        parser.add_argument('--processos', type=int, default=None, help="Processos para o hash das senhas (padrão: número de CPUs).")
+        parser.add_argument('--lote', type=int, default=1000, help="Usuários por lote (um bulk_create por lote).")
+        parser.add_argument('--ativos', action='store_true', help="Cria os usuários já ativos (sem confirmação por e-mail).")
+        parser.add_argument('--rejeitados', help="Grava as linhas rejeitadas, com o motivo, neste CSV.")
+
+    def handle(self, *args, **options):
+        self.tempos = defaultdict(float)
+        self.importados = 0
+        self.rejeitados = []
+        self.ativos = options['ativos']
+        processos = options['processos'] or os.cpu_count() or 1
+        inicio = time.perf_counter()
+
+        try:
+            arquivo = open(options['arquivo'], newline='', encoding='utf-8-sig')
+        except OSError as erro:
+            raise CommandError(f"Não foi possível abrir o arquivo: {erro}")
+
+        # django.setup como initializer: os processos também funcionam com o método 'spawn'
+        with arquivo, ProcessPoolExecutor(max_workers=processos, initializer=django.setup) as pool:
+            leitor = csv.DictReader(arquivo)
+            faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in (leitor.fieldnames or [])]
+            if faltando:
+                raise CommandError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+
+            vistos = set()
+            lote = []
+            for numero, linha in enumerate(leitor, start=2):
+                antes = time.perf_counter()
+                dados = self.validar(numero, linha, vistos)
+                self.tempos['leitura e validação'] += time.perf_counter() - antes
+                if dados:
+                    lote.append(dados)
+                if len(lote) >= options['lote']:
+                    self.importar_lote(lote, pool, processos)
+                    lote = []
+            if lote:
+                self.importar_lote(lote, pool, processos)
+
+        if options['rejeitados'] and self.rejeitados:
+            with open(options['rejeitados'], 'w', newline='', encoding='utf-8') as saida:
+                escritor = csv.writer(saida)
+                escritor.writerow(['linha', 'login', 'motivo'])
+                escritor.writerows(self.rejeitados)
+
+        self.relatorio(time.perf_counter() - inicio)
+
+    def validar(self, numero, linha, vistos):
+        """ Aplica as regras do cadastro à linha. Retorna os dados limpos ou None se rejeitada. """
+        dados = {campo: (linha.get(campo) or '').strip() for campo in COLUNAS_OBRIGATORIAS + ('senha',)}
+        dados['login'] = Usuario.objects.normalize_email(dados['login'])
+        try:
+            for campo in CAMPOS_DO_MODELO:
+                valor = dados[campo.name]
+                if not valor and not campo.blank:
+                    raise ValidationError(f"{campo.verbose_name}: campo obrigatório.")
+                if len(valor) > campo.max_length:
+                    raise ValidationError(f"{campo.verbose_name}: máximo de {campo.max_length} caracteres ({len(valor)}).")
+            if dados['login'] in vistos:
+                raise ValidationError("Login repetido no arquivo.")
+            validar_telefone(dados['telefone'])
+            validar_perfil(dados['perfil'])
+            validar_instituicao(dados['perfil'], dados['instituicao_ensino'])
+            if dados['senha']:
+                validar_senha(dados['senha'])
+        except ValidationError as erro:
+            self.rejeitados.append((numero, dados['login'], '; '.join(erro.messages)))
+            return None
+
+        vistos.add(dados['login'])
+        dados['linha'] = numero
+        return dados
+
+    def importar_lote(self, lote, pool, processos):
+        # 1. Uma consulta por lote para os logins que já existem no banco
+        antes = time.perf_counter()
+        existentes = set(Usuario.objects.filter(
+            login__in=[dados['login'] for dados in lote]
+        ).values_list('login', flat=True))
+        for dados in lote:
+            if dados['login'] in existentes:
+                self.rejeitados.append((dados['linha'], dados['login'], "Login já cadastrado."))
+        lote = [dados for dados in lote if dados['login'] not in existentes]
+        self.tempos['consulta de logins existentes'] += time.perf_counter() - antes
+
+        # 2. Hash das senhas em paralelo (linhas sem senha ficam com senha inutilizável)
+        antes = time.perf_counter()
+        senhas = [dados['senha'] or None for dados in lote]
+        hashes = list(pool.map(make_password, senhas, chunksize=max(1, len(senhas) // (processos * 4))))
+        self.tempos['hash de senhas'] += time.perf_counter() - antes
+
+        # 3. Um INSERT em lote
+        antes = time.perf_counter()
+        Usuario.objects.bulk_create([
+            Usuario(
+                nome=dados['nome'],
+                telefone=dados['telefone'],
+                instituicao_ensino=dados['instituicao_ensino'],
+                login=dados['login'],
+                perfil=dados['perfil'],
+                password=senha_hash,
+                is_active=self.ativos,
+            )
+            for dados, senha_hash in zip(lote, hashes)
+        ], batch_size=len(lote) or None)
+        self.tempos['inserção'] += time.perf_counter() - antes
+        self.importados += len(lote)
+
+    def relatorio(self, total):
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.importados} usuário(s) importado(s) e {len(self.rejeitados)} linha(s) rejeitada(s) "
+            f"em {total:.2f}s ({self.importados / total if total else 0:.1f} usuários/s)."
+        ))
+        for etapa, segundos in self.tempos.items():
+            self.stdout.write(f"  {etapa:<32} {segundos:8.2f}s")
+        for numero, login, motivo in self.rejeitados[:20]:
+            self.stdout.write(self.style.WARNING(f"  linha {numero} ({login or '-'}): {motivo}"))
+        if len(self.rejeitados) > 20:
+            self.stdout.write(self.style.WARNING(f"  ... e mais {len(self.rejeitados) - 20} linha(s) rejeitada(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from sgea_app.estatisticas import TAMANHO_LOTE, reconstruir
+
+
+class Command(BaseCommand):
+    """
+    Refaz as tabelas de resumo das estatísticas a partir das inscrições. Necessário após
+    cargas com bulk_create, exclusões pelo admin ou de usuários (que não passam pelo
+    InscricaoManager) e na primeira implantação, para contar as inscrições já existentes.
+    """
+    help = "Recalcula as tabelas de resumo das estatísticas dos eventos a partir das inscrições."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Alias do banco.")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Linhas de resumo por bulk_create.")
+
+    def handle(self, *args, **options):
+        resultado = reconstruir(options['database'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Estatísticas recalculadas para {resultado.eventos} evento(s): {resultado.linhas_publico} linha(s) "
+            f"de público e {resultado.linhas_diarias} dia(s) em {resultado.segundos:.2f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from sgea_app.models import Evento, Inscricao
+
+
+class Command(BaseCommand):
+    """
+    Recalcula o contador 'vagas_ocupadas' de todos os eventos a partir das inscrições.
+    Útil para bancos criados antes do contador existir ou após ajustes manuais.
+    """
+    help = "Recalcula o contador de vagas ocupadas de cada evento a partir das inscrições."
+
+    def handle(self, *args, **options):
+        # Um único UPDATE com subconsulta correlacionada, sem carregar eventos em memória
+        total_por_evento = Inscricao.objects.filter(
+            evento=OuterRef('pk')
+        ).order_by().values('evento').annotate(total=Count('pk')).values('total')
+
+        atualizados = Evento.objects.update(
+            vagas_ocupadas=Coalesce(Subquery(total_por_evento), Value(0)),
+            atualizado_em=timezone.now(),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Contador de vagas recalculado para {atualizados} evento(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from sgea_app import busca
+from sgea_app.models import Evento
+
+
+class Command(BaseCommand):
+    """
+    Recria o índice de busca textual a partir da tabela de eventos. Necessário após
+    cargas com bulk_create ou update() em massa, que não disparam os sinais de Evento.
+    """
+    help = "Recria o índice de busca textual dos eventos (FTS5 no SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Alias do banco.")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        busca.preparar_indice(using)
+        with transaction.atomic(using=using):
+            busca.reconstruir_indice(using)
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice de busca recriado: {Evento.objects.using(using).count()} evento(s)."
+        ))
@@ -1,4 +1,28 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, OuterRef, Subquery
+from django.utils import timezone
+
+from . import notificacoes
+
+
+def _estatisticas():
+    # Importação tardia: estatisticas.py usa os modelos, que importam este módulo
+    from . import estatisticas
+    return estatisticas
+
+
+# --- Exceções de Inscrição ---
+
+class InscricaoNegada(Exception):
+    """ Inscrição recusada por alguma Regra de Negócio. A mensagem é exibida ao usuário. """
+
+class InscricaoDuplicada(InscricaoNegada):
+    """ O usuário já está inscrito no evento. """
+
+class VagasEsgotadas(InscricaoNegada):
+    """ O evento atingiu o limite de participantes. """
+
 
 class UsuarioManager(BaseUserManager):
     """Gerenciador de modelos para o modelo Usuario."""
@@ -31,4 +55,302 @@ class UsuarioManager(BaseUserManager):
         if extra_fields.get('is_superuser') is not True:
             raise ValueError('Superuser must have is_superuser=True.')
         
-        return self.create_user(login, senha, **extra_fields)
\ No newline at end of file
+        return self.create_user(login, senha, **extra_fields)
+
+
+class EventoQuerySet(models.QuerySet):
+    """ Consultas reutilizáveis sobre eventos. """
+
+    def com_vagas_restantes(self):
+        """
+        Anota 'vagas_restantes' a partir do contador desnormalizado. O cálculo é feito
+        pelo banco na mesma consulta da listagem, sem um COUNT por evento.
+        """
+        return self.annotate(
+            vagas_restantes=F('quantidade_participantes') - F('vagas_ocupadas')
+        )
+
+    def com_vagas_disponiveis(self):
+        """ Mantém apenas eventos que ainda têm vagas (filtro aplicado no SQL). """
+        return self.filter(vagas_ocupadas__lt=F('quantidade_participantes'))
+
+
+class EventoManager(models.Manager.from_queryset(EventoQuerySet)):
+    """
+    Gerenciador do modelo Evento. Mantém o contador desnormalizado 'vagas_ocupadas'
+    com UPDATEs condicionais, sem precisar de COUNT sobre as inscrições.
+    """
+
+    def reservar_vaga(self, evento_id, quantidade=1):
+        """
+        Ocupa 'quantidade' vagas do evento. O UPDATE só afeta a linha se ainda houver
+        vagas suficientes, então requisições concorrentes nunca ultrapassam o limite.
+        Retorna False se o evento não tiver vagas suficientes.
+        """
+        atualizados = self.filter(
+            pk=evento_id,
+            vagas_ocupadas__lte=F('quantidade_participantes') - quantidade,
+        ).update(vagas_ocupadas=F('vagas_ocupadas') + quantidade, atualizado_em=timezone.now())
+        return atualizados == 1
+
+    def liberar_vaga(self, evento_id):
+        """ Devolve uma vaga ao evento (nunca deixa o contador negativo). """
+        atualizados = self.filter(
+            pk=evento_id,
+            vagas_ocupadas__gt=0,
+        ).update(vagas_ocupadas=F('vagas_ocupadas') - 1, atualizado_em=timezone.now())
+        return atualizados == 1
+
+
+class InscricaoManager(models.Manager):
+    """
+    Gerenciador do modelo Inscricao. Concentra as Regras de Negócio de inscrição
+    e cancelamento para que todas as rotas usem o mesmo fluxo transacional.
+    """
+
+    def inscrever(self, usuario, evento):
+        """
+        Inscreve o usuário no evento, reservando a vaga na mesma transação.
+        Levanta InscricaoNegada (ou uma subclasse) se a inscrição não for permitida.
+        """
+        # 1. Restrição de Acesso (Apenas Aluno/Professor)
+        if usuario.perfil not in ['Aluno', 'Professor']:
+            raise InscricaoNegada("Apenas usuários com perfil Aluno ou Professor podem se inscrever em eventos.")
+
+        # 2. Só permite inscrição em eventos futuros
+        if evento.data_inicial < timezone.now().date():
+            raise InscricaoNegada(f"Não é possível se inscrever no evento '{evento.nome}', pois ele já começou ou terminou.")
+
+        Evento = self.model._meta.get_field('evento').related_model
+        try:
+            with transaction.atomic(using=self.db):
+                # 3. O INSERT vem primeiro: a restrição unique_together detecta a
+                # inscrição duplicada sem um SELECT prévio.
+                inscricao = self.create(usuario=usuario, evento=evento)
+
+                # 4. Reserva a vaga; se o evento lotou, o rollback desfaz o INSERT.
+                if not Evento.objects.reservar_vaga(evento.pk):
+                    raise VagasEsgotadas(f"O evento '{evento.nome}' atingiu o limite de vagas.")
+
+                # 5. Contadores das estatísticas, na mesma transação
+                _estatisticas().registrar_inscricao(inscricao, usuario, using=self.db)
+        except IntegrityError:
+            raise InscricaoDuplicada(f"Você já está inscrito no evento '{evento.nome}'.")
+
+        return inscricao
+
+    def cancelar(self, usuario, evento):
+        """
+        Remove a inscrição do usuário e libera a vaga na mesma transação.
+        Retorna False se o usuário não estava inscrito.
+        """
+        Evento = self.model._meta.get_field('evento').related_model
+        ListaEspera = Evento._meta.get_field('lista_espera').related_model
+        Certificado = self.model._meta.get_field('certificado').related_model
+        with transaction.atomic(using=self.db):
+            # Os campos usados pelas estatísticas e pelos sinais são lidos antes da remoção
+            inscricao = self.filter(usuario=usuario, evento=evento).only(
+                'evento', 'usuario', 'presenca_confirmada', 'inscrito_em',
+            ).first()
+            if inscricao is None:
+                return False
+            # Removida pela instância: o Django não precisa buscar a linha de novo para
+            # os sinais, e o certificado sai com um único DELETE
+            _, removidas = inscricao.delete(using=self.db)
+            if not removidas.get(self.model._meta.label):
+                return False  # outra requisição cancelou primeiro
+            Evento.objects.liberar_vaga(evento.pk)
+            _estatisticas().registrar_cancelamento(
+                inscricao, usuario, certificados=removidas.get(Certificado._meta.label, 0), using=self.db,
+            )
+            # A vaga liberada vai para o primeiro da lista de espera, antes do commit:
+            # nenhuma outra inscrição consegue ocupá-la no intervalo.
+            ListaEspera.objects.promover(evento)
+        return True
+
+    def _confirmar_presenca(self, evento, ids=None):
+        inscricoes = self.filter(evento=evento, presenca_confirmada=False)
+        if ids is not None:
+            inscricoes = inscricoes.filter(pk__in=ids)
+        return inscricoes.update(presenca_confirmada=True, atualizado_em=timezone.now())
+
+    def confirmar_presenca(self, evento, ids=None):
+        """
+        Confirma a presença de várias inscrições do evento com um único UPDATE.
+        Se 'ids' for None, confirma todas as inscrições do evento.
+        As estatísticas do evento são recalculadas uma vez, na mesma transação.
+        Retorna a quantidade de inscrições alteradas.
+        """
+        with transaction.atomic(using=self.db):
+            confirmadas = self._confirmar_presenca(evento, ids)
+            if confirmadas:
+                _estatisticas().recalcular_evento(evento.pk, using=self.db)
+        return confirmadas
+
+    def confirmar_checkin(self, inscricao_id, evento_id, organizador):
+        """
+        Confirma a presença lida no check-in com um único UPDATE condicional.
+        Só altera a linha se a inscrição for do evento, o evento for do organizador
+        e a presença ainda não estiver confirmada, então ler o mesmo código duas
+        vezes é seguro. Retorna True se a presença foi confirmada agora.
+        """
+        with transaction.atomic(using=self.db):
+            confirmada = self.filter(
+                pk=inscricao_id,
+                evento_id=evento_id,
+                evento__organizador=organizador,
+                presenca_confirmada=False,
+            ).update(presenca_confirmada=True, atualizado_em=timezone.now()) == 1
+            if confirmada:
+                _estatisticas().registrar_presenca(inscricao_id, using=self.db)
+        return confirmada
+
+    def confirmar_presenca_por_login(self, evento, logins, tamanho_lote=500):
+        """
+        Confirma a presença a partir de uma sequência (pode ser um gerador) de logins.
+        Os logins são processados em lotes: uma busca indexada por (login, evento) e um
+        UPDATE por lote; as estatísticas do evento são recalculadas uma vez, no final.
+        Retorna (quantidade_confirmada, logins_nao_encontrados).
+        """
+        confirmadas = 0
+        nao_encontrados = []
+
+        def processar(lote):
+            encontrados = dict(self.filter(
+                evento=evento, usuario__login__in=lote
+            ).values_list('usuario__login', 'pk'))
+            nao_encontrados.extend(login for login in lote if login not in encontrados)
+            return self._confirmar_presenca(evento, ids=list(encontrados.values()))
+
+        lote = []
+        for login in logins:
+            lote.append(login)
+            if len(lote) >= tamanho_lote:
+                confirmadas += processar(lote)
+                lote = []
+        if lote:
+            confirmadas += processar(lote)
+
+        if confirmadas:
+            _estatisticas().recalcular_evento(evento.pk, using=self.db)
+        return confirmadas, nao_encontrados
+
+
+class ListaEsperaQuerySet(models.QuerySet):
+
+    def com_posicao(self):
+        """ Anota 'posicao' (1 = próximo a ser promovido), contando no índice (evento, id). """
+        anteriores = self.model.objects.filter(
+            evento=OuterRef('evento'), pk__lte=OuterRef('pk')
+        ).order_by().values('evento').annotate(total=Count('pk')).values('total')
+        return self.annotate(posicao=Subquery(anteriores))
+
+
+class ListaEsperaManager(models.Manager.from_queryset(ListaEsperaQuerySet)):
+    """
+    Gerenciador da lista de espera (FIFO por evento). A promoção acontece dentro da
+    transação do cancelamento (InscricaoManager.cancelar) ou da alteração do limite de
+    vagas, com as mesmas Regras de Negócio de InscricaoManager.inscrever.
+    """
+
+    def entrar(self, usuario, evento):
+        """
+        Coloca o usuário no fim da fila do evento (se ainda não estiver nela) e retorna
+        sua posição, ou None se ele foi promovido na hora porque uma vaga acabou de ser
+        liberada. Levanta InscricaoNegada nos mesmos casos de uma inscrição.
+        """
+        Evento = self.model._meta.get_field('evento').related_model
+        Inscricao = Evento._meta.get_field('inscricoes').related_model
+
+        # 1. Mesmas restrições da inscrição (perfil, data e duplicidade)
+        if usuario.perfil not in ['Aluno', 'Professor']:
+            raise InscricaoNegada("Apenas usuários com perfil Aluno ou Professor podem entrar na lista de espera.")
+        if evento.data_inicial < timezone.now().date():
+            raise InscricaoNegada(f"Não é possível entrar na lista de espera do evento '{evento.nome}', pois ele já começou ou terminou.")
+        if Inscricao.objects.filter(usuario=usuario, evento=evento).exists():
+            raise InscricaoDuplicada(f"Você já está inscrito no evento '{evento.nome}'.")
+
+        with transaction.atomic(using=self.db):
+            # 2. O INSERT vem primeiro: a restrição unique_together detecta quem já está na fila
+            try:
+                with transaction.atomic(using=self.db):
+                    entrada = self.create(usuario=usuario, evento=evento)
+            except IntegrityError:
+                entrada = self.get(usuario=usuario, evento=evento)
+
+            # 3. Uma vaga pode ter sido liberada depois que a inscrição foi recusada
+            if Evento.objects.filter(pk=evento.pk).com_vagas_disponiveis().exists():
+                self.promover(evento)
+            return self.com_posicao().filter(pk=entrada.pk).values_list('posicao', flat=True).first()
+
+    def sair(self, usuario, evento):
+        """ Remove o usuário da fila do evento. Retorna False se ele não estava nela. """
+        removidas, _ = self.filter(usuario=usuario, evento=evento).delete()
+        return removidas > 0
+
+    def promover(self, evento, maximo=1):
+        """
+        Inscreve os primeiros da fila nas vagas livres (no máximo 'maximo'; None para
+        preencher todas, como após um aumento do limite), dentro da transação de quem
+        chamou, e coloca o aviso aos promovidos na caixa de saída.
+
+        A promoção é feita em lote, com o mesmo número de consultas para um ou para cem
+        promovidos: os primeiros da fila vêm de uma consulta ordenada no índice
+        (evento, id) e as vagas, a saída da fila, as inscrições e as estatísticas são
+        gravadas com um comando cada. No PostgreSQL, o FOR UPDATE SKIP LOCKED faz
+        promoções simultâneas escolherem pessoas diferentes; no SQLite, o BEGIN IMMEDIATE
+        já serializa as transações de escrita. Retorna as inscrições criadas.
+        """
+        Evento = self.model._meta.get_field('evento').related_model
+        Inscricao = Evento._meta.get_field('inscricoes').related_model
+        if evento.data_inicial < timezone.now().date():
+            return []
+
+        promovidas = []
+        # Sem savepoint próprio: dentro do cancelamento, basta a transação de quem chamou
+        with transaction.atomic(using=self.db, savepoint=False):
+            # 1. Para preencher todas as vagas, elas são lidas com a linha do evento travada
+            # até o fim da transação. Com 'maximo' (1 após um cancelamento), a reserva
+            # condicional do passo 4 basta para não ultrapassar o limite.
+            limite = maximo
+            if maximo is None:
+                limite = Evento.objects.select_for_update().filter(pk=evento.pk).com_vagas_restantes().values_list(
+                    'vagas_restantes', flat=True,
+                ).first() or 0
+
+            while len(promovidas) < limite:
+                # 2. Os primeiros da fila (posições travadas por outra promoção são puladas)
+                candidatos = list(self.select_for_update(skip_locked=True, of=('self',)).filter(
+                    evento=evento
+                ).select_related('usuario').order_by('pk')[:limite - len(promovidas)])
+                if not candidatos:
+                    break
+
+                # 3. Quem já se inscreveu por outro caminho ou não pode mais se inscrever
+                # apenas sai da fila
+                inscritos = set(Inscricao.objects.filter(
+                    evento=evento, usuario_id__in=[candidato.usuario_id for candidato in candidatos],
+                ).values_list('usuario_id', flat=True))
+                novas = [
+                    Inscricao(usuario=candidato.usuario, evento=evento) for candidato in candidatos
+                    if candidato.usuario.perfil in ['Aluno', 'Professor'] and candidato.usuario_id not in inscritos
+                ]
+
+                # 4. As vagas são reservadas antes de qualquer alteração na fila: se faltarem,
+                # todos continuam nela
+                if novas and not Evento.objects.reservar_vaga(evento.pk, len(novas)):
+                    break
+                self.filter(pk__in=[candidato.pk for candidato in candidatos]).delete()
+                promovidas += Inscricao.objects.bulk_create(novas)
+
+            if promovidas:
+                _estatisticas().registrar_inscricoes(promovidas, using=self.db)
+                # bulk_create não envia post_save: as invalidações de cache de signals.py
+                # (vagas do evento e inscrições de cada usuário) são disparadas aqui
+                for inscricao in promovidas:
+                    models.signals.post_save.send(
+                        sender=Inscricao, instance=inscricao, created=True, update_fields=None, raw=False, using=self.db,
+                    )
+                # O aviso entra na caixa de saída na mesma transação da promoção
+                notificacoes.avisar_promocoes(promovidas, evento)
+        return promovidas
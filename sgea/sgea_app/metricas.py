@@ -0,0 +1,231 @@
+"""
+Instrumentação por requisição: consultas SQL, tempo de banco, tempo de template e
+tempo de resposta, agregados por view (nome da rota em urls.py).
+
+- As consultas são medidas por um execute_wrapper instalado em toda conexão criada
+  (sinal connection_created). Fora de uma requisição medida ele só faz um ContextVar.get().
+- O tempo de template vem do backend DjangoTemplatesMedidos (settings.TEMPLATES).
+- Os totais ficam em memória, por processo, e são expostos em /metricas/ no formato
+  texto do Prometheus; cada resposta também recebe o cabeçalho Server-Timing.
+- Requisições com mais de SGEA_LIMITE_CONSULTAS consultas têm o SQL registrado no log.
+
+Respostas em streaming são medidas até a view retornar (o corpo é gerado depois).
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Limites dos buckets do histograma de tempo de resposta, em segundos
+BUCKETS_RESPOSTA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Views que não entram nas métricas (a própria coleta do Prometheus)
+VIEWS_IGNORADAS = {'metricas'}
+
+
+class Medicao:
+    """ Contadores da requisição em andamento. """
+
+    def __init__(self, guardar_sql=False):
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.tempo_template = 0.0
+        self.renderizando = False
+        self.sqls = [] if guardar_sql else None
+
+
+_medicao = ContextVar('sgea_medicao', default=None)
+
+
+def medicao_atual():
+    return _medicao.get()
+
+
+# --- Consultas SQL ---
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.tempo_banco += time.perf_counter() - inicio
+        medicao.consultas += 1
+        if medicao.sqls is not None:
+            medicao.sqls.append(sql)
+
+
+@receiver(connection_created)
+def instalar_medidor(sender, connection, **kwargs):
+    """
+    Instala o medidor em cada conexão (de qualquer alias e thread), inclusive nas threads
+    do ORM assíncrono. O mesmo objeto de conexão pode reconectar: o medidor entra uma vez só.
+    """
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+# --- Templates ---
+
+class TemplateMedido(Template):
+
+    def render(self, context=None, request=None):
+        medicao = _medicao.get()
+        # Templates renderizados dentro de outro (ex.: render_to_string em uma tag) não contam duas vezes
+        if medicao is None or medicao.renderizando:
+            return super().render(context, request)
+        medicao.renderizando = True
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicao.tempo_template += time.perf_counter() - inicio
+            medicao.renderizando = False
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """ Backend de templates do Django que mede o tempo de renderização da requisição. """
+
+    def from_string(self, template_code):
+        return TemplateMedido(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateMedido(super().get_template(template_name).template, self)
+
+
+# --- Agregação por view ---
+
+class _TotaisDaView:
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.tempo_template = 0.0
+        self.tempo_resposta = 0.0
+        self.buckets = [0] * len(BUCKETS_RESPOSTA)
+
+
+_totais = {}
+_trava = threading.Lock()
+
+
+def registrar(view, medicao, tempo_resposta):
+    with _trava:
+        totais = _totais.get(view)
+        if totais is None:
+            totais = _totais[view] = _TotaisDaView()
+        totais.requisicoes += 1
+        totais.consultas += medicao.consultas
+        totais.tempo_banco += medicao.tempo_banco
+        totais.tempo_template += medicao.tempo_template
+        totais.tempo_resposta += tempo_resposta
+        for i, limite in enumerate(BUCKETS_RESPOSTA):
+            if tempo_resposta <= limite:
+                totais.buckets[i] += 1
+
+
+def zerar():
+    with _trava:
+        _totais.clear()
+
+
+def texto_prometheus():
+    """ Totais no formato de exposição em texto do Prometheus. """
+    with _trava:
+        views = sorted(_totais.items())
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valor):
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            for view, totais in views:
+                linhas.append(f'{nome}{{view="{view}"}} {valor(totais)}')
+
+        metrica('sgea_requisicoes_total', 'counter', 'Requisições atendidas.', lambda t: t.requisicoes)
+        metrica('sgea_consultas_sql_total', 'counter', 'Consultas SQL executadas.', lambda t: t.consultas)
+        metrica('sgea_tempo_banco_segundos_total', 'counter', 'Tempo gasto em consultas SQL.', lambda t: f'{t.tempo_banco:.6f}')
+        metrica('sgea_tempo_template_segundos_total', 'counter', 'Tempo gasto renderizando templates.', lambda t: f'{t.tempo_template:.6f}')
+
+        nome = 'sgea_tempo_resposta_segundos'
+        linhas.append(f'# HELP {nome} Tempo de resposta da view.')
+        linhas.append(f'# TYPE {nome} histogram')
+        for view, totais in views:
+            for limite, quantidade in zip(BUCKETS_RESPOSTA, totais.buckets):
+                linhas.append(f'{nome}_bucket{{view="{view}",le="{limite}"}} {quantidade}')
+            linhas.append(f'{nome}_bucket{{view="{view}",le="+Inf"}} {totais.requisicoes}')
+            linhas.append(f'{nome}_sum{{view="{view}"}} {totais.tempo_resposta:.6f}')
+            linhas.append(f'{nome}_count{{view="{view}"}} {totais.requisicoes}')
+    return '\n'.join(linhas) + '\n'
+
+
+# --- Middleware ---
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição e agrega os números pela view atendida. Deve ser o primeiro
+    middleware, para que o tempo de resposta inclua os demais. Funciona em WSGI e em ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicao, token, inicio = self._iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self._finalizar(request, response, medicao, inicio)
+
+    async def __acall__(self, request):
+        medicao, token, inicio = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self._finalizar(request, response, medicao, inicio)
+
+    def _iniciar(self):
+        medicao = Medicao(guardar_sql=settings.SGEA_LIMITE_CONSULTAS is not None)
+        return medicao, _medicao.set(medicao), time.perf_counter()
+
+    def _finalizar(self, request, response, medicao, inicio):
+        tempo_resposta = time.perf_counter() - inicio
+        rota = getattr(request, 'resolver_match', None)
+        view = rota.view_name if rota else 'nao_encontrada'
+        if view in VIEWS_IGNORADAS:
+            return response
+
+        registrar(view, medicao, tempo_resposta)
+
+        limite = settings.SGEA_LIMITE_CONSULTAS
+        if limite is not None and medicao.consultas > limite:
+            logger.warning(
+                "%s (%s %s) executou %d consultas SQL (limite: %d):\n%s",
+                view, request.method, request.path, medicao.consultas, limite, '\n'.join(medicao.sqls),
+            )
+
+        if settings.SGEA_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={medicao.tempo_banco * 1000:.1f};desc="{medicao.consultas} consultas", '
+                f'tpl;dur={medicao.tempo_template * 1000:.1f}, '
+                f'total;dur={tempo_resposta * 1000:.1f}'
+            )
+        return response
@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from .managers import UsuarioManager 
+from .managers import UsuarioManager, EventoManager, InscricaoManager, ListaEsperaManager
+from .checkin import gerar_token_checkin
 from django.utils import timezone
 
 class Usuario(AbstractBaseUser, PermissionsMixin):
@@ -37,6 +38,10 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
+        indexes = [
+            # Dropdown de Professor Responsável do FormularioEvento (perfil='Professor')
+            models.Index(fields=['perfil'], name='usuario_perfil_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -71,55 +76,196 @@ class Evento(models.Model):
     # [cite_start]Requisito de Banner[cite: 34]:
     # Usamos ImageField para lidar com o upload e validação de imagem.
     banner = models.ImageField(upload_to='eventos/banners/', null=True, blank=True, verbose_name="Banner do Evento")
+    # Larguras das miniaturas já geradas para o banner atual (banners.py); vazia enquanto
+    # a geração não termina, e os templates usam o original.
+    banner_larguras = models.JSONField(default=list, blank=True, editable=False)
     
     # [cite_start]Quantidade de Participantes é o limite de vagas[cite: 92].
     quantidade_participantes = models.IntegerField(verbose_name="Limite de Participantes")
 
+    # Contador desnormalizado de inscrições, mantido pelo EventoManager com UPDATE condicional.
+    # Evita um COUNT sobre Inscricao a cada tentativa de inscrição.
+    vagas_ocupadas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Vagas Ocupadas")
+
     # Requisito 'nome' do Evento não está no diagrama, mas é crucial.
     nome = models.CharField(max_length=100, verbose_name="Nome do Evento", default='Novo Evento') 
 
+    # Estado da emissão automática de certificados (comando emitir_certificados --encerrados).
+    # Um processo "reserva" o evento com um UPDATE condicional antes de emitir; a reserva
+    # expira se o processo morrer, e outro processo pode retomá-la.
+    EMISSAO_CHOICES = [
+        ('Aguardando', 'Aguardando'),
+        ('Em Processamento', 'Em Processamento'),
+        ('Emitidos', 'Emitidos'),
+    ]
+    emissao_status = models.CharField(max_length=20, choices=EMISSAO_CHOICES, default='Aguardando', editable=False, verbose_name="Emissão de Certificados")
+    emissao_reservada_por = models.CharField(max_length=100, blank=True, editable=False)
+    emissao_reservada_em = models.DateTimeField(null=True, blank=True, editable=False)
+    certificados_emitidos_em = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Certificados Emitidos em")
+
+    # Última alteração dos dados publicados (feeds ICS e catálogo JSON): save() e os UPDATEs
+    # do EventoManager. Base do ETag/Last-Modified dessas rotas (versoes.py).
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    objects = EventoManager()
+
+    # Colunas mantidas apenas por UPDATEs condicionais (EventoManager, a reserva da emissão
+    # em certificados.py e as miniaturas do banner em banners.py). Um save() sem update_fields (formulários, API, admin) grava as
+    # demais colunas: a instância foi lida no início da requisição, e o valor antigo
+    # desfaria as reservas feitas desde então.
+    CAMPOS_DE_ESTADO = (
+        'vagas_ocupadas', 'banner_larguras',
+        'emissao_status', 'emissao_reservada_por', 'emissao_reservada_em', 'certificados_emitidos_em',
+    )
+
     class Meta:
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
+        indexes = [
+            # Catálogo público: data_inicial > hoje, paginado por (data_inicial, id)
+            models.Index(fields=['data_inicial', 'id'], name='evento_catalogo_idx'),
+            # Dashboard do Organizador: eventos do organizador ordenados por data
+            models.Index(fields=['organizador', 'data_inicial'], name='evento_organizador_data_idx'),
+            # Emissão automática: eventos ainda não processados cuja data final já passou
+            models.Index(fields=['emissao_status', 'data_final'], name='evento_emissao_idx'),
+            # Versão do catálogo (MAX(atualizado_em) dos eventos futuros) lida só do índice
+            models.Index(fields=['data_inicial', 'atualizado_em'], name='evento_atualizacao_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Na inserção todas as colunas são gravadas (o contador começa em zero)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_DE_ESTADO
+            ]
+        super().save(*args, **kwargs)
 
     def esta_encerrado(self):
         """ Verifica se a data final do evento já passou. """
         return self.data_final < timezone.now().date()
         
     def status_certificado(self):
-        """ Determina o status dos certificados baseado na data final. """
+        """ Determina o status dos certificados a partir do estado gravado pela emissão automática. """
+        if self.emissao_status == 'Emitidos':
+            return 'Emitidos'
+        if self.emissao_status == 'Em Processamento':
+            return 'Em Emissão'
         if not self.esta_encerrado():
             return 'Pendente (Evento Ativo)'
         
-        # O certificado é gerado após a data de término.
-        # Se o evento está encerrado, o status é "Pronto para Emissão".
-        # Uma lógica mais robusta checaria se a automação já rodou.
+        # O certificado é gerado após a data de término: o evento aguarda a próxima
+        # execução da emissão automática (ou a emissão manual pelo organizador).
         return 'Pronto para Emissão'
 
+    # Atributos das miniaturas do banner para os templates (<picture> com srcset)
+    def srcset_banner_webp(self):
+        from .banners import srcset
+        return srcset(self.banner.name, self.banner_larguras, 'webp')
+
+    def srcset_banner_jpg(self):
+        from .banners import srcset
+        return srcset(self.banner.name, self.banner_larguras, 'jpg')
+
+    def url_miniatura_banner(self):
+        """ Menor miniatura em JPEG, para navegadores sem suporte a srcset. """
+        from .banners import url_miniatura
+        return url_miniatura(self.banner.name, self.banner_larguras[0], 'jpg')
+
     def __str__(self):
         return self.nome
 
+class CampoBuscaTextual(models.TextField):
+    """ Coluna oculta do FTS5 que tem o nome da tabela: 'tabela MATCH consulta' busca em todas as colunas. """
+
+@CampoBuscaTextual.register_lookup
+class Corresponde(models.Lookup):
+    lookup_name = 'corresponde'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+class EventoBusca(models.Model):
+    """
+    Índice de busca textual dos eventos no SQLite: tabela virtual FTS5 com o nome, o local
+    e o tipo de cada evento (rowid = id do Evento). Não é criada por migração: busca.py a
+    cria no post_migrate e a mantém pelos sinais. Serve apenas para o JOIN da busca
+    (Evento.objects.filter(busca__documento__corresponde=...)); no PostgreSQL não é usada.
+    """
+    evento = models.OneToOneField(Evento, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='busca')
+    documento = CampoBuscaTextual(db_column='sgea_app_evento_busca')
+    # Coluna oculta 'rank' do FTS5: bm25 com pesos por coluna (menor = mais relevante)
+    relevancia = models.FloatField(db_column='rank')
+
+    class Meta:
+        managed = False
+        db_table = 'sgea_app_evento_busca'
+
 class Inscricao(models.Model):
     """
     Modelo de ligação entre Usuário e Evento.
     Representa a inscrição de um Usuário em um Evento.
     """
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='inscricoes')
-    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='inscricoes')
+    # Sem índice próprio: o índice composto (evento, presenca_confirmada) do Meta já
+    # atende às buscas por evento, e assim o SQLite não escolhe o índice mais fraco.
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='inscricoes', db_index=False)
     
     # [cite_start]Campo adicionado para a Regra de Emissão de Certificados[cite: 58]:
     # A emissão de certificados ocorre após a presença ser confirmada.
     presenca_confirmada = models.BooleanField(default=False, verbose_name="Presença Confirmada")
 
+    # Data da inscrição: base da série de inscrições por dia das estatísticas (estatisticas.py)
+    inscrito_em = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Inscrito em")
+
+    # Última alteração (save() e os UPDATEs do InscricaoManager); base do ETag da agenda do usuário
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    objects = InscricaoManager()
+
     class Meta:
         # [cite_start]Garante que um usuário só pode se inscrever uma vez no mesmo evento[cite: 46].
         unique_together = ('usuario', 'evento')
         verbose_name = "Inscrição"
         verbose_name_plural = "Inscrições"
+        indexes = [
+            # Emissão de certificados e lista de presença: inscrições do evento por presença
+            models.Index(fields=['evento', 'presenca_confirmada'], name='inscricao_presenca_idx'),
+        ]
+
+    def token_checkin(self):
+        """ Código assinado de check-in desta inscrição (conteúdo do QR Code). """
+        return gerar_token_checkin(self.pk, self.evento_id)
 
     def __str__(self):
         return f"{self.usuario.nome} inscrito em {self.evento.nome}"
 
+class ListaEspera(models.Model):
+    """
+    Posição de um usuário na lista de espera (FIFO) de um evento lotado. A ordem da
+    fila é a do ID: quem entrou primeiro é promovido primeiro quando uma vaga é liberada.
+    """
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='listas_espera')
+    # Sem índice próprio: o índice (evento, id) do Meta atende às buscas por evento
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='lista_espera', db_index=False)
+    entrou_em = models.DateTimeField(default=timezone.now, verbose_name="Entrou na Fila em")
+
+    objects = ListaEsperaManager()
+
+    class Meta:
+        unique_together = ('usuario', 'evento')
+        verbose_name = "Lista de Espera"
+        verbose_name_plural = "Listas de Espera"
+        indexes = [
+            # Primeiro da fila (promoção) e posição na fila: uma busca ordenada no índice
+            models.Index(fields=['evento', 'id'], name='espera_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario.nome} na lista de espera de {self.evento.nome}"
+
 class Certificado(models.Model):
     """
     Modelo para armazenar os certificados emitidos.
@@ -145,4 +291,136 @@ class Certificado(models.Model):
         verbose_name_plural = "Certificados"
 
     def __str__(self):
-        return f"Certificado para {self.inscricao.usuario.nome} - Status: {self.status_emissao}"
\ No newline at end of file
+        return f"Certificado para {self.inscricao.usuario.nome} - Status: {self.status_emissao}"
+
+
+# --- Estatísticas (tabelas de resumo) ---
+# Contadores por evento mantidos pelo InscricaoManager e pela emissão de certificados
+# (estatisticas.py), para que as páginas de estatísticas não agreguem as inscrições.
+
+class EstatisticaEvento(models.Model):
+    """ Totais do evento: inscrições, presenças confirmadas e certificados emitidos. """
+    evento = models.OneToOneField(Evento, on_delete=models.CASCADE, primary_key=True, related_name='estatistica')
+    inscricoes = models.IntegerField(default=0, verbose_name="Inscrições")
+    presencas = models.IntegerField(default=0, verbose_name="Presenças")
+    certificados = models.IntegerField(default=0, verbose_name="Certificados")
+
+    class Meta:
+        verbose_name = "Estatística de Evento"
+        verbose_name_plural = "Estatísticas de Eventos"
+
+    def __str__(self):
+        return f"Estatísticas de {self.evento_id}"
+
+class EstatisticaPublico(models.Model):
+    """ Totais do evento por perfil e instituição de ensino dos inscritos. """
+    # Sem índice próprio: a restrição única (evento, perfil, instituicao_ensino) atende às buscas por evento
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='estatisticas_publico', db_index=False)
+    perfil = models.CharField(max_length=50, verbose_name="Perfil")
+    instituicao_ensino = models.CharField(max_length=50, verbose_name="Instituição de Ensino")
+    inscricoes = models.IntegerField(default=0, verbose_name="Inscrições")
+    presencas = models.IntegerField(default=0, verbose_name="Presenças")
+    certificados = models.IntegerField(default=0, verbose_name="Certificados")
+
+    class Meta:
+        verbose_name = "Estatística de Público"
+        verbose_name_plural = "Estatísticas de Público"
+        constraints = [
+            # Chave do ON CONFLICT dos incrementos (estatisticas.py)
+            models.UniqueConstraint(fields=['evento', 'perfil', 'instituicao_ensino'], name='estatistica_publico_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.perfil} / {self.instituicao_ensino} em {self.evento_id}"
+
+class EstatisticaDiaria(models.Model):
+    """ Inscrições ativas do evento pelo dia em que foram feitas (um cancelamento desconta do seu dia). """
+    # Sem índice próprio: a restrição única (evento, dia) atende às buscas por evento
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='estatisticas_diarias', db_index=False)
+    dia = models.DateField(verbose_name="Dia")
+    inscricoes = models.IntegerField(default=0, verbose_name="Inscrições")
+
+    class Meta:
+        verbose_name = "Estatística Diária"
+        verbose_name_plural = "Estatísticas Diárias"
+        constraints = [
+            models.UniqueConstraint(fields=['evento', 'dia'], name='estatistica_diaria_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia:%d/%m/%Y} em {self.evento_id}"
+
+
+class RegistroAuditoria(models.Model):
+    """
+    Registro de auditoria das ações sobre eventos e inscrições.
+    Os registros são gravados em lote por uma thread em segundo plano (ver auditoria.py).
+    """
+    ACAO_CHOICES = [
+        ('criar_evento', 'Criação de Evento'),
+        ('editar_evento', 'Edição de Evento'),
+        ('inscricao', 'Inscrição em Evento'),
+        ('cancelamento', 'Cancelamento de Inscrição'),
+    ]
+
+    # SET_NULL: o histórico é mantido mesmo que o usuário ou o evento sejam removidos
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='registros_auditoria', verbose_name="Usuário")
+    evento = models.ForeignKey(Evento, on_delete=models.SET_NULL, null=True, blank=True, related_name='registros_auditoria', verbose_name="Evento")
+    acao = models.CharField(max_length=50, choices=ACAO_CHOICES, verbose_name="Ação")
+    descricao = models.CharField(max_length=255, blank=True, verbose_name="Descrição")
+    data_hora = models.DateTimeField(default=timezone.now, verbose_name="Data/Hora")
+
+    class Meta:
+        verbose_name = "Registro de Auditoria"
+        verbose_name_plural = "Registros de Auditoria"
+        # Um índice por filtro da tela de auditoria, todos terminando na ordem da paginação
+        indexes = [
+            models.Index(fields=['-data_hora', '-id'], name='auditoria_data_idx'),
+            models.Index(fields=['usuario', '-data_hora', '-id'], name='auditoria_usuario_idx'),
+            models.Index(fields=['evento', '-data_hora', '-id'], name='auditoria_evento_idx'),
+            models.Index(fields=['acao', '-data_hora', '-id'], name='auditoria_acao_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_acao_display()} - {self.data_hora:%d/%m/%Y %H:%M}"
+
+
+class MensagemEmail(models.Model):
+    """
+    Caixa de saída de e-mails (confirmação de cadastro, avisos da lista de espera).
+    A requisição só grava a mensagem, na mesma transação da alteração que a gerou;
+    o comando 'enviar_emails' envia em lotes, com novas tentativas (ver emails.py).
+    """
+    STATUS_CHOICES = [
+        ('Pendente', 'Pendente'),
+        ('Enviando', 'Enviando'),
+        ('Enviada', 'Enviada'),
+        ('Falhou', 'Falhou'),
+    ]
+
+    destinatario = models.CharField(max_length=254, verbose_name="Destinatário")
+    assunto = models.CharField(max_length=200, verbose_name="Assunto")
+    corpo = models.TextField(verbose_name="Corpo")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pendente', verbose_name="Status")
+    criada_em = models.DateTimeField(default=timezone.now, verbose_name="Criada em")
+
+    # Novas tentativas: a mensagem volta à fila em 'proxima_tentativa_em' (espera exponencial)
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now, verbose_name="Próxima Tentativa em")
+    ultimo_erro = models.CharField(max_length=255, blank=True, verbose_name="Último Erro")
+    enviada_em = models.DateTimeField(null=True, blank=True, verbose_name="Enviada em")
+
+    # Reserva do lote pelo processo que envia (mesmo esquema da emissão de certificados)
+    reservada_por = models.CharField(max_length=100, blank=True)
+    reservada_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Mensagem de E-mail"
+        verbose_name_plural = "Mensagens de E-mail"
+        indexes = [
+            # Próximo lote a enviar: mensagens pendentes cuja hora de envio já chegou
+            models.Index(fields=['status', 'proxima_tentativa_em'], name='email_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.assunto} para {self.destinatario} ({self.status})"
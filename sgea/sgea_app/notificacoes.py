@@ -0,0 +1,38 @@
+"""
+Textos dos e-mails enviados pelo sistema. As mensagens vão para a caixa de saída
+(emails.py) na transação de quem chama: só são enviadas se a alteração for confirmada.
+"""
+
+
+def _caixa_de_saida():
+    # Importação tardia: managers.py importa este módulo antes de os modelos existirem
+    from . import emails
+    return emails
+
+
+def avisar_promocoes(inscricoes, evento):
+    """ Avisa os usuários promovidos da lista de espera. """
+    _caixa_de_saida().enfileirar_varias([
+        (
+            inscricao.usuario.login,
+            f"Vaga garantida: {evento.nome}",
+            f"Olá, {inscricao.usuario.nome}!\n\n"
+            f"Uma vaga foi liberada no evento '{evento.nome}', que começa em "
+            f"{evento.data_inicial:%d/%m/%Y}, e você saiu da lista de espera: sua inscrição "
+            "já está confirmada. Caso não possa comparecer, cancele a inscrição no seu "
+            "dashboard para liberar a vaga para o próximo da fila.",
+        )
+        for inscricao in inscricoes
+    ])
+
+
+def confirmar_cadastro(usuario, url_confirmacao):
+    """ Link de confirmação de um novo cadastro (a conta fica inativa até o clique). """
+    _caixa_de_saida().enfileirar(
+        usuario.login,
+        "Confirme seu cadastro no SGEA",
+        f"Olá, {usuario.nome}!\n\n"
+        "Para ativar sua conta no SGEA, acesse o endereço abaixo (válido por 3 dias):\n\n"
+        f"{url_confirmacao}\n\n"
+        "Se você não fez este cadastro, ignore esta mensagem.",
+    )
@@ -0,0 +1,88 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _valor(item, campo):
+    """ Lê o valor de um campo tanto de instâncias de modelo quanto de dicionários (values()). """
+    if isinstance(item, dict):
+        return item[campo]
+    return getattr(item, campo)
+
+
+def codificar_cursor(item, campos):
+    """ Gera o cursor (texto seguro para URL) que aponta para logo depois de 'item'. """
+    valores = [str(_valor(item, campo.lstrip('-'))) for campo in campos]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+def decodificar_cursor(cursor, modelo, campos):
+    """
+    Converte o cursor de volta para os valores tipados de cada campo.
+    Retorna None se o cursor estiver ausente ou corrompido (volta à primeira página).
+    """
+    if not cursor:
+        return None
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(valores) != len(campos):
+            return None
+        return [
+            modelo._meta.get_field(campo.lstrip('-')).to_python(valor)
+            for campo, valor in zip(campos, valores)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def filtro_apos(campos, valores):
+    """
+    Monta a condição "linha vem depois de 'valores'" na ordenação de 'campos'.
+    Para (a, b) crescentes: a > va OR (a = va AND b > vb).
+    """
+    condicao = Q()
+    iguais = Q()
+    for campo, valor in zip(campos, valores):
+        nome = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        condicao |= iguais & Q(**{f'{nome}__{operador}': valor})
+        iguais &= Q(**{nome: valor})
+    return condicao
+
+
+def _consulta_apos_cursor(queryset, campos, cursor):
+    queryset = queryset.order_by(*campos)
+    valores = decodificar_cursor(cursor, queryset.model, campos)
+    if valores is not None:
+        queryset = queryset.filter(filtro_apos(campos, valores))
+    return queryset
+
+
+def _recortar_pagina(itens, campos, tamanho):
+    if len(itens) <= tamanho:
+        return itens, None
+    itens = itens[:tamanho]
+    return itens, codificar_cursor(itens[-1], campos)
+
+
+def paginar_por_chave(queryset, campos, cursor, tamanho):
+    """
+    Paginação por chave (keyset): em vez de OFFSET, a página seguinte começa logo
+    depois da última linha exibida, então o custo de qualquer página é o mesmo,
+    por mais fundo que o usuário navegue. 'campos' deve terminar em uma chave única (ex.: 'id').
+
+    Retorna (itens_da_pagina, cursor_da_proxima_pagina ou None).
+    """
+    queryset = _consulta_apos_cursor(queryset, campos, cursor)
+    # Busca uma linha a mais apenas para saber se existe próxima página
+    itens = list(queryset[:tamanho + 1])
+    return _recortar_pagina(itens, campos, tamanho)
+
+
+async def apaginar_por_chave(queryset, campos, cursor, tamanho):
+    """ Versão assíncrona de paginar_por_chave, para as views async (ORM assíncrono). """
+    queryset = _consulta_apos_cursor(queryset, campos, cursor)
+    itens = [item async for item in queryset[:tamanho + 1]]
+    return _recortar_pagina(itens, campos, tamanho)
@@ -0,0 +1,77 @@
+"""
+Renderização dos certificados em PDF (uma página, texto em Helvetica), sem dependências externas.
+
+Este módulo não importa o Django de propósito: suas funções rodam dentro dos
+processos do ProcessPoolExecutor usado na emissão de certificados, e assim
+funcionam com qualquer método de início de processo (fork ou spawn).
+"""
+
+LARGURA_PAGINA = 842  # A4 paisagem, em pontos
+ALTURA_PAGINA = 595
+
+
+def _escapar(texto):
+    """ Escapa os caracteres especiais de strings PDF e codifica em WinAnsi (cp1252). """
+    texto = texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return texto.encode('cp1252', errors='replace')
+
+
+def gerar_pdf(titulo, linhas):
+    """
+    Monta um PDF de uma página com um título centralizado e as linhas de texto abaixo.
+    Retorna o conteúdo do arquivo em bytes.
+    """
+    conteudo = [b'BT /F1 32 Tf 1 0 0 1 60 470 Tm (' + _escapar(titulo) + b') Tj ET']
+    y = 400
+    for linha in linhas:
+        conteudo.append(b'BT /F1 16 Tf 1 0 0 1 60 %d Tm (' % y + _escapar(linha) + b') Tj ET')
+        y -= 28
+    fluxo = b'\n'.join(conteudo)
+
+    objetos = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>' % (LARGURA_PAGINA, ALTURA_PAGINA),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n' % len(fluxo) + fluxo + b'\nendstream',
+    ]
+
+    # Cabeçalho, objetos e tabela de referências cruzadas (xref) com os deslocamentos
+    saida = bytearray(b'%PDF-1.4\n')
+    deslocamentos = []
+    for numero, objeto in enumerate(objetos, start=1):
+        deslocamentos.append(len(saida))
+        saida += b'%d 0 obj\n' % numero + objeto + b'\nendobj\n'
+
+    inicio_xref = len(saida)
+    saida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+    for deslocamento in deslocamentos:
+        saida += b'%010d 00000 n \n' % deslocamento
+    saida += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+
+def texto_do_certificado(dados):
+    """ Texto gravado em Certificado.texto_certificado (limitado a 255 caracteres). """
+    texto = (
+        f"Certificamos que {dados['usuario__nome']} participou do evento "
+        f"{dados['evento__nome']} ({dados['evento__tipo_evento']}), realizado de "
+        f"{dados['evento__data_inicial']:%d/%m/%Y} a {dados['evento__data_final']:%d/%m/%Y}."
+    )
+    return texto[:255]
+
+
+def renderizar_certificado(dados):
+    """
+    Gera o PDF de uma inscrição. Recebe e devolve apenas tipos simples para poder
+    rodar em outro processo, sem acesso ao banco.
+    """
+    texto = texto_do_certificado(dados)
+    pdf = gerar_pdf('Certificado de Participação', [
+        f"Certificamos que {dados['usuario__nome']}",
+        f"participou do evento {dados['evento__nome']} ({dados['evento__tipo_evento']}),",
+        f"realizado de {dados['evento__data_inicial']:%d/%m/%Y} a {dados['evento__data_final']:%d/%m/%Y}",
+        f"em {dados['evento__local']}.",
+    ])
+    return dados['id'], texto, pdf
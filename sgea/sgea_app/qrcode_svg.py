@@ -0,0 +1,292 @@
+"""
+QR Code (ISO/IEC 18004) em SVG, sem dependências externas.
+
+Cobre o necessário para o endereço de check-in: modo byte (UTF-8), nível de correção
+M (~15% do símbolo pode ser danificado) e versões 1 a 10 (até 213 bytes). A menor
+versão que comporta o texto é usada, e a máscara é escolhida pelas regras de
+penalidade da norma, como fazem os geradores completos.
+"""
+
+# Por versão: (codewords de correção por bloco, tamanhos dos blocos de dados), nível M
+BLOCOS_NIVEL_M = {
+    1: (10, [16]),
+    2: (16, [28]),
+    3: (26, [44]),
+    4: (18, [32, 32]),
+    5: (24, [43, 43]),
+    6: (16, [27, 27, 27, 27]),
+    7: (18, [31, 31, 31, 31]),
+    8: (22, [38, 38, 39, 39]),
+    9: (22, [36, 36, 36, 37, 37]),
+    10: (26, [43, 43, 43, 43, 44]),
+}
+
+# Centros dos padrões de alinhamento (linhas e colunas) de cada versão
+ALINHAMENTO = {
+    1: [], 2: [6, 18], 3: [6, 22], 4: [6, 26], 5: [6, 30],
+    6: [6, 34], 7: [6, 22, 38], 8: [6, 24, 42], 9: [6, 26, 46], 10: [6, 28, 50],
+}
+
+# Bits do nível de correção M na informação de formato
+FORMATO_NIVEL_M = 0b00
+
+MASCARAS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+# Aritmética no corpo GF(256) do Reed-Solomon (polinômio primitivo 0x11D)
+_EXP = [0] * 512
+_LOG = [0] * 256
+_valor = 1
+for _i in range(255):
+    _EXP[_i] = _valor
+    _LOG[_valor] = _i
+    _valor <<= 1
+    if _valor & 0x100:
+        _valor ^= 0x11D
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+
+
+def _multiplicar(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def _correcao(dados, grau):
+    """ Codewords de correção de erros (Reed-Solomon) de um bloco de dados. """
+    gerador = [1]
+    for i in range(grau):
+        proximo = gerador + [0]
+        for j, coeficiente in enumerate(gerador):
+            proximo[j + 1] ^= _multiplicar(coeficiente, _EXP[i])
+        gerador = proximo
+
+    resto = list(dados) + [0] * grau
+    for i in range(len(dados)):
+        fator = resto[i]
+        if fator:
+            for j in range(1, len(gerador)):
+                resto[i + j] ^= _multiplicar(gerador[j], fator)
+    return resto[len(dados):]
+
+
+def _bits(valor, quantidade):
+    return [(valor >> i) & 1 for i in reversed(range(quantidade))]
+
+
+def _escolher_versao(tamanho):
+    for versao, (_, blocos) in BLOCOS_NIVEL_M.items():
+        bits_contagem = 8 if versao < 10 else 16
+        if 4 + bits_contagem + 8 * tamanho <= 8 * sum(blocos):
+            return versao
+    raise ValueError(f"Texto longo demais para o QR Code ({tamanho} bytes; máximo 213).")
+
+
+def _codewords(dados, versao):
+    """ Dados codificados em modo byte, completados e intercalados com a correção de erros. """
+    grau, blocos = BLOCOS_NIVEL_M[versao]
+    capacidade = sum(blocos)
+
+    bits = [0, 1, 0, 0] + _bits(len(dados), 8 if versao < 10 else 16)
+    for byte in dados:
+        bits += _bits(byte, 8)
+    bits += [0] * min(4, capacidade * 8 - len(bits))  # terminador
+    bits += [0] * (-len(bits) % 8)
+    codewords = [int(''.join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    enchimento = (0xEC, 0x11)
+    codewords += [enchimento[i % 2] for i in range(capacidade - len(codewords))]
+
+    blocos_dados = []
+    inicio = 0
+    for tamanho in blocos:
+        blocos_dados.append(codewords[inicio:inicio + tamanho])
+        inicio += tamanho
+    blocos_correcao = [_correcao(bloco, grau) for bloco in blocos_dados]
+
+    intercalados = [bloco[i] for i in range(max(blocos)) for bloco in blocos_dados if i < len(bloco)]
+    intercalados += [bloco[i] for i in range(grau) for bloco in blocos_correcao]
+    return intercalados
+
+
+class _Simbolo:
+    """ Matriz de módulos (True = escuro), indexada por [y][x]. """
+
+    def __init__(self, versao):
+        self.versao = versao
+        self.tamanho = 17 + 4 * versao
+        self.modulos = [[False] * self.tamanho for _ in range(self.tamanho)]
+        self.funcao = [[False] * self.tamanho for _ in range(self.tamanho)]
+        self._desenhar_padroes()
+
+    def _marcar(self, x, y, escuro):
+        self.modulos[y][x] = escuro
+        self.funcao[y][x] = True
+
+    def _desenhar_padroes(self):
+        n = self.tamanho
+        # Padrões de temporização (linha e coluna 6)
+        for i in range(n):
+            self._marcar(6, i, i % 2 == 0)
+            self._marcar(i, 6, i % 2 == 0)
+        # Padrões de localização nos três cantos, com a borda clara ao redor
+        for cx, cy in ((3, 3), (n - 4, 3), (3, n - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < n and 0 <= y < n:
+                        distancia = max(abs(dx), abs(dy))
+                        self._marcar(x, y, distancia not in (2, 4))
+        # Padrões de alinhamento, exceto onde coincidem com os de localização
+        posicoes = ALINHAMENTO[self.versao]
+        ultima = len(posicoes) - 1
+        for i, cy in enumerate(posicoes):
+            for j, cx in enumerate(posicoes):
+                if (i, j) in ((0, 0), (0, ultima), (ultima, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self._marcar(cx + dx, cy + dy, max(abs(dx), abs(dy)) != 1)
+        # Informação de versão (7 em diante)
+        if self.versao >= 7:
+            resto = self.versao
+            for _ in range(12):
+                resto = (resto << 1) ^ ((resto >> 11) * 0x1F25)
+            bits = self.versao << 12 | resto
+            for i in range(18):
+                escuro = (bits >> i) & 1 == 1
+                a, b = n - 11 + i % 3, i // 3
+                self._marcar(a, b, escuro)
+                self._marcar(b, a, escuro)
+        # Reserva as posições da informação de formato (gravada junto com a máscara)
+        self.gravar_formato(0)
+
+    def gravar_formato(self, mascara):
+        n = self.tamanho
+        dados = FORMATO_NIVEL_M << 3 | mascara
+        resto = dados
+        for _ in range(10):
+            resto = (resto << 1) ^ ((resto >> 9) * 0x537)
+        bits = (dados << 10 | resto) ^ 0x5412
+
+        def bit(i):
+            return (bits >> i) & 1 == 1
+
+        for i in range(6):
+            self._marcar(8, i, bit(i))
+        self._marcar(8, 7, bit(6))
+        self._marcar(8, 8, bit(7))
+        self._marcar(7, 8, bit(8))
+        for i in range(9, 15):
+            self._marcar(14 - i, 8, bit(i))
+        for i in range(8):
+            self._marcar(n - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self._marcar(8, n - 15 + i, bit(i))
+        self._marcar(8, n - 8, True)  # módulo escuro fixo
+
+    def posicionar(self, codewords):
+        """ Dispõe os bits em zigue-zague, em colunas duplas da direita para a esquerda. """
+        n = self.tamanho
+        total = len(codewords) * 8
+        i = 0
+        direita = n - 1
+        while direita >= 1:
+            if direita == 6:
+                direita = 5  # a coluna de temporização é pulada
+            subindo = ((direita + 1) & 2) == 0
+            for vertical in range(n):
+                y = n - 1 - vertical if subindo else vertical
+                for x in (direita, direita - 1):
+                    if not self.funcao[y][x] and i < total:
+                        self.modulos[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1 == 1
+                        i += 1
+            direita -= 2
+
+    def aplicar_mascara(self, mascara):
+        """ Inverte os módulos de dados da máscara (aplicar de novo desfaz). """
+        condicao = MASCARAS[mascara]
+        for y in range(self.tamanho):
+            for x in range(self.tamanho):
+                if not self.funcao[y][x] and condicao(x, y):
+                    self.modulos[y][x] = not self.modulos[y][x]
+
+    def penalidade(self):
+        """ Pontuação das regras 1 a 4 da norma (quanto menor, mais fácil de ler). """
+        n = self.tamanho
+        linhas = self.modulos
+        colunas = [[linhas[y][x] for y in range(n)] for x in range(n)]
+        pontos = 0
+        padroes = ([True, False, True, True, True, False, True, False, False, False, False],
+                   [False, False, False, False, True, False, True, True, True, False, True])
+        for sequencia in linhas + colunas:
+            # Regra 1: cinco ou mais módulos seguidos da mesma cor
+            corrida = 1
+            for anterior, atual in zip(sequencia, sequencia[1:]):
+                if atual == anterior:
+                    corrida += 1
+                else:
+                    if corrida >= 5:
+                        pontos += corrida - 2
+                    corrida = 1
+            if corrida >= 5:
+                pontos += corrida - 2
+            # Regra 3: trechos parecidos com um padrão de localização
+            for inicio in range(n - 10):
+                if sequencia[inicio:inicio + 11] in padroes:
+                    pontos += 40
+        # Regra 2: blocos 2x2 da mesma cor
+        for y in range(n - 1):
+            for x in range(n - 1):
+                if linhas[y][x] == linhas[y][x + 1] == linhas[y + 1][x] == linhas[y + 1][x + 1]:
+                    pontos += 3
+        # Regra 4: proporção de módulos escuros longe de 50%
+        escuros = sum(sum(linha) for linha in linhas)
+        pontos += 10 * (abs(escuros * 100 // (n * n) - 50) // 5)
+        return pontos
+
+
+def gerar_matriz(texto, mascara=None):
+    """
+    Matriz do QR Code de 'texto' (lista de linhas de booleanos, True = escuro), sem a
+    margem. Sem 'mascara', usa a de menor penalidade.
+    """
+    dados = texto.encode('utf-8')
+    simbolo = _Simbolo(_escolher_versao(len(dados)))
+    simbolo.posicionar(_codewords(dados, simbolo.versao))
+
+    if mascara is None:
+        def penalidade(candidata):
+            simbolo.aplicar_mascara(candidata)
+            simbolo.gravar_formato(candidata)
+            pontos = simbolo.penalidade()
+            simbolo.aplicar_mascara(candidata)
+            return pontos
+        mascara = min(range(len(MASCARAS)), key=penalidade)
+
+    simbolo.aplicar_mascara(mascara)
+    simbolo.gravar_formato(mascara)
+    return simbolo.modulos
+
+
+def gerar_svg(texto, tamanho_modulo=4, margem=4):
+    """ QR Code de 'texto' em SVG: um único path com os módulos escuros, sobre fundo branco. """
+    matriz = gerar_matriz(texto)
+    lado = len(matriz) + 2 * margem
+    caminho = ''.join(
+        f'M{x + margem},{y + margem}h1v1h-1z'
+        for y, linha in enumerate(matriz) for x, escuro in enumerate(linha) if escuro
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {lado} {lado}" '
+        f'width="{lado * tamanho_modulo}" height="{lado * tamanho_modulo}" shape-rendering="crispEdges">'
+        f'<rect width="{lado}" height="{lado}" fill="#fff"/><path d="{caminho}" fill="#000"/></svg>'
+    )
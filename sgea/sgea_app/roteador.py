@@ -0,0 +1,148 @@
+"""
+Separação de leituras e escritas entre o banco principal ('default') e a réplica ('replica').
+
+Só as views marcadas com @leitura_na_replica leem da réplica, e apenas em GET/HEAD.
+Todo o resto (escritas e leituras das demais views) fica no principal. Para o usuário
+nunca ver dados antigos depois de alterar algo:
+  - dentro da requisição, a primeira escrita faz as leituras seguintes voltarem ao principal;
+  - a sessão fica "fixada" no principal por SGEA_REPLICA_FIXACAO_SEGUNDOS após a escrita,
+    tempo suficiente para a réplica alcançar o principal.
+Sem o alias 'replica' em settings.DATABASES, o roteador não altera nada.
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+ALIAS_PRINCIPAL = 'default'
+ALIAS_REPLICA = 'replica'
+
+# Chave da sessão com o instante (time.time()) até o qual as leituras ficam no principal
+CHAVE_FIXACAO = 'sgea_ler_do_principal_ate'
+
+# Apenas escritas nos modelos do sistema fixam o usuário no principal (a sessão é gravada a cada login, mensagem etc.)
+APPS_FIXADORES = {'sgea_app'}
+
+
+class EstadoRoteamento:
+    """ Decisões de roteamento da requisição em andamento. """
+
+    def __init__(self):
+        self.ler_da_replica = False
+        self.escreveu = False
+
+
+_estado = ContextVar('sgea_roteamento', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def fixado_no_principal(request):
+    """ True se o usuário alterou dados há pouco e a réplica pode ainda não ter a alteração. """
+    sessao = getattr(request, 'session', None)
+    return sessao is not None and sessao.get(CHAVE_FIXACAO, 0) > time.time()
+
+
+async def afixado_no_principal(request):
+    sessao = getattr(request, 'session', None)
+    return sessao is not None and await sessao.aget(CHAVE_FIXACAO, 0) > time.time()
+
+
+class RoteadorReplica:
+    """ Roteador de banco (DATABASE_ROUTERS): escritas no principal, leituras conforme a requisição. """
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if estado and estado.ler_da_replica and not estado.escreveu and replica_configurada():
+            return ALIAS_REPLICA
+        return ALIAS_PRINCIPAL
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado and model._meta.app_label in APPS_FIXADORES:
+            estado.escreveu = True
+        return ALIAS_PRINCIPAL
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Principal e réplica têm os mesmos dados: objetos dos dois podem se relacionar
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Com dois arquivos SQLite locais, a réplica também recebe o esquema (migrate --database replica)
+        return True
+
+
+def _pode_ler_da_replica(request):
+    return _estado.get() is not None and request.method in ('GET', 'HEAD')
+
+
+def leitura_na_replica(view):
+    """
+    Marca uma view somente leitura (síncrona ou async) para ler da réplica. Requer o
+    RoteamentoMiddleware. Requisições que não são GET/HEAD, ou de sessões fixadas no
+    principal, continuam no principal.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def view_na_replica(request, *args, **kwargs):
+            if _pode_ler_da_replica(request) and not await afixado_no_principal(request):
+                _estado.get().ler_da_replica = True
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def view_na_replica(request, *args, **kwargs):
+            if _pode_ler_da_replica(request) and not fixado_no_principal(request):
+                _estado.get().ler_da_replica = True
+            return view(request, *args, **kwargs)
+    return view_na_replica
+
+
+class RoteamentoMiddleware:
+    """
+    Cria o estado de roteamento de cada requisição e, se a requisição escreveu no banco,
+    fixa a sessão no principal. Deve ficar depois do SessionMiddleware, para que a
+    fixação seja gravada junto com a sessão. Funciona em WSGI e em ASGI (sem adaptar
+    as views async para threads).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado = EstadoRoteamento()
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        if self._deve_fixar(request, estado):
+            request.session[CHAVE_FIXACAO] = self._fixado_ate()
+        return response
+
+    async def __acall__(self, request):
+        estado = EstadoRoteamento()
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        if self._deve_fixar(request, estado):
+            await request.session.aset(CHAVE_FIXACAO, self._fixado_ate())
+        return response
+
+    def _deve_fixar(self, request, estado):
+        # Sem réplica não há o que fixar (e a sessão não precisa ser regravada)
+        return estado.escreveu and replica_configurada() and hasattr(request, 'session')
+
+    def _fixado_ate(self):
+        return time.time() + settings.SGEA_REPLICA_FIXACAO_SEGUNDOS
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busca, catalogo
+from .models import Evento, Inscricao
+
+# As invalidações rodam após o commit: antes disso, outra requisição poderia
+# recolocar no cache o estado antigo ainda visível no banco.
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def evento_alterado(sender, instance, **kwargs):
+    def invalidar():
+        catalogo.invalidar_catalogo()
+        catalogo.invalidar_vagas(instance.pk)
+    transaction.on_commit(invalidar)
+
+
+# Campos de Evento presentes no índice de busca
+CAMPOS_BUSCA = {'nome', 'local', 'tipo_evento'}
+
+
+@receiver(post_save, sender=Evento)
+def indexar_evento(sender, instance, using, update_fields=None, **kwargs):
+    # Na mesma transação do evento: um rollback desfaz também a alteração do índice
+    if update_fields is None or CAMPOS_BUSCA & set(update_fields):
+        busca.indexar_evento(instance, using)
+
+
+@receiver(post_delete, sender=Evento)
+def desindexar_evento(sender, instance, using, **kwargs):
+    busca.remover_evento(instance.pk, using)
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_delete, sender=Inscricao)
+def inscricao_alterada(sender, instance, **kwargs):
+    # Só as vagas daquele evento e a lista de inscrições daquele usuário mudam
+    def invalidar():
+        catalogo.invalidar_vagas(instance.evento_id)
+        catalogo.invalidar_inscritos(instance.usuario_id)
+    transaction.on_commit(invalidar)
@@ -0,0 +1,87 @@
+"""
+Servidor SMTP mínimo, em uma thread, para testar e medir o envio da caixa de saída
+sem um servidor de e-mail de verdade (testes e 'enviar_emails --benchmark').
+
+Guarda as mensagens recebidas, conta as conexões abertas, pode simular o custo de
+abrir uma conexão ('latencia', como o handshake/TLS de um servidor remoto) e recusa
+os destinatários de 'recusar' com um erro 550.
+"""
+import socketserver
+import threading
+import time
+
+
+class _Sessao(socketserver.StreamRequestHandler):
+
+    def responder(self, linha):
+        self.wfile.write(f'{linha}\r\n'.encode())
+
+    def handle(self):
+        servidor = self.server
+        with servidor.trava:
+            servidor.conexoes += 1
+        time.sleep(servidor.latencia)
+        self.responder('220 sgea-local ESMTP')
+
+        remetente, destinatarios = None, []
+        for linha in self.rfile:
+            comando = linha.decode('utf-8', 'replace').strip()
+            verbo = comando.split(' ', 1)[0].upper()
+            if verbo in ('EHLO', 'HELO'):
+                self.responder('250 sgea-local')
+            elif verbo == 'MAIL':
+                remetente, destinatarios = comando.partition(':')[2].strip(' <>'), []
+                self.responder('250 OK')
+            elif verbo == 'RCPT':
+                destinatario = comando.partition(':')[2].strip(' <>')
+                if destinatario in servidor.recusar:
+                    self.responder('550 Destinatário recusado')
+                else:
+                    destinatarios.append(destinatario)
+                    self.responder('250 OK')
+            elif verbo == 'DATA':
+                self.responder('354 Termine com <CRLF>.<CRLF>')
+                conteudo = []
+                for linha_dados in self.rfile:
+                    if linha_dados in (b'.\r\n', b'.\n'):
+                        break
+                    conteudo.append(linha_dados)
+                with servidor.trava:
+                    servidor.mensagens.append((remetente, destinatarios, b''.join(conteudo)))
+                self.responder('250 OK')
+            elif verbo in ('RSET', 'NOOP'):
+                remetente, destinatarios = None, []
+                self.responder('250 OK')
+            elif verbo == 'QUIT':
+                self.responder('221 Até logo')
+                return
+            else:
+                self.responder('502 Comando não implementado')
+
+
+class ServidorSMTPLocal(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latencia=0.0, recusar=()):
+        super().__init__(('127.0.0.1', 0), _Sessao)
+        self.latencia = latencia
+        self.recusar = set(recusar)
+        self.conexoes = 0
+        self.mensagens = []
+        self.trava = threading.Lock()
+        self._thread = None
+
+    @property
+    def porta(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='sgea-smtp-local', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
@@ -0,0 +1,54 @@
+"""
+Respostas em streaming servidas sob ASGI.
+
+As respostas grandes do sistema (ZIP de certificados, exportação CSV/XLSX, feeds ICS)
+são geradas por iteradores síncronos, que consultam o banco em blocos. Sob WSGI elas
+são enviadas pedaço a pedaço; sob ASGI, o Django consome um iterador síncrono com
+sync_to_async(list), montando a resposta inteira na memória antes do primeiro byte.
+
+O StreamingAssincronoMiddleware troca, apenas sob ASGI, o iterador dessas respostas por
+um assíncrono, que busca os pedaços em grupos na thread síncrona da requisição (a
+mesma conexão com o banco em todas as buscas). As views continuam síncronas e iguais
+nos dois servidores.
+"""
+from itertools import islice
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+# Pedaços buscados por ida à thread síncrona (cada ida custa uma troca de thread)
+PEDACOS_POR_VEZ = 64
+
+
+async def iterar_em_thread(iteravel, pedacos_por_vez=PEDACOS_POR_VEZ):
+    """ Percorre um iterador síncrono a partir de código assíncrono, sem carregá-lo todo. """
+    iterador = iter(iteravel)
+    proximos = sync_to_async(lambda: list(islice(iterador, pedacos_por_vez)), thread_sensitive=True)
+    while lote := await proximos():
+        for pedaco in lote:
+            yield pedaco
+
+
+class StreamingAssincronoMiddleware:
+    """
+    Sob ASGI (cadeia de middlewares assíncrona), entrega as respostas em streaming com
+    um iterador assíncrono. Sob WSGI, não altera nada.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            # O iterador original continua registrado para ser fechado ao fim da resposta
+            response.streaming_content = iterar_em_thread(response.streaming_content)
+        return response
@@ -1,3 +1,1862 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import warnings
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from PIL import Image
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, router
+from django.db.models import Sum
+from django.forms.models import model_to_dict
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import auditoria, banners, busca, calendario, catalogo, certificados, desempenho, emails, estatisticas, exportacao, metricas, qrcode_svg, roteador, views
+from .catalogo import abuscar_no_catalogo, consulta_catalogo
+from .certificados import (
+    PRAZO_RESERVA, consulta_eventos_encerrados, emitir_certificados_evento, emitir_eventos_encerrados,
+    eventos_encerrados_pendentes, inscricoes_pendentes, reservar_evento,
+)
+from .filas import ProcessadorEmLote
+from .forms import FormularioEvento
+from .managers import InscricaoDuplicada, InscricaoNegada, VagasEsgotadas
+from .models import (
+    Usuario, Evento, Inscricao, ListaEspera, Certificado, EstatisticaDiaria, EstatisticaEvento, EstatisticaPublico,
+    MensagemEmail, RegistroAuditoria,
+)
+from .smtp_local import ServidorSMTPLocal
+
+
+def criar_usuario(login, perfil='Aluno', **extra):
+    """ Cria um usuário ativo com senha padrão para os testes. """
+    extra.setdefault('nome', login.split('@')[0])
+    extra.setdefault('telefone', '(11) 99999-0000')
+    extra.setdefault('instituicao_ensino', 'UniSGEA')
+    return Usuario.objects.create_user(login, 'Senha@123', perfil=perfil, is_active=True, **extra)
+
+
+def criar_evento(organizador, professor, dias=10, vagas=10, **extra):
+    """ Cria um evento que começa daqui a 'dias' dias. """
+    inicio = timezone.now().date() + timedelta(days=dias)
+    extra.setdefault('nome', f'Evento {inicio}')
+    extra.setdefault('local', 'Auditório')
+    return Evento.objects.create(
+        organizador=organizador,
+        professor_responsavel=professor,
+        tipo_evento='Palestra',
+        data_inicial=inicio,
+        data_final=inicio + timedelta(days=1),
+        horario='14:00',
+        quantidade_participantes=vagas,
+        **extra
+    )
+
+
+def contar_comandos(contexto, trecho):
+    """ Quantidade de comandos SQL capturados (CaptureQueriesContext) que contêm 'trecho'. """
+    return sum(trecho in consulta['sql'] for consulta in contexto.captured_queries)
+
+
+# Hasher rápido: os testes criam muitos usuários e não precisam de PBKDF2.
+# Sem threads de fundo: os buffers só são gravados quando o teste pede.
+# Sem cache: cada teste vê o banco; os testes de cache ativam o LocMemCache
+# (CACHE_LOCAL deve ficar por fora de CONFIGURACAO_TESTES: o decorador externo prevalece).
+CONFIGURACAO_TESTES = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    SGEA_PROCESSAMENTO_EM_SEGUNDO_PLANO=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+)
+CACHE_LOCAL = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testes'}},
+)
+
+
+@CONFIGURACAO_TESTES
+class InscricaoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.evento = criar_evento(cls.organizador, cls.professor, vagas=1)
+
+    def test_inscricao_ocupa_vaga(self):
+        Inscricao.objects.inscrever(self.aluno, self.evento)
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.vagas_ocupadas, 1)
+
+    def test_evento_lotado_nao_cria_inscricao(self):
+        Inscricao.objects.inscrever(self.aluno, self.evento)
+        with self.assertRaises(VagasEsgotadas):
+            Inscricao.objects.inscrever(self.professor, self.evento)
+        self.assertEqual(Inscricao.objects.filter(evento=self.evento).count(), 1)
+
+    def test_inscricao_duplicada(self):
+        self.evento.quantidade_participantes = 5
+        self.evento.save()
+        Inscricao.objects.inscrever(self.aluno, self.evento)
+        with self.assertRaises(InscricaoDuplicada):
+            Inscricao.objects.inscrever(self.aluno, self.evento)
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.vagas_ocupadas, 1)
+
+    def test_edicao_concorrente_nao_libera_vagas(self):
+        self.evento.quantidade_participantes = 2
+        self.evento.save()
+        # Instância lida no início da edição, antes das inscrições
+        lido_pela_edicao = Evento.objects.get(pk=self.evento.pk)
+        Inscricao.objects.inscrever(self.aluno, self.evento)
+        Inscricao.objects.inscrever(self.professor, self.evento)
+
+        dados = model_to_dict(lido_pela_edicao, fields=FormularioEvento.Meta.fields)
+        dados['nome'] = 'Evento Editado'
+        form = FormularioEvento(dados, instance=lido_pela_edicao)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.evento.refresh_from_db()
+        self.assertEqual((self.evento.nome, self.evento.vagas_ocupadas), ('Evento Editado', 2))
+        with self.assertRaises(VagasEsgotadas):
+            Inscricao.objects.inscrever(criar_usuario('terceiro@sgea.br'), self.evento)
+
+    def test_organizador_nao_se_inscreve(self):
+        with self.assertRaises(InscricaoNegada):
+            Inscricao.objects.inscrever(self.organizador, self.evento)
+
+    def test_inscricao_sem_count(self):
+        # Verifica o limite pelo contador: nenhuma consulta COUNT sobre Inscricao.
+        # INSERT, reserva da vaga e os três contadores das estatísticas (um comando cada)
+        with self.assertNumQueries(7) as contexto:
+            Inscricao.objects.inscrever(self.aluno, self.evento)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in contexto.captured_queries))
+
+    def test_cancelar_libera_vaga(self):
+        Inscricao.objects.inscrever(self.aluno, self.evento)
+        self.client.force_login(self.aluno)
+        self.client.post(reverse('desinscrever_evento', args=[self.evento.id]))
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.vagas_ocupadas, 0)
+        self.assertFalse(Inscricao.objects.filter(evento=self.evento).exists())
+
+    def test_view_inscrever(self):
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('inscrever_evento', args=[self.evento.id]))
+        self.assertRedirects(resposta, reverse('home'), fetch_redirect_response=False)
+        self.assertTrue(Inscricao.objects.filter(usuario=self.aluno, evento=self.evento).exists())
+
+
+@CONFIGURACAO_TESTES
+class InscricaoConcorrenteTests(TransactionTestCase):
+    """
+    Teste de estresse: dispara inscrições em paralelo contra o mesmo evento e
+    verifica que o limite de vagas nunca é ultrapassado.
+    """
+    VAGAS = 5
+    PARTICIPANTES = 25
+
+    def test_inscricoes_paralelas_nao_ultrapassam_limite(self):
+        organizador = criar_usuario('org@sgea.br', 'Organizador')
+        professor = criar_usuario('prof@sgea.br', 'Professor')
+        evento = criar_evento(organizador, professor, vagas=self.VAGAS)
+        alunos = [criar_usuario(f'aluno{i}@sgea.br') for i in range(self.PARTICIPANTES)]
+
+        barreira = threading.Barrier(len(alunos))
+        resultados = []
+
+        def inscrever(aluno):
+            try:
+                barreira.wait()
+                Inscricao.objects.inscrever(aluno, evento)
+                resultados.append('ok')
+            except VagasEsgotadas:
+                resultados.append('lotado')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=inscrever, args=(aluno,)) for aluno in alunos]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        evento.refresh_from_db()
+        inscritos = Inscricao.objects.filter(evento=evento).count()
+        self.assertEqual(resultados.count('ok'), self.VAGAS)
+        self.assertEqual(resultados.count('lotado'), self.PARTICIPANTES - self.VAGAS)
+        self.assertEqual(inscritos, self.VAGAS)
+        self.assertEqual(evento.vagas_ocupadas, inscritos)
+
+
+@CONFIGURACAO_TESTES
+class ListaEsperaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.alunos = [criar_usuario(f'aluno{i}@sgea.br', nome=f'Aluno {i}') for i in range(4)]
+        cls.evento = criar_evento(cls.organizador, cls.professor, vagas=1)
+
+    def setUp(self):
+        Inscricao.objects.inscrever(self.alunos[0], self.evento)
+
+    def test_cancelamento_promove_o_primeiro_da_fila(self):
+        self.assertEqual(ListaEspera.objects.entrar(self.alunos[1], self.evento), 1)
+        self.assertEqual(ListaEspera.objects.entrar(self.alunos[2], self.evento), 2)
+        self.assertEqual(ListaEspera.objects.entrar(self.alunos[1], self.evento), 1)
+
+        self.client.force_login(self.alunos[0])
+        self.client.post(reverse('desinscrever_evento', args=[self.evento.id]))
+        emails.enviar_pendentes()
+
+        self.assertEqual(list(Inscricao.objects.filter(evento=self.evento).values_list('usuario', flat=True)), [self.alunos[1].pk])
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).vagas_ocupadas, 1)
+        self.assertEqual(list(ListaEspera.objects.com_posicao().values_list('usuario', 'posicao')), [(self.alunos[2].pk, 1)])
+        self.assertEqual([mensagem.to for mensagem in mail.outbox], [[self.alunos[1].login]])
+
+    def test_regras_para_entrar_na_fila(self):
+        with self.assertRaises(InscricaoDuplicada):
+            ListaEspera.objects.entrar(self.alunos[0], self.evento)
+        with self.assertRaises(InscricaoNegada):
+            ListaEspera.objects.entrar(self.organizador, self.evento)
+        # Com vaga livre (o limite aumentou), quem entra na fila é promovido na hora
+        Evento.objects.filter(pk=self.evento.pk).update(quantidade_participantes=2)
+        self.assertIsNone(ListaEspera.objects.entrar(self.alunos[1], self.evento))
+        self.assertTrue(Inscricao.objects.filter(usuario=self.alunos[1], evento=self.evento).exists())
+
+    def test_aumento_do_limite_promove_a_fila(self):
+        for aluno in self.alunos[1:]:
+            ListaEspera.objects.entrar(aluno, self.evento)
+        self.client.force_login(self.organizador)
+        dados = {
+            'nome': self.evento.nome, 'tipo_evento': 'Palestra', 'data_inicial': self.evento.data_inicial,
+            'data_final': self.evento.data_final, 'horario': '14:00', 'local': 'Auditório',
+            'quantidade_participantes': 3, 'professor_responsavel': self.professor.pk,
+        }
+        self.client.post(reverse('editar_evento', args=[self.evento.id]), dados)
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).vagas_ocupadas, 3)
+        self.assertEqual(list(ListaEspera.objects.values_list('usuario', flat=True)), [self.alunos[3].pk])
+
+    def test_promocao_em_lote_com_consultas_constantes(self):
+        # Promovidos em lote, sem um ciclo de inscrição (7 consultas) por pessoa
+        for aluno in self.alunos[1:]:
+            ListaEspera.objects.entrar(aluno, self.evento)
+        self.alunos[2].perfil = 'Organizador'
+        self.alunos[2].save(update_fields=['perfil'])
+
+        # 3 vagas novas: um comando por etapa, mais uma segunda busca na fila (já vazia)
+        # para a vaga de quem não podia se inscrever
+        Evento.objects.filter(pk=self.evento.pk).update(quantidade_participantes=4)
+        with self.assertNumQueries(11):
+            promovidas = ListaEspera.objects.promover(self.evento, maximo=None)
+        self.assertEqual([inscricao.usuario_id for inscricao in promovidas], [self.alunos[1].pk, self.alunos[3].pk])
+        self.assertFalse(ListaEspera.objects.exists())
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).vagas_ocupadas, 3)
+        self.assertEqual(EstatisticaEvento.objects.get(pk=self.evento.pk).inscricoes, 3)
+        self.assertEqual(MensagemEmail.objects.count(), 2)
+
+    def test_fila_no_dashboard(self):
+        ListaEspera.objects.entrar(self.alunos[1], self.evento)
+        self.client.force_login(self.alunos[1])
+        self.assertContains(self.client.get(reverse('dashboard')), '1º')
+        self.client.post(reverse('sair_lista_espera', args=[self.evento.id]))
+        self.assertFalse(ListaEspera.objects.exists())
+
+
+@CONFIGURACAO_TESTES
+class ListaEsperaConcorrenteTests(TransactionTestCase):
+    """
+    Cancelamentos simultâneos em um evento lotado: cada vaga liberada vai para uma
+    pessoa diferente, na ordem da fila, e o limite nunca é ultrapassado.
+    """
+    VAGAS = 6
+    NA_FILA = 15
+
+    def test_cancelamentos_paralelos_promovem_na_ordem_da_fila(self):
+        organizador = criar_usuario('org@sgea.br', 'Organizador')
+        professor = criar_usuario('prof@sgea.br', 'Professor')
+        evento = criar_evento(organizador, professor, vagas=self.VAGAS)
+        inscritos = [criar_usuario(f'inscrito{i}@sgea.br') for i in range(self.VAGAS)]
+        fila = [criar_usuario(f'fila{i}@sgea.br') for i in range(self.NA_FILA)]
+        for aluno in inscritos:
+            Inscricao.objects.inscrever(aluno, evento)
+        for aluno in fila:
+            ListaEspera.objects.entrar(aluno, evento)
+
+        barreira = threading.Barrier(len(inscritos))
+        erros = []
+
+        def cancelar(aluno):
+            try:
+                barreira.wait()
+                Inscricao.objects.cancelar(aluno, evento)
+            except Exception as erro:
+                erros.append(erro)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cancelar, args=(aluno,)) for aluno in inscritos]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        emails.enviar_pendentes()
+
+        self.assertEqual(erros, [])
+        evento.refresh_from_db()
+        promovidos = set(Inscricao.objects.filter(evento=evento).values_list('usuario', flat=True))
+        self.assertEqual(promovidos, {aluno.pk for aluno in fila[:self.VAGAS]})
+        self.assertEqual(evento.vagas_ocupadas, self.VAGAS)
+        self.assertEqual(
+            list(ListaEspera.objects.com_posicao().order_by('pk').values_list('usuario', 'posicao')),
+            [(aluno.pk, posicao) for posicao, aluno in enumerate(fila[self.VAGAS:], start=1)],
+        )
+        self.assertEqual(len(mail.outbox), self.VAGAS)
+
+
+@CONFIGURACAO_TESTES
+class CaixaDeSaidaTests(TestCase):
+
+    SMTP = {'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend', 'EMAIL_HOST': '127.0.0.1'}
+
+    def test_cadastro_envia_confirmacao_e_link_ativa_a_conta(self):
+        dados = {
+            'nome': 'Nova Aluna', 'telefone': '(61) 99999-0000', 'instituicao_ensino': 'UniSGEA',
+            'login': 'nova@sgea.br', 'perfil': 'Aluno', 'password': 'Senha@123', 'senha_confirmacao': 'Senha@123',
+        }
+        self.client.post(reverse('cadastro_usuario'), dados)
+        usuario = Usuario.objects.get(login='nova@sgea.br')
+        self.assertFalse(usuario.is_active)
+        self.assertEqual(mail.outbox, [])  # a requisição só grava na caixa de saída
+
+        self.assertEqual(emails.enviar_pendentes().enviadas, 1)
+        link = re.search(r'http://testserver(/confirmar/\S+/)', mail.outbox[0].body).group(1)
+        self.assertEqual(mail.outbox[0].to, ['nova@sgea.br'])
+
+        self.assertEqual(self.client.get(link[:-2] + 'x/').status_code, 400)
+        self.assertContains(self.client.get(link), 'Cadastro Confirmado')
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.is_active)
+        self.assertContains(self.client.get(link), 'Cadastro Confirmado')
+
+    def test_lote_por_uma_conexao_smtp_com_nova_tentativa(self):
+        emails.enfileirar_varias([(f'pessoa{i}@sgea.br', f'Aviso {i}', 'Corpo') for i in range(5)])
+        emails.enfileirar('recusado@sgea.br', 'Aviso', 'Corpo')
+        with ServidorSMTPLocal(recusar={'recusado@sgea.br'}) as servidor:
+            with override_settings(**self.SMTP, EMAIL_PORT=servidor.porta):
+                resultado = emails.enviar_pendentes(tamanho_lote=2)
+        self.assertEqual((resultado.enviadas, resultado.falhas), (5, 1))
+        self.assertEqual(len(servidor.mensagens), 5)
+        # Uma conexão para os três lotes, e uma nova após a recusa
+        self.assertEqual(servidor.conexoes, 2)
+
+        recusada = MensagemEmail.objects.get(destinatario='recusado@sgea.br')
+        self.assertEqual((recusada.status, recusada.tentativas), ('Pendente', 1))
+        self.assertGreater(recusada.proxima_tentativa_em, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(emails.enviar_pendentes().enviadas, 0)  # ainda esperando
+
+        MensagemEmail.objects.filter(pk=recusada.pk).update(
+            tentativas=emails.MAXIMO_TENTATIVAS - 1, proxima_tentativa_em=timezone.now(),
+        )
+        with ServidorSMTPLocal(recusar={'recusado@sgea.br'}) as servidor:
+            with override_settings(**self.SMTP, EMAIL_PORT=servidor.porta):
+                emails.enviar_pendentes()
+        self.assertEqual(MensagemEmail.objects.get(pk=recusada.pk).status, 'Falhou')
+        self.assertEqual(emails.totais_por_status(), {'Pendente': 0, 'Enviando': 0, 'Enviada': 5, 'Falhou': 1})
+
+    def test_servidor_fora_do_ar_devolve_o_lote_a_fila(self):
+        emails.enfileirar('pessoa@sgea.br', 'Aviso', 'Corpo')
+        with ServidorSMTPLocal() as servidor:
+            porta = servidor.porta
+        with override_settings(**self.SMTP, EMAIL_PORT=porta):
+            with self.assertRaises(OSError):
+                emails.enviar_pendentes()
+        self.assertEqual(MensagemEmail.objects.get().status, 'Pendente')
+
+    def test_backend_de_arquivos_e_metricas(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        emails.enfileirar('pessoa@sgea.br', 'Aviso por arquivo', 'Corpo')
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend', EMAIL_FILE_PATH=pasta):
+            call_command('enviar_emails', stdout=StringIO())
+        (arquivo,) = os.listdir(pasta)
+        with open(os.path.join(pasta, arquivo)) as conteudo:
+            self.assertIn('Subject: Aviso por arquivo', conteudo.read())
+
+        self.client.force_login(criar_usuario('equipe@sgea.br', 'Organizador', is_staff=True))
+        self.assertContains(self.client.get(reverse('metricas')), 'sgea_emails{status="Enviada"} 1')
+
+
+@CONFIGURACAO_TESTES
+class EstatisticasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.outro_organizador = criar_usuario('org2@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor, vagas=10)
+        cls.alunos = [
+            criar_usuario(f'aluno{i}@sgea.br', instituicao_ensino=instituicao)
+            for i, instituicao in enumerate(['UniA', 'UniA', 'UniB'])
+        ]
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def resumo(self):
+        """ Conteúdo das tabelas de resumo, sem as linhas zeradas (deixadas por cancelamentos). """
+        return {
+            modelo.__name__: {
+                linha for linha in modelo.objects.values_list(*chave, *contadores) if any(linha[len(chave):])
+            }
+            for modelo, chave, contadores in (
+                (EstatisticaEvento, ('evento',), estatisticas.CONTADORES),
+                (EstatisticaPublico, ('evento', 'perfil', 'instituicao_ensino'), estatisticas.CONTADORES),
+                (EstatisticaDiaria, ('evento', 'dia'), ('inscricoes',)),
+            )
+        }
+
+    def movimentar(self):
+        """ Inscrições, um cancelamento, check-in, confirmação em lote e emissão dos certificados. """
+        inscricoes = [Inscricao.objects.inscrever(aluno, self.evento) for aluno in self.alunos]
+        Inscricao.objects.inscrever(self.professor, self.evento)
+        Inscricao.objects.cancelar(self.professor, self.evento)
+        Inscricao.objects.confirmar_checkin(inscricoes[0].pk, self.evento.pk, self.organizador)
+        Inscricao.objects.confirmar_presenca(self.evento, ids=[inscricoes[2].pk])
+        ontem = timezone.now().date() - timedelta(days=1)
+        Evento.objects.filter(pk=self.evento.pk).update(data_inicial=ontem, data_final=ontem)
+        emitir_certificados_evento(self.evento, processos=1)
+
+    def test_incrementos_coincidem_com_a_reconstrucao(self):
+        self.movimentar()
+        totais = EstatisticaEvento.objects.get(evento=self.evento)
+        self.assertEqual((totais.inscricoes, totais.presencas, totais.certificados), (3, 2, 2))
+
+        incremental = self.resumo()
+        resultado = estatisticas.reconstruir()
+        self.assertEqual(self.resumo(), incremental)
+        self.assertEqual((resultado.eventos, resultado.linhas_publico, resultado.linhas_diarias), (1, 2, 1))
+
+    def test_comando_corrige_cargas_em_massa(self):
+        Inscricao.objects.bulk_create([Inscricao(usuario=aluno, evento=self.evento) for aluno in self.alunos])
+        self.assertFalse(EstatisticaEvento.objects.exists())
+        call_command('recalcular_estatisticas', stdout=StringIO())
+        self.assertEqual(EstatisticaEvento.objects.get(evento=self.evento).inscricoes, 3)
+
+    def test_pagina_do_evento(self):
+        self.movimentar()
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('estatisticas_evento', args=[self.evento.id]))
+        totais = resposta.context['totais']
+        self.assertEqual((totais['taxa_ocupacao'], totais['taxa_presenca'], totais['taxa_certificacao']), (30.0, 66.7, 100.0))
+        self.assertEqual(
+            [(linha['rotulo'], linha['inscricoes'], linha['presencas']) for linha in resposta.context['por_instituicao']],
+            [('UniA', 2, 1), ('UniB', 1, 1)],
+        )
+        # O professor cancelou: seu perfil não aparece mais
+        self.assertEqual([linha['rotulo'] for linha in resposta.context['por_perfil']], ['Aluno'])
+        self.assertEqual([linha['acumulado'] for linha in resposta.context['serie']], [3])
+
+        self.client.force_login(self.outro_organizador)
+        self.assertEqual(self.client.get(reverse('estatisticas_evento', args=[self.evento.id])).status_code, 404)
+
+    def test_pagina_do_organizador_le_apenas_os_resumos(self):
+        self.movimentar()
+        criar_evento(self.organizador, self.professor, nome='Evento Vazio')
+        self.client.force_login(self.organizador)
+        # Sessão, usuário, eventos com os totais (JOIN), público e série diária
+        with self.assertNumQueries(5) as contexto:
+            resposta = self.client.get(reverse('estatisticas_organizador'))
+        self.assertFalse(any('sgea_app_inscricao' in consulta['sql'] for consulta in contexto.captured_queries))
+        self.assertEqual(resposta.context['totais']['inscricoes'], 3)
+        self.assertEqual(resposta.context['totais']['taxa_ocupacao'], 15.0)
+        self.assertEqual([linha['inscricoes'] for linha in resposta.context['eventos']], [3, 0])
+        self.assertContains(resposta, 'Evento Vazio')
+
+    def test_instituicoes_alem_do_limite_em_outras(self):
+        with mock.patch.object(estatisticas, 'LIMITE_INSTITUICOES', 1):
+            for aluno in self.alunos:
+                Inscricao.objects.inscrever(aluno, self.evento)
+            publico = estatisticas.resumo_evento(self.evento)['por_instituicao']
+        self.assertEqual([(linha['rotulo'], linha['inscricoes']) for linha in publico], [('UniA', 2), ('Outras', 1)])
+
+
+@CONFIGURACAO_TESTES
+class ListaEventosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.eventos = [criar_evento(cls.organizador, cls.professor, dias=1 + i % 5) for i in range(25)]
+
+    def test_pagina_usa_uma_consulta(self):
+        # Professor e organizador vêm no mesmo JOIN: uma consulta para a página toda
+        with self.assertNumQueries(1):
+            resposta = self.client.get(reverse('home'))
+        self.assertContains(resposta, self.professor.nome)
+        self.assertEqual(len(resposta.context['eventos']), 20)
+
+    def test_paginacao_por_chave_percorre_todos_os_eventos(self):
+        vistos = []
+        cursor = None
+        while True:
+            resposta = self.client.get(reverse('home'), {'cursor': cursor} if cursor else {})
+            vistos += [evento.id for evento in resposta.context['eventos']]
+            cursor = resposta.context['proximo_cursor']
+            if not cursor:
+                break
+        esperados = sorted(self.eventos, key=lambda e: (e.data_inicial, e.id))
+        self.assertEqual(vistos, [evento.id for evento in esperados])
+
+    def test_cursor_invalido_volta_para_primeira_pagina(self):
+        resposta = self.client.get(reverse('home'), {'cursor': 'lixo'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['eventos']), 20)
+
+    def test_aluno_nao_ve_eventos_inscritos(self):
+        Inscricao.objects.inscrever(self.aluno, self.eventos[0])
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('home'))
+        ids = [evento.id for evento in resposta.context['eventos']]
+        self.assertNotIn(self.eventos[0].id, ids)
+
+    def test_aluno_inscrito_em_toda_a_primeira_pagina(self):
+        # A página é completada com os eventos seguintes em vez de sair vazia
+        ordenados = sorted(self.eventos, key=lambda e: (e.data_inicial, e.id))
+        for evento in ordenados[:20]:
+            Inscricao.objects.inscrever(self.aluno, evento)
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('home'))
+        ids = [evento.id for evento in resposta.context['eventos']]
+        self.assertEqual(ids, [evento.id for evento in ordenados[20:]])
+        self.assertIsNone(resposta.context['proximo_cursor'])
+        self.assertNotContains(resposta, 'Nenhum evento futuro')
+
+    def test_pagina_completada_continua_do_ultimo_exibido(self):
+        ordenados = sorted(self.eventos, key=lambda e: (e.data_inicial, e.id))
+        for evento in ordenados[:3]:
+            Inscricao.objects.inscrever(self.aluno, evento)
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('home'))
+        primeira = [evento.id for evento in resposta.context['eventos']]
+        self.assertEqual(primeira, [evento.id for evento in ordenados[3:23]])
+        resposta = self.client.get(reverse('home'), {'cursor': resposta.context['proximo_cursor']})
+        self.assertEqual([evento.id for evento in resposta.context['eventos']], [evento.id for evento in ordenados[23:]])
+
+
+@CONFIGURACAO_TESTES
+class VagasRestantesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.alunos = [criar_usuario(f'aluno{i}@sgea.br') for i in range(3)]
+        cls.lotado = criar_evento(cls.organizador, cls.professor, vagas=2, nome='Lotado')
+        cls.aberto = criar_evento(cls.organizador, cls.professor, vagas=3, nome='Aberto')
+        for aluno in cls.alunos[:2]:
+            Inscricao.objects.inscrever(aluno, cls.lotado)
+        Inscricao.objects.inscrever(cls.alunos[0], cls.aberto)
+
+    def test_vagas_restantes_anotadas(self):
+        restantes = dict(Evento.objects.com_vagas_restantes().values_list('nome', 'vagas_restantes'))
+        self.assertEqual(restantes, {'Lotado': 0, 'Aberto': 2})
+
+    def test_filtro_remove_eventos_lotados(self):
+        with self.assertNumQueries(1):
+            resposta = self.client.get(reverse('home'), {'com_vagas': '1'})
+        self.assertEqual([evento.nome for evento in resposta.context['eventos']], ['Aberto'])
+
+    def test_dashboard_do_organizador_em_uma_consulta(self):
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('dashboard'))
+        eventos = resposta.context['eventos_organizados']
+        # Vagas e professor já vêm na consulta da listagem
+        with self.assertNumQueries(0):
+            linhas = [(evento.vagas_restantes, evento.professor_responsavel.nome) for evento in eventos]
+        self.assertIn((0, self.professor.nome), linhas)
+
+
+@CONFIGURACAO_TESTES
+class EmissaoCertificadosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor, dias=-5, vagas=20)
+        alunos = [criar_usuario(f'aluno{i}@sgea.br') for i in range(6)]
+        Inscricao.objects.bulk_create([
+            Inscricao(usuario=aluno, evento=cls.evento, presenca_confirmada=i < 4)
+            for i, aluno in enumerate(alunos)
+        ])
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_emite_apenas_presencas_confirmadas(self):
+        resultado = emitir_certificados_evento(self.evento, processos=1, tamanho_lote=3)
+        self.assertEqual(resultado.emitidos, 4)
+        certificado = Certificado.objects.select_related('inscricao__usuario').first()
+        self.assertEqual(certificado.status_emissao, 'Emitido')
+        self.assertIn(certificado.inscricao.usuario.nome, certificado.texto_certificado)
+        self.assertTrue(certificado.arquivo_certificado.read().startswith(b'%PDF-1.4'))
+
+    def test_emissao_idempotente(self):
+        emitir_certificados_evento(self.evento, processos=1)
+        resultado = emitir_certificados_evento(self.evento, processos=1)
+        self.assertEqual(resultado.emitidos, 0)
+        self.assertEqual(Certificado.objects.count(), 4)
+
+    def test_emissao_retomada_processa_somente_faltantes(self):
+        Inscricao.objects.filter(evento=self.evento, presenca_confirmada=False).update(presenca_confirmada=True)
+        emitir_certificados_evento(self.evento, processos=1, tamanho_lote=6)
+        Certificado.objects.filter(pk__in=Certificado.objects.values('pk')[:2]).delete()
+        resultado = emitir_certificados_evento(self.evento, processos=2)
+        self.assertEqual(resultado.emitidos, 2)
+        self.assertEqual(Certificado.objects.count(), 6)
+
+    def test_emissao_concorrente_nao_mexe_no_arquivo_da_outra(self):
+        # Outra execução grava o certificado da primeira inscrição enquanto esta renderiza
+        primeira = inscricoes_pendentes(self.evento).order_by('id').first()
+        renderizar = certificados.renderizar_certificado
+
+        def renderizar_em_corrida(dados):
+            if dados['id'] == primeira.id:
+                nome = certificados.caminho_do_arquivo(self.evento.pk, primeira.id)
+                Certificado.objects.create(
+                    inscricao=primeira, texto_certificado='outra', status_emissao='Emitido',
+                    arquivo_certificado=default_storage.save(nome, ContentFile(b'%PDF-outra')),
+                )
+            return renderizar(dados)
+
+        with mock.patch.object(certificados, 'renderizar_certificado', renderizar_em_corrida):
+            resultado = emitir_certificados_evento(self.evento, processos=1)
+        self.assertEqual(resultado.emitidos, 3)
+        certificado = Certificado.objects.get(inscricao=primeira)
+        self.assertEqual(certificado.texto_certificado, 'outra')
+        self.assertEqual(certificado.arquivo_certificado.read(), b'%PDF-outra')
+        # O PDF desta execução, sem registro, foi descartado
+        self.assertEqual(len(os.listdir(os.path.join(self.media, 'certificados', f'evento_{self.evento.pk}'))), 4)
+
+    def test_arquivo_de_execucao_interrompida_e_removido(self):
+        primeira = inscricoes_pendentes(self.evento).order_by('id').first()
+        sobra = default_storage.save(certificados.caminho_do_arquivo(self.evento.pk, primeira.id), ContentFile(b'%PDF-sobra'))
+        emitir_certificados_evento(self.evento, processos=1)
+        certificado = Certificado.objects.get(inscricao=primeira)
+        self.assertTrue(certificado.arquivo_certificado.read().startswith(b'%PDF-1.4'))
+        self.assertFalse(default_storage.exists(sobra))
+
+    def test_view_emitir_certificados(self):
+        self.client.force_login(self.organizador)
+        url = reverse('emitir_certificados', args=[self.evento.id])
+        self.assertContains(self.client.get(url), 'Certificados pendentes:</strong> 4')
+        resposta = self.client.post(url)
+        self.assertRedirects(resposta, reverse('dashboard'))
+        # A requisição apenas agenda; o processo de emissão emite em seguida
+        self.assertEqual(Certificado.objects.count(), 0)
+        processados = emitir_eventos_encerrados('maquina-a:1', processos=1)
+        self.assertEqual([resultado.emitidos for _, resultado in processados], [4])
+        self.assertEqual(Certificado.objects.count(), 4)
+
+    def test_zip_de_certificados_em_streaming(self):
+        emitir_certificados_evento(self.evento, processos=1)
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('baixar_certificados', args=[self.evento.id]))
+        self.assertTrue(resposta.streaming)
+        arquivo = zipfile.ZipFile(BytesIO(b''.join(resposta.streaming_content)))
+        self.assertEqual(len(arquivo.namelist()), 4)
+        self.assertIsNone(arquivo.testzip())
+        self.assertTrue(arquivo.read(arquivo.namelist()[0]).startswith(b'%PDF'))
+
+
+@CONFIGURACAO_TESTES
+class EmissaoAutomaticaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.encerrado = criar_evento(cls.organizador, cls.professor, dias=-5, nome='Encerrado')
+        cls.ativo = criar_evento(cls.organizador, cls.professor, dias=-1, nome='Ativo')
+        cls.futuro = criar_evento(cls.organizador, cls.professor, dias=5, nome='Futuro')
+        for evento in (cls.encerrado, cls.ativo):
+            Inscricao.objects.create(usuario=criar_usuario(f'aluno{evento.pk}@sgea.br'), evento=evento, presenca_confirmada=True)
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_apenas_eventos_encerrados_sao_pendentes(self):
+        self.assertEqual(eventos_encerrados_pendentes(), [self.encerrado.pk])
+        self.assertEqual(self.encerrado.status_certificado(), 'Pronto para Emissão')
+        self.assertEqual(self.ativo.status_certificado(), 'Pendente (Evento Ativo)')
+
+    def test_reserva_e_exclusiva(self):
+        self.assertTrue(reservar_evento(self.encerrado.pk, 'maquina-a:1'))
+        self.assertFalse(reservar_evento(self.encerrado.pk, 'maquina-b:2'))
+        self.assertEqual(eventos_encerrados_pendentes(), [])
+        self.encerrado.refresh_from_db()
+        self.assertEqual(self.encerrado.status_certificado(), 'Em Emissão')
+        self.assertEqual(emitir_eventos_encerrados('maquina-b:2', processos=1), [])
+
+    def test_reserva_abandonada_e_retomada(self):
+        reservar_evento(self.encerrado.pk, 'maquina-a:1')
+        Evento.objects.filter(pk=self.encerrado.pk).update(
+            emissao_reservada_em=timezone.now() - PRAZO_RESERVA - timedelta(minutes=1)
+        )
+        processados = emitir_eventos_encerrados('maquina-b:2', processos=1)
+        self.assertEqual([(evento.pk, resultado.emitidos) for evento, resultado in processados], [(self.encerrado.pk, 1)])
+        self.encerrado.refresh_from_db()
+        self.assertEqual(self.encerrado.status_certificado(), 'Emitidos')
+        self.assertIsNotNone(self.encerrado.certificados_emitidos_em)
+
+    def test_nova_execucao_nao_tem_efeito(self):
+        saida = StringIO()
+        call_command('emitir_certificados', '--encerrados', '--processos', '1', stdout=saida)
+        self.assertIn('1 evento(s) processado(s)', saida.getvalue())
+        call_command('emitir_certificados', '--encerrados', '--processos', '1', stdout=saida)
+        self.assertIn('0 evento(s) processado(s)', saida.getvalue())
+        self.assertEqual(Certificado.objects.count(), 1)
+        self.assertFalse(Certificado.objects.filter(inscricao__evento=self.ativo).exists())
+
+    def test_emissao_manual_devolve_o_evento_a_fila(self):
+        emitir_eventos_encerrados('maquina-a:1', processos=1)
+        self.assertEqual(eventos_encerrados_pendentes(), [])
+        self.client.force_login(self.organizador)
+        self.client.post(reverse('emitir_certificados', args=[self.encerrado.pk]))
+        self.assertEqual(eventos_encerrados_pendentes(), [self.encerrado.pk])
+
+    def test_emissao_manual_respeita_a_reserva(self):
+        self.assertTrue(reservar_evento(self.encerrado.pk, 'maquina-a:1'))
+        self.client.force_login(self.organizador)
+        self.client.post(reverse('emitir_certificados', args=[self.encerrado.pk]))
+        self.encerrado.refresh_from_db()
+        self.assertEqual(self.encerrado.emissao_reservada_por, 'maquina-a:1')
+        self.assertEqual(Certificado.objects.count(), 0)
+
+    def test_edicao_concorrente_preserva_a_reserva(self):
+        # Instância lida pela edição (ou pelo admin) antes da reserva do trabalhador
+        lido_pela_edicao = Evento.objects.get(pk=self.encerrado.pk)
+        self.assertTrue(reservar_evento(self.encerrado.pk, 'maquina-a:1'))
+        lido_pela_edicao.local = 'Sala 2'
+        lido_pela_edicao.save()
+
+        self.encerrado.refresh_from_db()
+        self.assertEqual(self.encerrado.local, 'Sala 2')
+        self.assertEqual(
+            (self.encerrado.emissao_status, self.encerrado.emissao_reservada_por),
+            ('Em Processamento', 'maquina-a:1'),
+        )
+        self.assertFalse(reservar_evento(self.encerrado.pk, 'maquina-b:2'))
+
+
+def imagem_enviada(largura, altura, formato='JPEG', nome='banner.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (largura, altura), 'navy').save(buffer, formato)
+    return SimpleUploadedFile(nome, buffer.getvalue(), content_type=f'image/{formato.lower()}')
+
+
+@CONFIGURACAO_TESTES
+class BannerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.client.force_login(self.organizador)
+
+    def enviar_evento(self, banner, url=None):
+        inicio = timezone.now().date() + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self.client.post(url or reverse('criar_evento'), {
+                'nome': 'Com Banner', 'tipo_evento': 'Palestra', 'data_inicial': inicio, 'data_final': inicio,
+                'horario': '10:00', 'local': 'Sala 1', 'quantidade_participantes': 10,
+                'professor_responsavel': self.professor.id, 'banner': banner,
+            })
+        return resposta
+
+    def test_miniaturas_geradas_apos_o_upload(self):
+        self.assertRedirects(self.enviar_evento(imagem_enviada(1200, 600)), reverse('dashboard'))
+        evento = Evento.objects.get()
+        self.assertEqual(evento.banner_larguras, [])  # a requisição não gera as miniaturas
+
+        banners.processador.descarregar()
+        evento.refresh_from_db()
+        self.assertEqual(evento.banner_larguras, [160, 320, 640])
+        with Image.open(os.path.join(self.media, banners.caminho_miniatura(evento.banner.name, 320, 'webp'))) as miniatura:
+            self.assertEqual((miniatura.format, miniatura.size), ('WEBP', (320, 160)))
+
+        self.client.logout()
+        for url in (reverse('home'), reverse('detalhe_evento', args=[evento.pk])):
+            resposta = self.client.get(url)
+            self.assertContains(resposta, 'type="image/webp"')
+            self.assertContains(resposta, f"{banners.url_miniatura(evento.banner.name, 640, 'jpg')} 640w")
+
+    def test_banner_pequeno_nao_e_ampliado(self):
+        self.enviar_evento(imagem_enviada(100, 50, 'PNG', 'banner.png'))
+        banners.processador.descarregar()
+        self.assertEqual(Evento.objects.get().banner_larguras, [100])
+
+    def test_troca_de_banner_descarta_miniaturas_antigas(self):
+        self.enviar_evento(imagem_enviada(800, 400))
+        banners.processador.descarregar()
+        evento = Evento.objects.get()
+        self.enviar_evento(imagem_enviada(400, 200, nome='novo.jpg'), reverse('editar_evento', args=[evento.pk]))
+        evento.refresh_from_db()
+        self.assertEqual(evento.banner_larguras, [])
+        banners.processador.descarregar()
+        evento.refresh_from_db()
+        self.assertEqual(evento.banner_larguras, [160, 320])
+
+    def test_edicao_concorrente_preserva_as_miniaturas(self):
+        self.enviar_evento(imagem_enviada(800, 400))
+        # Instância lida pela edição antes de a geração em segundo plano terminar
+        lido_pela_edicao = Evento.objects.get()
+        banners.processador.descarregar()
+        lido_pela_edicao.local = 'Sala 2'
+        lido_pela_edicao.save()
+
+        evento = Evento.objects.get()
+        self.assertEqual((evento.local, evento.banner_larguras), ('Sala 2', [160, 320, 640]))
+
+    def test_validacao_do_banner(self):
+        resposta = self.enviar_evento(imagem_enviada(100, 50, 'BMP', 'banner.bmp'))
+        self.assertContains(resposta, 'Formato de banner não aceito')
+        with mock.patch.object(banners, 'PIXELS_MAXIMOS_BANNER', 1000):
+            resposta = self.enviar_evento(imagem_enviada(100, 50))
+        self.assertContains(resposta, 'reduza a imagem')
+        self.assertFalse(Evento.objects.exists())
+
+    def test_comando_gera_miniaturas_dos_banners_existentes(self):
+        for i in range(3):
+            evento = criar_evento(self.organizador, self.professor, nome=f'Antigo {i}')
+            evento.banner.save(f'antigo{i}.jpg', imagem_enviada(400, 200))
+        saida = StringIO()
+        call_command('gerar_miniaturas_banners', '--processos', '2', stdout=saida)
+        self.assertIn('Miniaturas geradas para 3 banner(s)', saida.getvalue())
+        self.assertEqual(set(map(tuple, Evento.objects.values_list('banner_larguras', flat=True))), {(160, 320)})
+        call_command('gerar_miniaturas_banners', stdout=saida)
+        self.assertIn('Nenhum banner pendente', saida.getvalue())
+
+
+@CONFIGURACAO_TESTES
+class FeedsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.futuro = criar_evento(cls.organizador, cls.professor, nome='Semana de Computação; Edição, Especial')
+        cls.passado = criar_evento(cls.organizador, cls.professor, dias=-10, nome='Evento Passado')
+        cls.url_agenda = reverse('calendario_usuario', args=[calendario.gerar_token_agenda(cls.aluno.pk)])
+
+    def test_feed_ics_dos_eventos_futuros(self):
+        Evento.objects.filter(pk=self.futuro.pk).update(nome='Á' * 100)
+        resposta = self.client.get(reverse('calendario_eventos'))
+        self.assertEqual(resposta['Content-Type'], 'text/calendar; charset=utf-8')
+        conteudo = b''.join(resposta.streaming_content)
+        linhas = conteudo.split(b'\r\n')
+        self.assertEqual(linhas[0], b'BEGIN:VCALENDAR')
+        self.assertTrue(all(len(linha) <= 75 for linha in linhas))  # linhas longas são dobradas
+        texto = conteudo.decode().replace('\r\n ', '')
+        self.assertIn(f'UID:evento-{self.futuro.pk}@sgea', texto)
+        self.assertIn(f'SUMMARY:{"Á" * 100} (Palestra)', texto)
+        self.assertNotIn(f'UID:evento-{self.passado.pk}@sgea', texto)
+
+    async def test_feed_ics_em_streaming_assincrono_sob_asgi(self):
+        resposta = await self.async_client.get(reverse('calendario_eventos'))
+        self.assertTrue(resposta.is_async)
+        texto = b''.join([parte async for parte in resposta.streaming_content]).decode().replace('\r\n ', '')
+        self.assertIn(f'UID:evento-{self.futuro.pk}@sgea', texto)
+
+    def test_texto_escapado(self):
+        resposta = self.client.get(reverse('calendario_eventos'))
+        texto = b''.join(resposta.streaming_content).decode().replace('\r\n ', '')
+        self.assertIn('SUMMARY:Semana de Computação\\; Edição\\, Especial (Palestra)', texto)
+
+    def test_consulta_sem_alteracoes_recebe_304_com_uma_consulta(self):
+        resposta = self.client.get(reverse('calendario_eventos'))
+        etag = resposta['ETag']
+        with self.assertNumQueries(1):
+            resposta = self.client.get(reverse('calendario_eventos'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual(resposta.content, b'')
+
+        # Uma inscrição altera as vagas (UPDATE do contador) e, portanto, a versão
+        Inscricao.objects.inscrever(self.aluno, self.futuro)
+        resposta = self.client.get(reverse('calendario_eventos'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_remocao_altera_o_etag(self):
+        outro = criar_evento(self.organizador, self.professor, dias=20, nome='Outro')
+        etag = self.client.get(reverse('catalogo_json'))['ETag']
+        outro.delete()
+        self.assertNotEqual(self.client.get(reverse('catalogo_json'))['ETag'], etag)
+
+    def test_agenda_do_usuario(self):
+        self.assertEqual(self.client.get(self.url_agenda + 'x').status_code, 404)
+        self.assertEqual(self.client.get(reverse('calendario_usuario', args=['1:falso'])).status_code, 404)
+
+        resposta = self.client.get(self.url_agenda)
+        etag = resposta['ETag']
+        self.assertIn('private', resposta['Cache-Control'])
+        self.assertNotIn(b'BEGIN:VEVENT', b''.join(resposta.streaming_content))
+
+        Inscricao.objects.inscrever(self.aluno, self.futuro)
+        resposta = self.client.get(self.url_agenda, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn(f'UID:evento-{self.futuro.pk}@sgea'.encode(), b''.join(resposta.streaming_content))
+
+    def test_catalogo_json_paginado(self):
+        for i in range(3):
+            criar_evento(self.organizador, self.professor, dias=20 + i, nome=f'Extra {i}')
+        with mock.patch.object(views, 'EVENTOS_POR_PAGINA_JSON', 2):
+            dados = self.client.get(reverse('catalogo_json')).json()
+            self.assertEqual([evento['nome'] for evento in dados['eventos']], [self.futuro.nome, 'Extra 0'])
+            self.assertEqual(dados['eventos'][0]['vagas_restantes'], 10)
+            seguinte = self.client.get(dados['proxima']).json()
+        self.assertEqual([evento['nome'] for evento in seguinte['eventos']], ['Extra 1', 'Extra 2'])
+        self.assertIsNone(seguinte['proxima'])
+
+    def test_if_modified_since(self):
+        resposta = self.client.get(reverse('catalogo_json'))
+        resposta = self.client.get(reverse('catalogo_json'), HTTP_IF_MODIFIED_SINCE=resposta['Last-Modified'])
+        self.assertEqual(resposta.status_code, 304)
+
+
+@CONFIGURACAO_TESTES
+class BuscaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.semana = criar_evento(cls.organizador, cls.professor, nome='Semana de Computação', local='Auditório')
+        cls.biologia = criar_evento(cls.organizador, cls.professor, nome='Biologia Marinha', local='Laboratório de Computação')
+        cls.passado = criar_evento(cls.organizador, cls.professor, dias=-5, nome='Computação Antiga')
+
+    def nomes(self, texto, usuario=None, somente_com_vagas=False):
+        return [evento.nome for evento in async_to_sync(abuscar_no_catalogo)(texto, usuario, somente_com_vagas)]
+
+    def test_sem_acentos_por_prefixo_e_por_relevancia(self):
+        # O nome pesa mais que o local; eventos que já começaram ficam de fora
+        self.assertEqual(self.nomes('computacao'), ['Semana de Computação', 'Biologia Marinha'])
+        self.assertEqual(self.nomes('SEM comp'), ['Semana de Computação'])
+        self.assertEqual(self.nomes('labor'), ['Biologia Marinha'])
+        self.assertEqual(self.nomes('"NOT" *'), [])
+
+    def test_filtros_de_inscricao_e_vagas(self):
+        Inscricao.objects.inscrever(self.aluno, self.semana)
+        self.assertEqual(self.nomes('computacao', self.aluno), ['Biologia Marinha'])
+        Evento.objects.filter(pk=self.biologia.pk).update(quantidade_participantes=0)
+        self.assertEqual(self.nomes('computacao', somente_com_vagas=True), ['Semana de Computação'])
+
+    def test_indice_acompanha_alteracoes(self):
+        self.semana.nome = 'Jornada de Física'
+        self.semana.save()
+        self.assertEqual(self.nomes('fisica'), ['Jornada de Física'])
+        self.assertEqual(self.nomes('semana'), [])
+        self.biologia.delete()
+        self.assertEqual(self.nomes('computacao'), [])
+
+    def test_reindexar_apos_bulk_create(self):
+        inicio = timezone.now().date() + timedelta(days=5)
+        Evento.objects.bulk_create([Evento(
+            nome='Congresso de Educação', tipo_evento='Palestra', local='Ginásio', data_inicial=inicio,
+            data_final=inicio, horario='10:00', quantidade_participantes=5,
+            organizador=self.organizador, professor_responsavel=self.professor,
+        )])
+        self.assertEqual(self.nomes('educacao'), [])
+        call_command('reindexar_busca', stdout=StringIO())
+        self.assertEqual(self.nomes('educacao'), ['Congresso de Educação'])
+
+    def test_busca_na_lista_de_eventos(self):
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('home'), {'q': 'computação'})
+        self.assertEqual([evento.nome for evento in resposta.context['eventos']], ['Semana de Computação', 'Biologia Marinha'])
+        self.assertContains(resposta, 'Resultados para "computação"')
+
+
+@CONFIGURACAO_TESTES
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.outro_organizador = criar_usuario('org2@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.eventos = [criar_evento(cls.organizador, cls.professor, dias=dias) for dias in (3, 5, 7)]
+        cls.lotado = criar_evento(cls.organizador, cls.professor, dias=9, vagas=0)
+        cls.passado = criar_evento(cls.organizador, cls.professor, dias=-3)
+
+    def enviar(self, metodo, url, dados):
+        return getattr(self.client, metodo)(url, json.dumps(dados), content_type='application/json')
+
+    def test_lista_com_campos_e_cursor(self):
+        with self.assertNumQueries(1):
+            dados = self.client.get(reverse('api_eventos'), {'fields': 'nome,vagas_restantes', 'limite': 2}).json()
+        self.assertEqual(dados['resultados'], [
+            {'nome': self.eventos[0].nome, 'vagas_restantes': 10},
+            {'nome': self.eventos[1].nome, 'vagas_restantes': 10},
+        ])
+        seguinte = self.client.get(dados['proxima']).json()
+        self.assertEqual([evento['nome'] for evento in seguinte['resultados']], [self.eventos[2].nome, self.lotado.nome])
+        self.assertIsNone(seguinte['proxima'])
+
+        resposta = self.client.get(reverse('api_eventos'), {'fields': 'nome,senha'})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('nome', resposta.json()['disponiveis'])
+
+    def test_inscricao_em_lote(self):
+        self.client.force_login(self.aluno)
+        ids = [self.eventos[0].pk, self.lotado.pk, self.passado.pk, 999999, self.eventos[1].pk]
+        dados = self.enviar('post', reverse('api_inscricoes'), {'eventos': ids}).json()
+        self.assertEqual(dados['inscritos'], 2)
+        self.assertEqual(
+            [resultado.get('motivo') for resultado in dados['resultados']],
+            [None, 'vagas_esgotadas', 'negada', 'nao_encontrado', None],
+        )
+        self.assertEqual(Evento.objects.get(pk=self.eventos[0].pk).vagas_ocupadas, 1)
+
+        repetida = self.enviar('post', reverse('api_inscricoes'), {'eventos': [self.eventos[0].pk]}).json()
+        self.assertEqual(repetida['resultados'][0]['motivo'], 'duplicada')
+        self.assertEqual(self.enviar('post', reverse('api_inscricoes'), {'eventos': 'todos'}).status_code, 400)
+
+        lista = self.client.get(reverse('api_inscricoes'), {'fields': 'evento,evento_nome'}).json()
+        self.assertEqual([inscricao['evento'] for inscricao in lista['resultados']], [self.eventos[0].pk, self.eventos[1].pk])
+
+    def test_cancelamento(self):
+        inscricao = Inscricao.objects.inscrever(self.aluno, self.eventos[0])
+        url = reverse('api_inscricao', args=[inscricao.pk])
+        self.assertEqual(self.client.delete(url).status_code, 401)
+        self.client.force_login(self.professor)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.client.force_login(self.aluno)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Inscricao.objects.filter(pk=inscricao.pk).exists())
+        self.assertEqual(Evento.objects.get(pk=self.eventos[0].pk).vagas_ocupadas, 0)
+
+    def test_criacao_e_edicao_de_evento(self):
+        amanha = (timezone.now().date() + timedelta(days=1)).isoformat()
+        novo = {
+            'nome': 'Oficina de API', 'tipo_evento': 'Minicurso', 'data_inicial': amanha, 'data_final': amanha,
+            'horario': '09:00', 'local': 'Sala 1', 'quantidade_participantes': 20,
+            'professor_responsavel': self.professor.pk,
+        }
+        self.client.force_login(self.aluno)
+        self.assertEqual(self.enviar('post', reverse('api_eventos'), novo).status_code, 403)
+
+        self.client.force_login(self.organizador)
+        ontem = (timezone.now().date() - timedelta(days=1)).isoformat()
+        invalido = self.enviar('post', reverse('api_eventos'), dict(novo, data_inicial=ontem))
+        self.assertEqual(invalido.status_code, 400)
+        self.assertIn('data_inicial', invalido.json()['erros'])
+
+        criado = self.enviar('post', reverse('api_eventos'), novo)
+        self.assertEqual(criado.status_code, 201)
+        evento_id = criado.json()['id']
+        self.assertEqual(Evento.objects.get(pk=evento_id).organizador, self.organizador)
+
+        url = reverse('api_evento', args=[evento_id])
+        alterado = self.enviar('patch', url, {'local': 'Sala 2'}).json()
+        self.assertEqual((alterado['local'], alterado['nome']), ('Sala 2', 'Oficina de API'))
+        self.client.force_login(self.outro_organizador)
+        self.assertEqual(self.enviar('patch', url, {'local': 'Sala 3'}).status_code, 404)
+
+    def test_certificados_do_usuario(self):
+        inscricao = Inscricao.objects.create(usuario=self.aluno, evento=self.passado, presenca_confirmada=True)
+        Certificado.objects.create(inscricao=inscricao, texto_certificado='Certificado', status_emissao='Emitido')
+        self.client.force_login(self.aluno)
+        dados = self.client.get(reverse('api_certificados'), {'fields': 'evento,status_emissao'}).json()
+        self.assertEqual(dados['resultados'], [{'evento': self.passado.pk, 'status_emissao': 'Emitido'}])
+        self.client.force_login(self.professor)
+        self.assertEqual(self.client.get(reverse('api_certificados')).json()['resultados'], [])
+
+
+@CONFIGURACAO_TESTES
+class ListaInscritosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor, vagas=50)
+        cls.alunos = [criar_usuario(f'aluno{i}@sgea.br') for i in range(5)]
+        for aluno in cls.alunos:
+            Inscricao.objects.inscrever(aluno, cls.evento)
+
+    def setUp(self):
+        self.client.force_login(self.organizador)
+        self.url = reverse('lista_inscritos', args=[self.evento.id])
+
+    def confirmadas(self):
+        return set(Inscricao.objects.filter(presenca_confirmada=True).values_list('usuario__login', flat=True))
+
+    def test_lista_paginada_sem_consulta_por_inscrito(self):
+        resposta = self.client.get(self.url)
+        self.assertContains(resposta, 'aluno4@sgea.br')
+        with self.assertNumQueries(0):
+            [inscricao.usuario.login for inscricao in resposta.context['inscricoes']]
+
+    def test_confirmar_selecionadas_em_um_update(self):
+        ids = list(Inscricao.objects.filter(usuario__in=self.alunos[:2]).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as contexto:
+            Inscricao.objects.confirmar_presenca(self.evento, ids=ids)
+        self.assertEqual(self.confirmadas(), {'aluno0@sgea.br', 'aluno1@sgea.br'})
+        # Um UPDATE nas inscrições e um único GROUP BY para recalcular as estatísticas
+        self.assertEqual(contar_comandos(contexto, 'UPDATE "sgea_app_inscricao"'), 1)
+        self.assertEqual(contar_comandos(contexto, 'GROUP BY'), 1)
+        self.assertEqual(EstatisticaEvento.objects.get(evento=self.evento).presencas, 2)
+
+    def test_confirmar_todas(self):
+        self.client.post(self.url, {'acao': 'confirmar_todas'})
+        self.assertEqual(len(self.confirmadas()), 5)
+
+    def test_confirmar_por_csv(self):
+        conteudo = 'login\naluno1@sgea.br\naluno3@sgea.br\nintruso@sgea.br\n'
+        arquivo = SimpleUploadedFile('presenca.csv', conteudo.encode(), content_type='text/csv')
+        resposta = self.client.post(self.url, {'acao': 'importar_csv', 'arquivo': arquivo}, follow=True)
+        self.assertEqual(self.confirmadas(), {'aluno1@sgea.br', 'aluno3@sgea.br'})
+        self.assertContains(resposta, 'intruso@sgea.br')
+
+    def test_csv_processado_em_lotes(self):
+        logins = [aluno.login for aluno in self.alunos]
+        with CaptureQueriesContext(connection) as contexto:
+            confirmadas, nao_encontrados = Inscricao.objects.confirmar_presenca_por_login(
+                self.evento, iter(logins), tamanho_lote=3
+            )
+        self.assertEqual((confirmadas, nao_encontrados), (5, []))
+        # Dois lotes: uma busca e um UPDATE por lote; as estatísticas são recalculadas uma vez no final
+        self.assertEqual(contar_comandos(contexto, 'UPDATE "sgea_app_inscricao"'), 2)
+        self.assertEqual(contar_comandos(contexto, 'GROUP BY'), 1)
+        self.assertEqual(EstatisticaEvento.objects.get(evento=self.evento).presencas, 5)
+
+
+@CONFIGURACAO_TESTES
+class CheckinTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.outro_organizador = criar_usuario('org2@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.evento = criar_evento(cls.organizador, cls.professor)
+        cls.inscricao = Inscricao.objects.inscrever(cls.aluno, cls.evento)
+
+    def checkin(self, token):
+        return self.client.post(reverse('checkin', args=[token]))
+
+    def test_checkin_confirma_com_um_update(self):
+        self.client.force_login(self.organizador)
+        token = self.inscricao.token_checkin()
+        # Sessão, usuário, o UPDATE condicional e as estatísticas (o perfil e a instituição
+        # do inscrito e dois contadores), na transação aberta por dois comandos de savepoint
+        with self.assertNumQueries(8):
+            resposta = self.checkin(token)
+        self.assertEqual(resposta.json()['status'], 'confirmada')
+        self.inscricao.refresh_from_db()
+        self.assertTrue(self.inscricao.presenca_confirmada)
+
+    def test_segunda_leitura_e_segura(self):
+        self.client.force_login(self.organizador)
+        token = self.inscricao.token_checkin()
+        self.checkin(token)
+        resposta = self.checkin(token)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], 'ja_confirmada')
+
+    def test_token_adulterado(self):
+        self.client.force_login(self.organizador)
+        token = self.inscricao.token_checkin().replace(f'{self.inscricao.pk}-', '999-', 1)
+        self.assertEqual(self.checkin(token).status_code, 400)
+
+    def test_organizador_de_outro_evento(self):
+        self.client.force_login(self.outro_organizador)
+        self.assertEqual(self.checkin(self.inscricao.token_checkin()).status_code, 404)
+        self.inscricao.refresh_from_db()
+        self.assertFalse(self.inscricao.presenca_confirmada)
+
+    def test_qrcode_do_dashboard(self):
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('qrcode_checkin', args=[self.inscricao.pk]))
+        self.assertEqual(resposta['Content-Type'], 'image/svg+xml')
+        self.assertTrue(resposta.content.startswith(b'<svg'))
+        self.assertContains(self.client.get(reverse('dashboard')), reverse('qrcode_checkin', args=[self.inscricao.pk]))
+
+        self.client.force_login(criar_usuario('outro@sgea.br'))
+        self.assertEqual(self.client.get(reverse('qrcode_checkin', args=[self.inscricao.pk])).status_code, 404)
+
+    def test_matriz_do_qrcode(self):
+        matriz = qrcode_svg.gerar_matriz('http://testserver' + reverse('checkin', args=[self.inscricao.token_checkin()]))
+        versao = (len(matriz) - 17) // 4
+        self.assertEqual(len(matriz), 17 + 4 * versao)
+        # Padrões de localização nos três cantos (anel escuro externo, claro, centro 3x3 escuro)
+        for x0, y0 in ((0, 0), (len(matriz) - 7, 0), (0, len(matriz) - 7)):
+            self.assertTrue(all(matriz[y0][x0 + i] and matriz[y0 + 6][x0 + i] for i in range(7)))
+            self.assertFalse(matriz[y0 + 1][x0 + 1])
+            self.assertTrue(matriz[y0 + 3][x0 + 3])
+        with self.assertRaises(ValueError):
+            qrcode_svg.gerar_matriz('x' * 300)
+
+    def test_leitura_pelo_celular_abre_a_confirmacao(self):
+        self.client.force_login(self.organizador)
+        url = reverse('checkin', args=[self.inscricao.token_checkin()])
+        resposta = self.client.get(url)
+        self.assertContains(resposta, self.aluno.nome)
+        self.assertContains(resposta, 'Confirmar Presença')
+
+        resposta = self.client.post(url, {'pagina': '1'})
+        self.assertRedirects(resposta, reverse('lista_inscritos', args=[self.evento.pk]), fetch_redirect_response=False)
+        self.inscricao.refresh_from_db()
+        self.assertTrue(self.inscricao.presenca_confirmada)
+
+        self.client.force_login(self.outro_organizador)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@CONFIGURACAO_TESTES
+class AuditoriaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.evento = criar_evento(cls.organizador, cls.professor)
+
+    def setUp(self):
+        # Buffer novo por teste, sem itens deixados por outros testes
+        processador = ProcessadorEmLote(
+            'auditoria', auditoria.processador.processar_lote, tamanho_lote=500,
+            processar_item=auditoria.processador.processar_item,
+        )
+        substituicao = mock.patch.object(auditoria, 'processador', processador)
+        substituicao.start()
+        self.addCleanup(substituicao.stop)
+
+    def test_acoes_sao_bufferizadas_e_gravadas_em_lote(self):
+        self.client.force_login(self.aluno)
+        self.client.get(reverse('inscrever_evento', args=[self.evento.id]))
+        self.client.post(reverse('desinscrever_evento', args=[self.evento.id]))
+        # Nada é gravado durante as requisições
+        self.assertFalse(RegistroAuditoria.objects.exists())
+        with self.assertNumQueries(1):
+            auditoria.descarregar()
+        self.assertEqual(
+            list(RegistroAuditoria.objects.order_by('id').values_list('acao', flat=True)),
+            ['inscricao', 'cancelamento'],
+        )
+
+    def test_lote_cheio_e_gravado_automaticamente(self):
+        for _ in range(auditoria.processador.tamanho_lote):
+            auditoria.registrar(self.aluno, 'inscricao', self.evento)
+        self.assertEqual(RegistroAuditoria.objects.count(), auditoria.processador.tamanho_lote)
+
+    def test_tela_filtra_e_pagina(self):
+        for i in range(60):
+            auditoria.registrar(self.aluno if i % 2 else self.organizador, 'inscricao', self.evento)
+        auditoria.descarregar()
+        self.client.force_login(self.organizador)
+
+        resposta = self.client.get(reverse('registros_auditoria'), {'login': 'aluno@sgea.br'})
+        self.assertEqual(len(resposta.context['registros']), 30)
+        self.assertIsNone(resposta.context['proximo_cursor'])
+
+        resposta = self.client.get(reverse('registros_auditoria'))
+        primeira_pagina = resposta.context['registros']
+        self.assertEqual(len(primeira_pagina), 50)
+        resposta = self.client.get(reverse('registros_auditoria'), {'cursor': resposta.context['proximo_cursor']})
+        self.assertEqual(len(resposta.context['registros']), 10)
+        self.assertLess(resposta.context['registros'][0].id, primeira_pagina[-1].id)
+
+    def test_organizador_ve_apenas_os_proprios_registros(self):
+        outro = criar_usuario('outro@sgea.br', 'Organizador')
+        evento_do_outro = criar_evento(outro, self.professor)
+        auditoria.registrar(self.aluno, 'inscricao', self.evento)
+        auditoria.registrar(self.aluno, 'inscricao', evento_do_outro)
+        auditoria.registrar(outro, 'criar_evento', evento_do_outro)
+        auditoria.registrar(self.organizador, 'editar_evento', evento_do_outro)
+        auditoria.descarregar()
+
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('registros_auditoria'))
+        vistos = {(registro.usuario.login, registro.evento.pk) for registro in resposta.context['registros']}
+        self.assertEqual(vistos, {('aluno@sgea.br', self.evento.pk), ('org@sgea.br', evento_do_outro.pk)})
+
+        outro.is_staff = True
+        outro.save(update_fields=['is_staff'])
+        self.client.force_login(outro)
+        self.assertEqual(len(self.client.get(reverse('registros_auditoria')).context['registros']), 4)
+
+    def test_criar_evento_e_auditado(self):
+        self.client.force_login(self.organizador)
+        inicio = timezone.now().date() + timedelta(days=3)
+        self.client.post(reverse('criar_evento'), {
+            'nome': 'Novo', 'tipo_evento': 'Palestra', 'data_inicial': inicio, 'data_final': inicio,
+            'horario': '10:00', 'local': 'Sala 1', 'quantidade_participantes': 10,
+            'professor_responsavel': self.professor.id,
+        })
+        auditoria.descarregar()
+        registro = RegistroAuditoria.objects.get()
+        self.assertEqual((registro.acao, registro.evento.nome), ('criar_evento', 'Novo'))
+
+    def test_item_invalido_nao_descarta_o_lote(self):
+        gravados = []
+
+        def gravar(itens):
+            if 'invalido' in itens:
+                raise ValueError(itens)
+            gravados.extend(itens)
+
+        processador = ProcessadorEmLote('teste', gravar, tamanho_lote=10)
+        for item in ('a', 'invalido', 'b'):
+            processador.enfileirar(item)
+        with self.assertLogs('sgea_app.filas', 'ERROR'):
+            processador.descarregar()
+        self.assertEqual(gravados, ['a', 'b'])
+
+
+@CONFIGURACAO_TESTES
+class AuditoriaReferenciaRemovidaTests(TransactionTestCase):
+    """ Fora de uma transação: a chave estrangeira é verificada a cada INSERT. """
+
+    def test_registro_de_evento_removido_e_mantido(self):
+        organizador = criar_usuario('org@sgea.br', 'Organizador')
+        aluno = criar_usuario('aluno@sgea.br')
+        evento = criar_evento(organizador, criar_usuario('prof@sgea.br', 'Professor'))
+        removido = criar_evento(organizador, evento.professor_responsavel)
+        processador = ProcessadorEmLote(
+            'auditoria', auditoria.processador.processar_lote, tamanho_lote=500,
+            processar_item=auditoria.processador.processar_item,
+        )
+        with mock.patch.object(auditoria, 'processador', processador):
+            auditoria.registrar(aluno, 'inscricao', evento)
+            auditoria.registrar(organizador, 'editar_evento', removido)
+            auditoria.registrar(aluno, 'cancelamento', evento)
+            removido.delete()
+            with self.assertLogs('sgea_app.filas', 'WARNING'):
+                auditoria.descarregar()
+
+        self.assertEqual(
+            list(RegistroAuditoria.objects.order_by('id').values_list('acao', 'evento_id')),
+            [('inscricao', evento.pk), ('editar_evento', None), ('cancelamento', evento.pk)],
+        )
+
+
+@CONFIGURACAO_TESTES
+class ExportacaoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.equipe = criar_usuario('equipe@sgea.br', 'Organizador', is_staff=True)
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor, nome='Semana de Computação')
+        cls.outro_evento = criar_evento(cls.equipe, cls.professor, nome='Outro')
+        for i in range(3):
+            aluno = criar_usuario(f'aluno{i}@sgea.br', nome=f'Aluno Ção {i}')
+            Inscricao.objects.inscrever(aluno, cls.evento)
+            Inscricao.objects.inscrever(aluno, cls.outro_evento)
+
+    def ler_csv(self, resposta):
+        self.assertTrue(resposta.streaming)
+        conteudo = b''.join(resposta.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(conteudo.splitlines()))
+
+    def test_csv_do_evento(self):
+        self.client.force_login(self.organizador)
+        linhas = self.ler_csv(self.client.get(reverse('exportar_inscricoes', args=[self.evento.id])))
+        self.assertEqual(linhas[0][0], 'Inscrição')
+        self.assertEqual(len(linhas), 4)
+        self.assertEqual(linhas[1][3], 'Aluno Ção 0')
+        self.assertEqual(linhas[1][-1], 'Não')
+
+    def test_csv_global_restrito_a_equipe(self):
+        self.client.force_login(self.organizador)
+        self.assertEqual(self.client.get(reverse('exportar_todas_inscricoes')).status_code, 302)
+        self.client.force_login(self.equipe)
+        linhas = self.ler_csv(self.client.get(reverse('exportar_todas_inscricoes')))
+        self.assertEqual(len(linhas), 7)
+
+    async def test_csv_em_streaming_assincrono_sob_asgi(self):
+        # Sob ASGI o iterador é assíncrono: o Django não monta o CSV inteiro na memória
+        await self.async_client.aforce_login(self.organizador)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            resposta = await self.async_client.get(reverse('exportar_inscricoes', args=[self.evento.id]))
+            self.assertTrue(resposta.is_async)
+            conteudo = b''.join([parte async for parte in resposta.streaming_content])
+        linhas = list(csv.reader(conteudo.decode('utf-8-sig').splitlines()))
+        self.assertEqual(len(linhas), 4)
+
+    def test_csv_em_streaming_sincrono_sob_wsgi(self):
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('exportar_inscricoes', args=[self.evento.id]))
+        self.assertFalse(resposta.is_async)
+
+    @skipUnless(exportacao.xlsx_disponivel(), "openpyxl não instalado")
+    def test_xlsx_do_evento(self):
+        import openpyxl
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('exportar_inscricoes', args=[self.evento.id]), {'formato': 'xlsx'})
+        livro = openpyxl.load_workbook(BytesIO(b''.join(resposta.streaming_content)), read_only=True)
+        self.assertEqual(len(list(livro.active.rows)), 4)
+
+
+@CONFIGURACAO_TESTES
+class ImportacaoUsuariosTests(TestCase):
+
+    def test_importa_em_lote_e_rejeita_linhas_invalidas(self):
+        criar_usuario('existente@sgea.br')
+        conteudo = '\n'.join([
+            'nome,telefone,instituicao_ensino,login,perfil,senha',
+            'Ana,(11) 91234-5678,UniSGEA,ana@sgea.br,Aluno,Senha@123',
+            'Bruno,(11) 1234-5678,UniSGEA,bruno@sgea.br,Professor,',
+            'Caio,11912345678,UniSGEA,caio@sgea.br,Aluno,Senha@123',
+            'Duda,(11) 91234-5678,UniSGEA,duda@sgea.br,Diretor,Senha@123',
+            'Eva,(11) 91234-5678,,eva@sgea.br,Aluno,Senha@123',
+            'Fábio,(11) 91234-5678,UniSGEA,existente@sgea.br,Aluno,Senha@123',
+            'Ana 2,(11) 91234-5678,UniSGEA,ana@sgea.br,Aluno,Senha@123',
+            'Gil,(11) 91234-5678,UniSGEA,gil@sgea.br,Aluno,fraca',
+        ])
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.remove, arquivo.name)
+
+        saida = StringIO()
+        call_command('importar_usuarios', arquivo.name, processos=2, lote=2, ativos=True, stdout=saida)
+
+        self.assertEqual(
+            set(Usuario.objects.exclude(login='existente@sgea.br').values_list('login', flat=True)),
+            {'ana@sgea.br', 'bruno@sgea.br'},
+        )
+        ana = Usuario.objects.get(login='ana@sgea.br')
+        self.assertTrue(ana.check_password('Senha@123'))
+        self.assertTrue(ana.is_active)
+        self.assertFalse(Usuario.objects.get(login='bruno@sgea.br').has_usable_password())
+        self.assertIn('2 usuário(s) importado(s) e 6 linha(s) rejeitada(s)', saida.getvalue())
+        self.assertIn('hash de senhas', saida.getvalue())
+
+    def test_rejeita_campos_acima_do_tamanho_do_modelo(self):
+        conteudo = '\n'.join([
+            'nome,telefone,instituicao_ensino,login,perfil,senha',
+            'Ana,(11) 91234-5678,UniSGEA,ana@sgea.br,Aluno,',
+            f'{"N" * 51},(11) 91234-5678,UniSGEA,nome@sgea.br,Aluno,',
+            f'Bia,(11) 91234-5678,UniSGEA,{"b" * 45}@sgea.br,Aluno,',
+            f'Caio,(11) 91234-5678,{"U" * 51},caio@sgea.br,Aluno,',
+            'Duda,(11) 91234-5678,,duda@sgea.br,Organizador,',
+        ])
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.remove, arquivo.name)
+
+        saida = StringIO()
+        call_command('importar_usuarios', arquivo.name, processos=1, stdout=saida)
+
+        self.assertEqual(list(Usuario.objects.values_list('login', flat=True)), ['ana@sgea.br'])
+        self.assertIn('1 usuário(s) importado(s) e 4 linha(s) rejeitada(s)', saida.getvalue())
+        self.assertIn('Nome Completo: máximo de 50 caracteres (51)', saida.getvalue())
+        self.assertIn('Instituição de Ensino: campo obrigatório', saida.getvalue())
+
+
+@CACHE_LOCAL
+@CONFIGURACAO_TESTES
+class CacheCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.outro_aluno = criar_usuario('outro@sgea.br')
+        cls.eventos = [criar_evento(cls.organizador, cls.professor, dias=i + 1, vagas=2) for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def pagina(self, **parametros):
+        return self.client.get(reverse('home'), parametros).context['eventos']
+
+    def test_visitante_anonimo_e_servido_do_cache(self):
+        with self.assertNumQueries(1):
+            self.pagina()
+        # As vagas lidas com a página não vão para o cache: a primeira leitura da página
+        # em cache as busca (e guarda)
+        with self.assertNumQueries(1):
+            self.pagina()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.pagina()), 3)
+
+    def test_alterar_evento_invalida_o_catalogo(self):
+        self.pagina()
+        evento = self.eventos[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            evento.nome = 'Nome Atualizado'
+            evento.save()
+        self.assertEqual(self.pagina()[0].nome, 'Nome Atualizado')
+
+    def test_inscricao_invalida_somente_as_vagas_do_evento(self):
+        self.pagina()
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscricao.objects.inscrever(self.aluno, self.eventos[1])
+        # A página continua no cache; só as vagas do evento alterado vão ao banco
+        with self.assertNumQueries(1):
+            eventos = self.pagina()
+        self.assertEqual([evento.vagas_restantes for evento in eventos], [2, 1, 2])
+
+    def test_inscricao_durante_a_leitura_da_pagina(self):
+        ler_pagina = catalogo.paginar_por_chave
+
+        def ler_e_inscrever(*args, **kwargs):
+            pagina = ler_pagina(*args, **kwargs)
+            # Inscrição confirmada (e vagas invalidadas) antes de a página ir para o cache
+            with self.captureOnCommitCallbacks(execute=True):
+                Inscricao.objects.inscrever(self.aluno, self.eventos[0])
+            return pagina
+
+        with mock.patch.object(catalogo, 'paginar_por_chave', ler_e_inscrever):
+            catalogo.pagina_do_catalogo(None)
+        eventos, _ = catalogo.pagina_do_catalogo(None)
+        self.assertEqual([evento.vagas_restantes for evento in eventos], [1, 2, 2])
+
+    def test_inscricao_durante_a_leitura_das_vagas(self):
+        catalogo.pagina_do_catalogo(None)
+        guardar = cache.set_many
+
+        def inscrever_e_guardar(valores, *args, **kwargs):
+            # Vagas já lidas do banco; a inscrição é confirmada antes de elas irem para o cache
+            with self.captureOnCommitCallbacks(execute=True):
+                Inscricao.objects.inscrever(self.aluno, self.eventos[0])
+            return guardar(valores, *args, **kwargs)
+
+        with mock.patch.object(cache, 'set_many', inscrever_e_guardar):
+            catalogo.pagina_do_catalogo(None)
+        eventos, _ = catalogo.pagina_do_catalogo(None)
+        self.assertEqual([evento.vagas_restantes for evento in eventos], [1, 2, 2])
+
+    def test_aluno_recebe_catalogo_compartilhado_sem_seus_eventos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscricao.objects.inscrever(self.aluno, self.eventos[0])
+        self.pagina()
+        self.client.force_login(self.aluno)
+        self.assertEqual([evento.id for evento in self.pagina()], [e.id for e in self.eventos[1:]])
+        # Catálogo e inscrições do aluno já estão no cache: só sessão e usuário vão ao banco
+        with self.assertNumQueries(2):
+            self.pagina()
+
+    def test_corte_de_data_muda_a_meia_noite(self):
+        self.pagina()
+        amanha = timezone.now() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=amanha):
+            # Nova chave para o novo dia: o evento que começa "amanhã" já não aparece
+            self.assertEqual(len(self.pagina()), 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN é específico do SQLite')
+@CONFIGURACAO_TESTES
+class PlanoDeConsultaTests(TestCase):
+    """
+    Regressão dos planos das consultas mais frequentes: cada tabela deve ser
+    acessada por um índice (SEARCH), nunca por uma varredura completa (SCAN).
+    """
+
+    # "SCAN tabela" sem "USING ... INDEX" é uma leitura da tabela inteira
+    # (nas tabelas virtuais do FTS5, o SCAN com MATCH é uma consulta ao índice)
+    VARREDURA_COMPLETA = re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX| VIRTUAL TABLE INDEX \d+:M)')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor)
+
+    def assertSemVarreduraCompleta(self, queryset):
+        plano = queryset.explain()
+        varreduras = self.VARREDURA_COMPLETA.findall(plano)
+        self.assertFalse(varreduras, f'Varredura completa em {varreduras}:\n{plano}')
+
+    def test_catalogo_publico(self):
+        hoje = timezone.now().date()
+        self.assertSemVarreduraCompleta(consulta_catalogo(hoje).order_by('data_inicial', 'id')[:21])
+        self.assertSemVarreduraCompleta(consulta_catalogo(hoje, somente_com_vagas=True).order_by('data_inicial', 'id')[:21])
+
+    def test_primeiro_da_lista_de_espera(self):
+        fila = ListaEspera.objects.filter(evento_id=1).order_by('pk')[:1]
+        self.assertSemVarreduraCompleta(fila)
+        self.assertNotIn('TEMP B-TREE', fila.explain())
+
+    def test_dashboard_do_organizador(self):
+        eventos = Evento.objects.filter(
+            organizador=self.organizador
+        ).select_related('professor_responsavel').com_vagas_restantes().order_by('data_inicial')
+        self.assertSemVarreduraCompleta(eventos)
+        self.assertNotIn('TEMP B-TREE', eventos.explain())
+
+    def test_inscricoes_pendentes_de_certificado(self):
+        self.assertSemVarreduraCompleta(inscricoes_pendentes(self.evento).order_by('id'))
+        self.assertIn('inscricao_presenca_idx', inscricoes_pendentes(self.evento).explain())
+
+    def test_eventos_encerrados_para_emissao(self):
+        self.assertSemVarreduraCompleta(consulta_eventos_encerrados()[:100])
+        self.assertIn('evento_emissao_idx', consulta_eventos_encerrados().explain())
+
+    def test_estatisticas_do_organizador(self):
+        publico = EstatisticaPublico.objects.filter(evento__organizador=self.organizador).order_by().values(
+            'perfil', 'instituicao_ensino',
+        ).annotate(total=Sum('inscricoes'))
+        dias = EstatisticaDiaria.objects.filter(evento__organizador=self.organizador).order_by('dia').values('dia').annotate(
+            total=Sum('inscricoes'),
+        )
+        self.assertSemVarreduraCompleta(publico)
+        self.assertSemVarreduraCompleta(dias)
+
+    def test_lista_de_professores(self):
+        self.assertSemVarreduraCompleta(Usuario.objects.filter(perfil='Professor'))
+
+    def test_busca_textual(self):
+        hoje = timezone.now().date()
+        eventos = busca.buscar(consulta_catalogo(hoje), 'semana comp').exclude(inscricoes__usuario=self.professor)
+        self.assertSemVarreduraCompleta(eventos[:50])
+
+
+@skipUnless(connection.vendor == 'sqlite' and settings.SGEA_SQLITE_CONCORRENTE, 'perfil concorrente do SQLite desativado')
+class PerfilSQLiteTests(TestCase):
+
+    def pragma(self, nome):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nome}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_aplicados_na_conexao(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertGreater(self.pragma('mmap_size'), 0)
+
+    def test_transacoes_comecam_com_lock_de_escrita(self):
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+@CONFIGURACAO_TESTES
+class RoteadorReplicaTests(TestCase):
+    """ O alias 'replica' não existe nos testes: as decisões do roteador são lidas sem consultar o banco. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.evento = criar_evento(cls.organizador, cls.professor)
+
+    def setUp(self):
+        patcher = mock.patch.object(roteador, 'replica_configurada', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def requisitar(self, metodo='get', sessao=None, escrever=False):
+        """ Passa uma requisição pelo middleware até uma view de leitura; devolve (banco lido, sessão). """
+        def view(request):
+            if escrever:
+                router.db_for_write(Inscricao)
+            return HttpResponse(router.db_for_read(Evento))
+
+        request = getattr(RequestFactory(), metodo)('/')
+        request.session = {} if sessao is None else sessao
+        resposta = roteador.RoteamentoMiddleware(roteador.leitura_na_replica(view))(request)
+        return resposta.content.decode(), request.session
+
+    def test_get_em_view_de_leitura_usa_a_replica(self):
+        self.assertEqual(self.requisitar()[0], 'replica')
+        self.assertEqual(router.db_for_read(Evento), 'default')  # fora de uma requisição
+
+    def test_post_fica_no_principal(self):
+        self.assertEqual(self.requisitar('post')[0], 'default')
+
+    def test_escrita_fixa_requisicao_e_sessao_no_principal(self):
+        banco, sessao = self.requisitar(escrever=True)
+        self.assertEqual(banco, 'default')
+        self.assertEqual(self.requisitar(sessao=sessao)[0], 'default')
+
+    def test_fixacao_expira(self):
+        sessao = {roteador.CHAVE_FIXACAO: 0}
+        self.assertEqual(self.requisitar(sessao=sessao)[0], 'replica')
+
+    def test_sem_replica_configurada_tudo_vai_ao_principal(self):
+        with mock.patch.object(roteador, 'replica_configurada', return_value=False):
+            self.assertEqual(self.requisitar()[0], 'default')
+
+    def test_inscricao_fixa_o_dashboard_do_aluno_no_principal(self):
+        self.client.force_login(self.aluno)
+        self.client.get(reverse('inscrever_evento', args=[self.evento.pk]))
+        self.assertTrue(roteador.fixado_no_principal(self.client))
+
+
+@CONFIGURACAO_TESTES
+class ViewsAssincronasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador')
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.aluno = criar_usuario('aluno@sgea.br')
+        cls.evento = criar_evento(cls.organizador, cls.professor, vagas=3)
+        cls.outro = criar_evento(cls.organizador, cls.professor, dias=20)
+        Inscricao.objects.inscrever(cls.aluno, cls.outro)
+
+    def test_detalhe_do_evento(self):
+        self.client.force_login(self.aluno)
+        resposta = self.client.get(reverse('detalhe_evento', args=[self.evento.pk]))
+        self.assertContains(resposta, self.evento.nome)
+        self.assertContains(resposta, '3 de 3')
+        self.assertContains(resposta, reverse('inscrever_evento', args=[self.evento.pk]))
+
+        resposta = self.client.get(reverse('detalhe_evento', args=[self.outro.pk]))
+        self.assertContains(resposta, 'Você está inscrito neste evento.')
+
+    def test_detalhe_de_evento_inexistente(self):
+        self.assertEqual(self.client.get(reverse('detalhe_evento', args=[999])).status_code, 404)
+
+    async def test_catalogo_e_dashboard_pelo_handler_asgi(self):
+        await self.async_client.aforce_login(self.aluno)
+        resposta = await self.async_client.get(reverse('home'))
+        self.assertEqual([evento.id for evento in resposta.context['eventos']], [self.evento.id])
+        self.assertContains(resposta, self.evento.nome)
+
+        resposta = await self.async_client.get(reverse('dashboard'))
+        self.assertEqual([i.evento_id for i in resposta.context['minhas_inscricoes']], [self.outro.id])
+
+    async def test_organizador_e_redirecionado_pelo_handler_asgi(self):
+        await self.async_client.aforce_login(self.organizador)
+        resposta = await self.async_client.get(reverse('home'))
+        self.assertRedirects(resposta, reverse('dashboard'), fetch_redirect_response=False)
+
+
+@CONFIGURACAO_TESTES
+class MetricasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = criar_usuario('org@sgea.br', 'Organizador', is_staff=True)
+        cls.professor = criar_usuario('prof@sgea.br', 'Professor')
+        cls.evento = criar_evento(cls.organizador, cls.professor)
+
+    def setUp(self):
+        metricas.zerar()
+
+    def test_totais_por_view_no_formato_prometheus(self):
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+        self.client.force_login(self.organizador)
+        resposta = self.client.get(reverse('metricas'))
+
+        self.assertEqual(resposta.status_code, 200)
+        texto = resposta.content.decode()
+        self.assertIn('sgea_requisicoes_total{view="home"} 2', texto)
+        # Visitante anônimo: só a consulta do catálogo, duas vezes (sem cache nos testes)
+        self.assertIn('sgea_consultas_sql_total{view="home"} 2', texto)
+        self.assertIn('sgea_tempo_resposta_segundos_count{view="home"} 2', texto)
+        self.assertNotIn('view="metricas"', texto)
+
+    @override_settings(SGEA_SERVER_TIMING=True)
+    def test_cabecalho_server_timing(self):
+        resposta = self.client.get(reverse('detalhe_evento', args=[self.evento.pk]))
+        self.assertRegex(resposta['Server-Timing'], r'^db;dur=[\d.]+;desc="1 consultas", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(SGEA_LIMITE_CONSULTAS=0)
+    def test_sql_registrado_acima_do_limite(self):
+        with self.assertLogs('sgea_app.metricas', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+        self.assertIn('home (GET /) executou 1 consultas SQL', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_endpoint_exige_equipe_ou_token(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        with override_settings(SGEA_METRICAS_TOKEN='segredo'):
+            resposta = self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer segredo')
+            self.assertEqual(resposta.status_code, 200)
+            resposta = self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer errado')
+            self.assertEqual(resposta.status_code, 403)
+
+    async def test_consultas_do_orm_assincrono_sao_contadas(self):
+        await self.async_client.get(reverse('detalhe_evento', args=[self.evento.pk]))
+        self.assertIn('sgea_consultas_sql_total{view="detalhe_evento"} 1', metricas.texto_prometheus())
+
+
+@CACHE_LOCAL
+@CONFIGURACAO_TESTES
+class OrcamentoConsultasTests(TestCase):
+    """
+    Orçamento de consultas SQL por rota (desempenho.ORCAMENTO_CONSULTAS) sobre uma base
+    sintética pequena, mas com várias linhas por página: uma consulta por linha estoura.
+    Com o cache ativo, como no benchmark_rotas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        desempenho.popular_base(usuarios=300, eventos=40, inscricoes_por_evento=8)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rotas_dentro_do_orcamento(self):
+        resultados = desempenho.medir_rotas(repeticoes=2)
+        self.assertEqual(set(resultados), set(desempenho.ORCAMENTO_CONSULTAS))
+        for rotulo, medicao in resultados.items():
+            with self.subTest(rota=rotulo):
+                self.assertLessEqual(medicao['consultas_por_requisicao'], medicao['orcamento_consultas'])
+                self.assertTrue(medicao['dentro_do_orcamento'])
+                # Nenhum orçamento chega ao limite em que o SQL da requisição vai para o log
+                self.assertLessEqual(medicao['orcamento_consultas'], settings.SGEA_LIMITE_CONSULTAS)
+
+    def test_rota_acima_do_orcamento_e_apontada(self):
+        orcamentos = {rotulo: 0 for rotulo in desempenho.ORCAMENTO_CONSULTAS}
+        with mock.patch.dict(desempenho.ORCAMENTO_CONSULTAS, orcamentos):
+            resultados = desempenho.medir_rotas(repeticoes=1, aquecimento=0)
+        self.assertFalse(resultados['desinscrever_evento']['dentro_do_orcamento'])
@@ -6,17 +6,40 @@ urlpatterns = [
     path('', views.lista_eventos, name='home'),             # Lista de eventos (Página inicial)
     path('evento/<int:evento_id>/', views.detalhe_evento, name='detalhe_evento'),
     path('cadastro/', views.cadastro_usuario, name='cadastro_usuario'),
+    path('confirmar/<str:token>/', views.confirmar_cadastro, name='confirmar_cadastro'),
+    path('calendario/eventos.ics', views.calendario_eventos, name='calendario_eventos'),
+    path('calendario/<str:token>.ics', views.calendario_usuario, name='calendario_usuario'),
+    path('catalogo.json', views.catalogo_json, name='catalogo_json'),
     
     # Rotas de Usuário Autenticado (Aluno/Professor/Organizador)
     path('dashboard/', views.dashboard, name='dashboard'), # Página inicial após login
     path('inscrever/<int:evento_id>/', views.inscrever_evento, name='inscrever_evento'),
     path('evento/<int:evento_id>/desinscrever/', views.desinscrever_evento, name='desinscrever_evento'),
+    path('evento/<int:evento_id>/lista_espera/', views.entrar_lista_espera, name='entrar_lista_espera'),
+    path('evento/<int:evento_id>/lista_espera/sair/', views.sair_lista_espera, name='sair_lista_espera'),
+    path('inscricao/<int:inscricao_id>/checkin.svg', views.qrcode_checkin, name='qrcode_checkin'),
     path('meus_certificados/', views.meus_certificados, name='meus_certificados'),
     
     # Rotas de Organizador (Requer perfil 'Organizador')
     path('eventos/novo/', views.criar_evento, name='criar_evento'),
     path('eventos/editar/<int:evento_id>/', views.editar_evento, name='editar_evento'),
     path('evento/<int:evento_id>/inscritos/', views.lista_inscritos, name='lista_inscritos'),
+    path('checkin/<str:token>/', views.checkin, name='checkin'),
     path('evento/<int:evento_id>/emitir_certificados/', views.emitir_certificados, name='emitir_certificados'),
+    path('evento/<int:evento_id>/certificados.zip', views.baixar_certificados, name='baixar_certificados'),
+    path('evento/<int:evento_id>/exportar/', views.exportar_inscricoes, name='exportar_inscricoes'),
+    path('evento/<int:evento_id>/estatisticas/', views.estatisticas_evento, name='estatisticas_evento'),
+    path('estatisticas/', views.estatisticas_organizador, name='estatisticas_organizador'),
     path('auditoria/', views.registros_auditoria, name='registros_auditoria'),
+    
+    # Rotas da Equipe (Requer is_staff)
+    path('exportar/inscricoes/', views.exportar_todas_inscricoes, name='exportar_todas_inscricoes'),
+    path('metricas/', views.metricas, name='metricas'),
+
+    # API JSON (aplicativo móvel)
+    path('api/eventos/', views.api_eventos, name='api_eventos'),
+    path('api/eventos/<int:evento_id>/', views.api_evento, name='api_evento'),
+    path('api/inscricoes/', views.api_inscricoes, name='api_inscricoes'),
+    path('api/inscricoes/<int:inscricao_id>/', views.api_inscricao, name='api_inscricao'),
+    path('api/certificados/', views.api_certificados, name='api_certificados'),
 ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+GET condicional das rotas consultadas periodicamente (feeds ICS e catálogo JSON).
+
+O ETag e o Last-Modified vêm de uma única consulta agregada e barata sobre
+'atualizado_em' (MAX e COUNT, lidos do índice); quando nada mudou, a resposta 304
+sai sem executar a consulta completa e sem gerar o corpo.
+
+O COUNT detecta remoções, que não alteram o MAX(atualizado_em), e a data de hoje
+entra no ETag porque os recortes "eventos futuros" mudam à meia-noite. O
+Last-Modified não tem como refletir uma remoção: clientes que enviam If-None-Match
+(navegadores e aplicativos de calendário) são atendidos pelo ETag, que é exato.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .models import Evento, Inscricao
+
+Versao = namedtuple('Versao', ['etag', 'ultima_alteracao'])
+
+
+def _versao(hoje, total, *ultimas):
+    # Mesmo sem alterações no banco, o conteúdo muda à meia-noite (início do dia em UTC,
+    # o mesmo 'hoje' de timezone.now().date() usado pelos recortes)
+    meia_noite = datetime.combine(hoje, time.min, tzinfo=dt_timezone.utc)
+    ultima_alteracao = max([meia_noite, *(ultima for ultima in ultimas if ultima is not None)])
+    chave = ':'.join([hoje.isoformat(), str(total), *(str(ultima) for ultima in ultimas)])
+    return Versao(hashlib.md5(chave.encode()).hexdigest(), ultima_alteracao)
+
+
+def versao_catalogo_publico(hoje):
+    """ Versão dos eventos que ainda não começaram (o recorte do catálogo público). """
+    agregado = Evento.objects.filter(data_inicial__gt=hoje).aggregate(
+        ultima=Max('atualizado_em'), total=Count('id'),
+    )
+    return _versao(hoje, agregado['total'], agregado['ultima'])
+
+
+def versao_agenda(usuario_id, hoje):
+    """ Versão das inscrições do usuário em eventos que ainda não terminaram (e desses eventos). """
+    agregado = Inscricao.objects.filter(usuario_id=usuario_id, evento__data_final__gte=hoje).aggregate(
+        ultima_inscricao=Max('atualizado_em'), ultimo_evento=Max('evento__atualizado_em'), total=Count('id'),
+    )
+    return _versao(hoje, agregado['total'], agregado['ultima_inscricao'], agregado['ultimo_evento'])
+
+
+def get_condicional(calcular_versao):
+    """
+    Decorador: o condition() do Django com a versão calculada uma única vez por
+    requisição ('calcular_versao' recebe os mesmos argumentos da view e retorna uma Versao).
+    """
+    def versao(request, *args, **kwargs):
+        if not hasattr(request, '_sgea_versao'):
+            request._sgea_versao = calcular_versao(request, *args, **kwargs)
+        return request._sgea_versao
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: versao(request, *args, **kwargs).etag,
+        last_modified_func=lambda request, *args, **kwargs: versao(request, *args, **kwargs).ultima_alteracao,
+    )
@@ -1,13 +1,52 @@
+import asyncio
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.urls import reverse
+from django.http import Http404, HttpResponse, StreamingHttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_http_methods, require_POST, require_safe
+from django.core import signing
 from django.contrib import messages 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import logout
+from django.db import transaction
+from django.db.models import Q
+from django.forms.models import model_to_dict
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.conf import settings
 from .forms import * 
 from .models import *
+from .managers import InscricaoNegada, InscricaoDuplicada, VagasEsgotadas
+from .paginacao import paginar_por_chave
+from .checkin import gerar_token_checkin, verificar_token_checkin
+from .qrcode_svg import gerar_svg
+from .confirmacao import gerar_token_confirmacao, verificar_token_confirmacao
+from .versoes import get_condicional
+from . import api
+from . import auditoria
+from . import banners
+from . import calendario
+from . import exportacao
+from . import catalogo
+from . import emails
+from . import estatisticas
+from . import notificacoes
+from . import versoes
+from . import metricas as metricas_requisicoes
+from .roteador import leitura_na_replica
+from .certificados import inscricoes_pendentes, gerar_zip_certificados, solicitar_emissao
 # Importe o forms.py que criamos no passo anterior.
 
+# Quantidade de inscritos por página na lista de presença do Organizador
+INSCRITOS_POR_PAGINA = 100
+
+# Quantidade de registros por página na tela de auditoria
+REGISTROS_POR_PAGINA = 50
+
+# Quantidade de eventos por página no catálogo JSON
+EVENTOS_POR_PAGINA_JSON = 100
+
 # --- Funções Auxiliares de Permissão ---
 
 def is_organizador(user):
@@ -18,77 +57,119 @@ def is_professor_or_organizador(user):
     """ Verifica se o usuário é um professor ou organizador. """
     return user.is_authenticated and user.perfil in ['Professor', 'Organizador']
 
+def is_equipe(user):
+    """ Verifica se o usuário faz parte da equipe (is_staff), com acesso aos relatórios globais. """
+    return user.is_authenticated and user.is_staff
+
 def is_aluno_or_professor(user):
     """ Verifica se o usuário é um Aluno ou Professor e está ativo/autenticado. """
     return user.is_authenticated and user.perfil in ['Aluno', 'Professor']
 
 # --- Rotas Públicas ---
 
-def lista_eventos(request):
+@leitura_na_replica
+async def lista_eventos(request):
     """
     Exibe a lista de eventos que ainda não começaram e que o usuário (se logado)
     ainda não se inscreveu. Redireciona Organizadores para o dashboard.
+    View async: sob ASGI, a espera pelo banco e pelo cache não ocupa uma thread.
     """
-    hoje = timezone.now().date()
+    somente_com_vagas = request.GET.get('com_vagas') == '1'
+    texto_busca = request.GET.get('q', '').strip()
+    # O usuário é carregado de forma assíncrona e fica disponível para o template
+    request.user = usuario = await request.auser()
+    participante = usuario.is_authenticated and usuario.perfil in ['Aluno', 'Professor']
     
-    # Filtro base: Apenas eventos que ainda não começaram
-    eventos_queryset = Evento.objects.filter(
-        data_inicial__gt=hoje
-    ).order_by('data_inicial')
+    # 1. Restrição para Organizador
+    if usuario.is_authenticated and usuario.perfil == 'Organizador':
+        return redirect('dashboard') 
     
-    if request.user.is_authenticated:
-        # 1. Restrição para Organizador
-        if request.user.perfil == 'Organizador':
-            return redirect('dashboard') 
-        
-        # 2. Filtragem para Aluno/Professor (excluir inscritos)
-        elif request.user.perfil in ['Aluno', 'Professor']:
-            
-            # Pega os IDs dos eventos em que o usuário está inscrito
-            eventos_inscritos_ids = Inscricao.objects.filter(
-                usuario=request.user
-            ).values_list('evento__id', flat=True)
-            
-            # Exclui da listagem todos os eventos que o usuário já está inscrito
-            eventos_disponiveis = eventos_queryset.exclude(
-                id__in=eventos_inscritos_ids
-            )
-            
+    if texto_busca:
+        # 2a. Busca textual: índice de busca do banco, já sem os eventos em que o
+        # Aluno/Professor está inscrito; os mais relevantes primeiro, sem paginação
+        eventos = await catalogo.abuscar_no_catalogo(texto_busca, usuario if participante else None, somente_com_vagas)
+        proximo_cursor = None
     else:
-        # 3. Usuário Não Logado (vê todos os eventos futuros)
-        eventos_disponiveis = eventos_queryset
+        # 2b. Catálogo compartilhado (servido do cache): eventos que ainda não começaram,
+        # paginados por chave (data_inicial, id). Para Aluno/Professor, as inscrições
+        # do usuário (também em cache) são buscadas ao mesmo tempo.
+        consultas = [catalogo.apagina_do_catalogo(request.GET.get('cursor'), somente_com_vagas)]
+        if participante:
+            consultas.append(catalogo.aeventos_inscritos(usuario))
+        (eventos, proximo_cursor), *inscritos = await asyncio.gather(*consultas)
+        
+        # 3. Filtragem para Aluno/Professor: exclui os eventos em que já está inscrito
+        # e completa a página com as seguintes, para que ela não fique curta (ou vazia)
+        eventos, proximo_cursor = await catalogo.acompletar_pagina(
+            eventos, proximo_cursor, somente_com_vagas, inscritos[0] if inscritos else frozenset()
+        )
             
     context = {
-        'eventos': eventos_disponiveis,
+        'eventos': eventos,
+        'proximo_cursor': proximo_cursor,
+        'pagina_inicial': not request.GET.get('cursor'),
+        'somente_com_vagas': somente_com_vagas,
+        'texto_busca': texto_busca,
         'title': 'Eventos Acadêmicos Disponíveis'
     }
     return render(request, 'lista_eventos.html', context)
 
-def detalhe_evento(request, evento_id):
+@leitura_na_replica
+async def detalhe_evento(request, evento_id):
     """ 
     Exibe os detalhes de um evento específico (rota: /evento/<id>/). 
     Inclui botão de inscrição se o usuário for Aluno/Professor.
     """
-    # Lógica futura: buscar evento pelo ID
-    return HttpResponse(f"Detalhes do Evento ID: {evento_id}")
+    request.user = usuario = await request.auser()
+    pode_se_inscrever = usuario.is_authenticated and usuario.perfil in ['Aluno', 'Professor']
+    
+    # 1. Evento (com professor, organizador e vagas restantes) e situação do usuário,
+    # buscados ao mesmo tempo
+    consultas = [
+        Evento.objects.select_related(
+            'professor_responsavel', 'organizador'
+        ).com_vagas_restantes().filter(pk=evento_id).afirst()
+    ]
+    if pode_se_inscrever:
+        consultas.append(Inscricao.objects.filter(usuario=usuario, evento_id=evento_id).aexists())
+    evento, *inscrito = await asyncio.gather(*consultas)
+    
+    if evento is None:
+        raise Http404("Evento não encontrado.")
+    
+    context = {
+        'evento': evento,
+        'pode_se_inscrever': pode_se_inscrever,
+        'inscrito': bool(inscrito and inscrito[0]),
+        'inscricoes_abertas': evento.data_inicial >= timezone.now().date(),
+        'title': evento.nome,
+    }
+    return render(request, 'detalhe_evento.html', context)
 
 def cadastro_usuario(request):
     """ 
     Formulário para cadastro de novos usuários (rota: /cadastro/). 
-    Aplica validações do forms.py, define is_active=False e simula envio de e-mail.
+    Aplica validações do forms.py, define is_active=False e coloca o e-mail de
+    confirmação na caixa de saída (enviado em segundo plano pelo 'enviar_emails').
     """
     if request.method == 'POST':
         form = CadastroUsuarioForm(request.POST)
         if form.is_valid():
-            # A função save no forms.py já hasheia a senha
-            novo_usuario = form.save(commit=False)
-            
-            # Regra de Negócio: Novo usuário começa como inativo (is_active=False)
-            # até a confirmação por e-mail (automação futura).
-            novo_usuario.is_active = True 
-            novo_usuario.save()
-            
-            # Lógica futura: Envio de e-mail de confirmação
+            with transaction.atomic():
+                # A função save no forms.py já hasheia a senha
+                novo_usuario = form.save(commit=False)
+                
+                # Regra de Negócio: Novo usuário começa como inativo (is_active=False)
+                # até a confirmação por e-mail.
+                novo_usuario.is_active = False
+                novo_usuario.save()
+                
+                # O e-mail é gravado na mesma transação: não há cadastro sem confirmação
+                # (nem confirmação sem cadastro), e a resposta não espera pelo SMTP
+                url_confirmacao = request.build_absolute_uri(
+                    reverse('confirmar_cadastro', args=[gerar_token_confirmacao(novo_usuario)])
+                )
+                notificacoes.confirmar_cadastro(novo_usuario, url_confirmacao)
             
             return render(request, 'cadastro_sucesso.html', {'nome': novo_usuario.nome})
     else:
@@ -97,25 +178,45 @@ def cadastro_usuario(request):
     # O template 'cadastro_usuario.html' ainda precisa ser criado
     return render(request, 'cadastro_usuario.html', {'form': form})
 
+def confirmar_cadastro(request, token):
+    """ 
+    Ativa a conta pelo link enviado por e-mail (rota: /confirmar/<token>/).
+    O token assinado traz o usuário; o UPDATE só altera contas ainda inativas.
+    """
+    try:
+        usuario_id, login = verificar_token_confirmacao(token)
+    except signing.SignatureExpired:
+        return render(request, 'cadastro_confirmado.html', {'erro': "O link de confirmação expirou."}, status=400)
+    except signing.BadSignature:
+        return render(request, 'cadastro_confirmado.html', {'erro': "Link de confirmação inválido."}, status=400)
+
+    ativada = Usuario.objects.filter(pk=usuario_id, login=login, is_active=False).update(is_active=True)
+    if not ativada and not Usuario.objects.filter(pk=usuario_id, login=login).exists():
+        return render(request, 'cadastro_confirmado.html', {'erro': "Link de confirmação inválido."}, status=400)
+    return render(request, 'cadastro_confirmado.html', {'erro': None})
+
 # --- Rotas de Usuário Autenticado ---
 
 @login_required
-def dashboard(request):
+@leitura_na_replica
+async def dashboard(request):
     """ 
     Dashboard após o login (rota: /dashboard/). 
     Se Organizador, lista seus eventos.
     Se Aluno/Professor, lista suas inscrições.
     """
     context = {}
-    usuario = request.user
+    request.user = usuario = await request.auser()
     
+    # As listas são lidas aqui (ORM assíncrono): o template não faz consultas
     if is_organizador(usuario):
-        # Se for Organizador
+        # Se for Organizador: professor no mesmo JOIN e vagas restantes anotadas,
+        # como na listagem pública
         eventos_organizados = Evento.objects.filter(
             organizador=usuario
-        ).order_by('data_inicial')
+        ).select_related('professor_responsavel').com_vagas_restantes().order_by('data_inicial')
         
-        context['eventos_organizados'] = eventos_organizados
+        context['eventos_organizados'] = [evento async for evento in eventos_organizados]
         
     elif usuario.perfil in ['Aluno', 'Professor']:
         # Se for Aluno ou Professor
@@ -125,7 +226,17 @@ def dashboard(request):
             usuario=usuario
         ).select_related('evento').order_by('evento__data_inicial')
         
-        context['minhas_inscricoes'] = minhas_inscricoes
+        context['minhas_inscricoes'] = [inscricao async for inscricao in minhas_inscricoes]
+
+        # Listas de espera, com a posição atual na fila (subconsulta pelo índice da fila)
+        minhas_esperas = ListaEspera.objects.filter(
+            usuario=usuario
+        ).select_related('evento').com_posicao().order_by('evento__data_inicial')
+        context['minhas_esperas'] = [espera async for espera in minhas_esperas]
+        # Endereço da agenda para assinatura em aplicativos de calendário (não exige login)
+        context['url_agenda'] = request.build_absolute_uri(
+            reverse('calendario_usuario', args=[calendario.gerar_token_agenda(usuario.pk)])
+        )
         
     return render(request, 'dashboard.html', context)
 
@@ -135,42 +246,53 @@ def inscrever_evento(request, evento_id):
     Processa a inscrição de um usuário (Aluno/Professor) em um evento.
     """
     evento = get_object_or_404(Evento, pk=evento_id)
-    usuario = request.user
-    hoje = timezone.now().date()
-    
-    # 1. Restrição de Acesso (Apenas Aluno/Professor) 
-    if usuario.perfil not in ['Aluno', 'Professor']:
-        messages.error(request, "Apenas usuários com perfil Aluno ou Professor podem se inscrever em eventos.")
-        return redirect('home') # Redireciona de volta à lista de eventos
-        
-    # 2. Verificar se o evento já começou (só permite inscrição em eventos futuros)
-    if evento.data_inicial < hoje:
-        messages.error(request, f"Não é possível se inscrever no evento '{evento.nome}', pois ele já começou ou terminou.")
-        return redirect('home')
-
-    # 3. Verificar Inscrição Duplicada
-    if Inscricao.objects.filter(usuario=usuario, evento=evento).exists():
-        messages.warning(request, f"Você já está inscrito no evento '{evento.nome}'.")
-        return redirect('home') 
-
-    # 4. Verificar Limite de Vagas
-    total_inscritos = Inscricao.objects.filter(evento=evento).count()
-    
-    if total_inscritos >= evento.quantidade_participantes:
-        messages.error(request, f"O evento '{evento.nome}' atingiu o limite de vagas.")
-        return redirect('home')
     
+    # As Regras de Negócio (perfil, data, duplicidade e limite de vagas) ficam no
+    # InscricaoManager, que reserva a vaga com um UPDATE condicional dentro da transação.
     try:
-        # 5. Criar Inscrição
-        Inscricao.objects.create(usuario=usuario, evento=evento)
+        Inscricao.objects.inscrever(request.user, evento)
+        auditoria.registrar(request.user, 'inscricao', evento)
         messages.success(request, f"Inscrição no evento '{evento.nome}' realizada com sucesso!")
-        
-    except Exception as e:
-        messages.error(request, f"Ocorreu um erro ao processar sua inscrição. Tente novamente.")
-        # Logar o erro 'e' aqui para depuração
+    except InscricaoDuplicada as e:
+        messages.warning(request, str(e))
+    except VagasEsgotadas as e:
+        messages.error(request, f"{e} Você pode entrar na lista de espera na página do evento.")
+    except InscricaoNegada as e:
+        messages.error(request, str(e))
         
     return redirect('home')
 
+@require_POST
+@login_required
+def entrar_lista_espera(request, evento_id):
+    """ 
+    Coloca o usuário (Aluno/Professor) na lista de espera de um evento lotado.
+    """
+    evento = get_object_or_404(Evento, pk=evento_id)
+    try:
+        posicao = ListaEspera.objects.entrar(request.user, evento)
+    except InscricaoNegada as e:
+        messages.error(request, str(e))
+        return redirect('detalhe_evento', evento_id=evento.id)
+
+    if posicao is None:
+        # Uma vaga foi liberada no intervalo e o usuário foi promovido na hora
+        messages.success(request, f"Uma vaga foi liberada: inscrição no evento '{evento.nome}' realizada com sucesso!")
+    else:
+        messages.success(request, f"Você está na lista de espera do evento '{evento.nome}' (posição {posicao}).")
+    return redirect('dashboard')
+
+@require_POST
+@login_required
+def sair_lista_espera(request, evento_id):
+    """ 
+    Remove o usuário da lista de espera do evento.
+    """
+    evento = get_object_or_404(Evento, pk=evento_id)
+    if ListaEspera.objects.sair(request.user, evento):
+        messages.success(request, f"Você saiu da lista de espera do evento '{evento.nome}'.")
+    return redirect('dashboard')
+
 @login_required
 def desinscrever_evento(request, evento_id):
     """ 
@@ -180,21 +302,19 @@ def desinscrever_evento(request, evento_id):
     usuario = request.user
     hoje = timezone.now().date()
     
-    # 1. Busca a inscrição
-    inscricao = get_object_or_404(Inscricao, usuario=usuario, evento=evento)
-    
-    # 2. Verifica se o evento já começou (só permite cancelamento em eventos futuros)
+    # 1. Verifica se o evento já começou (só permite cancelamento em eventos futuros)
     if evento.data_inicial < hoje:
         messages.error(request, f"Não é possível cancelar a inscrição, pois o evento '{evento.nome}' já começou ou terminou.")
         return redirect('dashboard')
 
-    # 3. Processa a desinscrição (usando POST, que é mais seguro)
+    # 2. Processa a desinscrição (usando POST, que é mais seguro)
     if request.method == 'POST':
-        try:
-            inscricao.delete()
+        # Busca e remove a inscrição e libera a vaga na mesma transação
+        if Inscricao.objects.cancelar(usuario, evento):
+            auditoria.registrar(usuario, 'cancelamento', evento)
             messages.success(request, f"Inscrição no evento '{evento.nome}' cancelada com sucesso.")
-        except Exception as e:
-            messages.error(request, "Ocorreu um erro ao cancelar sua inscrição.")
+        else:
+            messages.error(request, f"Você não está inscrito no evento '{evento.nome}'.")
         
     # Redireciona para o dashboard, onde a lista de inscrições será atualizada
     return redirect('dashboard')
@@ -226,6 +346,10 @@ def criar_evento(request):
             # Define o organizador responsável como o usuário logado 
             evento.organizador = request.user 
             evento.save()
+            auditoria.registrar(request.user, 'criar_evento', evento)
+            # As miniaturas do banner são geradas em segundo plano, após o commit
+            if 'banner' in form.changed_data:
+                banners.agendar_miniaturas(evento)
             
             # Redireciona para a lista de gerenciamento de eventos
             return redirect('dashboard') 
@@ -251,6 +375,15 @@ def editar_evento(request, evento_id):
             # A view de criação não precisa definir 'organizador' aqui, pois ele já está
             # na instância 'evento' e o formulário o mantém.
             form.save()
+            auditoria.registrar(
+                request.user, 'editar_evento', evento,
+                descricao=f"Campos alterados: {', '.join(form.changed_data)}"
+            )
+            if 'banner' in form.changed_data:
+                banners.agendar_miniaturas(evento)
+            # Vagas novas (aumento do limite) vão para a lista de espera
+            if 'quantidade_participantes' in form.changed_data:
+                ListaEspera.objects.promover(evento, maximo=None)
             return redirect('dashboard') 
     else:
         # 3. Exibe o formulário preenchido (GET)
@@ -269,10 +402,124 @@ def editar_evento(request, evento_id):
 def lista_inscritos(request, evento_id):
     """ 
     Lista de participantes inscritos em um evento (rota: /evento/<id>/inscritos/). 
-    Permite ao Organizador confirmar presença.
+    Permite ao Organizador confirmar presença em lote: inscrições selecionadas,
+    todas de uma vez ou a partir de um CSV de logins.
+    """
+    evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user)
+    form_csv = FormularioPresencaCSV()
+    
+    if request.method == 'POST':
+        acao = request.POST.get('acao')
+        
+        # 1. Confirma as inscrições marcadas na página (um único UPDATE)
+        if acao == 'confirmar_selecionadas':
+            ids = [i for i in request.POST.getlist('inscricoes') if i.isdigit()]
+            confirmadas = Inscricao.objects.confirmar_presenca(evento, ids=ids)
+            messages.success(request, f"Presença confirmada para {confirmadas} inscrito(s).")
+            return redirect('lista_inscritos', evento_id=evento.id)
+        
+        # 2. Confirma todos os inscritos do evento (um único UPDATE)
+        if acao == 'confirmar_todas':
+            confirmadas = Inscricao.objects.confirmar_presenca(evento)
+            messages.success(request, f"Presença confirmada para {confirmadas} inscrito(s).")
+            return redirect('lista_inscritos', evento_id=evento.id)
+        
+        # 3. Confirma a partir de um CSV de logins (uma busca e um UPDATE por lote)
+        if acao == 'importar_csv':
+            form_csv = FormularioPresencaCSV(request.POST, request.FILES)
+            if form_csv.is_valid():
+                confirmadas, nao_encontrados = Inscricao.objects.confirmar_presenca_por_login(
+                    evento, form_csv.logins()
+                )
+                messages.success(request, f"Presença confirmada para {confirmadas} inscrito(s) a partir do CSV.")
+                if nao_encontrados:
+                    exemplos = ', '.join(nao_encontrados[:10])
+                    messages.warning(
+                        request,
+                        f"{len(nao_encontrados)} login(s) não estão inscritos neste evento: {exemplos}"
+                        f"{'...' if len(nao_encontrados) > 10 else ''}"
+                    )
+                return redirect('lista_inscritos', evento_id=evento.id)
+    
+    # Paginação por chave (id) com os dados do usuário carregados no mesmo JOIN
+    inscricoes_queryset = Inscricao.objects.filter(evento=evento).select_related('usuario').only(
+        'id', 'presenca_confirmada', 'usuario__nome', 'usuario__login', 'usuario__instituicao_ensino',
+    )
+    inscricoes, proximo_cursor = paginar_por_chave(
+        inscricoes_queryset, ('id',), request.GET.get('cursor'), INSCRITOS_POR_PAGINA
+    )
+    
+    context = {
+        'evento': evento,
+        'inscricoes': inscricoes,
+        'proximo_cursor': proximo_cursor,
+        'pagina_inicial': not request.GET.get('cursor'),
+        'form_csv': form_csv,
+        'title': f'Inscritos: {evento.nome}',
+    }
+    return render(request, 'lista_inscritos.html', context)
+
+@require_http_methods(['GET', 'POST'])
+@login_required
+@user_passes_test(is_organizador)
+def checkin(request, token):
+    """ 
+    Check-in pelo QR Code (rota: /checkin/<token>/). Os leitores na porta fazem POST e
+    recebem JSON; o endereço aberto pelo leitor de QR Code do celular (GET) mostra o
+    inscrito e um botão que confirma a presença pelo mesmo POST.
+    A assinatura do código é validada sem acesso ao banco e a presença é confirmada
+    com um único UPDATE condicional. Ler o mesmo código duas vezes não é erro.
+    """
+    pela_pagina = request.method == 'GET' or 'pagina' in request.POST
+
+    # 1. Valida o código (HMAC), sem consultar o banco
+    try:
+        inscricao_id, evento_id = verificar_token_checkin(token)
+    except signing.BadSignature:
+        if pela_pagina:
+            raise Http404("Código de check-in inválido.")
+        return JsonResponse({'status': 'invalido', 'mensagem': "Código de check-in inválido."}, status=400)
+
+    if request.method == 'GET':
+        inscricao = get_object_or_404(
+            Inscricao.objects.select_related('usuario', 'evento'),
+            pk=inscricao_id, evento_id=evento_id, evento__organizador=request.user,
+        )
+        context = {'inscricao': inscricao, 'token': token, 'title': f'Check-in: {inscricao.evento.nome}'}
+        return render(request, 'checkin.html', context)
+    
+    # 2. Caminho principal: um único UPDATE
+    if Inscricao.objects.confirmar_checkin(inscricao_id, evento_id, request.user):
+        if pela_pagina:
+            messages.success(request, "Presença confirmada.")
+            return redirect('lista_inscritos', evento_id)
+        return JsonResponse({'status': 'confirmada', 'inscricao': inscricao_id})
+    
+    # 3. Nada foi alterado: o código já foi lido antes ou a inscrição não pertence a este organizador
+    if Inscricao.objects.filter(
+        pk=inscricao_id, evento_id=evento_id, evento__organizador=request.user, presenca_confirmada=True
+    ).exists():
+        if pela_pagina:
+            messages.info(request, "A presença já estava confirmada.")
+            return redirect('lista_inscritos', evento_id)
+        return JsonResponse({'status': 'ja_confirmada', 'inscricao': inscricao_id})
+    if pela_pagina:
+        raise Http404("Inscrição não encontrada.")
+    return JsonResponse({'status': 'nao_encontrada', 'mensagem': "Inscrição não encontrada."}, status=404)
+
+@login_required
+@user_passes_test(is_aluno_or_professor)
+@cache_control(private=True, max_age=24 * 60 * 60)
+def qrcode_checkin(request, inscricao_id):
+    """ 
+    QR Code (SVG) do endereço de check-in de uma inscrição do usuário
+    (rota: /inscricao/<id>/checkin.svg), exibido no dashboard.
     """
-    # Lógica futura: Buscar todas as Inscrições para o Evento.
-    return HttpResponse(f"Lista de Inscritos para o Evento ID: {evento_id}")
+    evento_id = Inscricao.objects.filter(pk=inscricao_id, usuario=request.user).values_list('evento_id', flat=True).first()
+    if evento_id is None:
+        raise Http404("Inscrição não encontrada.")
+    endereco = request.build_absolute_uri(reverse('checkin', args=[gerar_token_checkin(inscricao_id, evento_id)]))
+    return HttpResponse(gerar_svg(endereco), content_type='image/svg+xml')
 
 @login_required
 @user_passes_test(is_organizador)
@@ -280,15 +527,320 @@ def emitir_certificados(request, evento_id):
     """ 
     Gera certificados para o evento (rota: /evento/<id>/emitir_certificados/).
     Apenas para inscritos com presença_confirmada=True.
+    GET mostra quantos certificados estão pendentes; POST agenda a emissão em lote.
     """
-    # Lógica futura: Disparar a automação de emissão de certificados.
-    return HttpResponse(f"Processando Emissão de Certificados para o Evento ID: {evento_id}")
+    evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user)
+    
+    # Regra de Negócio: certificados só são emitidos após o término do evento
+    if not evento.esta_encerrado():
+        messages.error(request, f"Os certificados do evento '{evento.nome}' só podem ser emitidos após o seu término.")
+        return redirect('dashboard')
+    
+    if request.method == 'POST':
+        # A emissão não roda na requisição: o evento volta para a fila do processo de
+        # emissão (emitir_certificados --encerrados), que o reserva e emite em lotes
+        if solicitar_emissao(evento.pk):
+            messages.success(
+                request,
+                f"A emissão dos certificados de '{evento.nome}' foi agendada e será concluída em instantes."
+            )
+        else:
+            messages.info(request, f"A emissão dos certificados de '{evento.nome}' já está em andamento.")
+        return redirect('dashboard')
+    
+    context = {
+        'evento': evento,
+        'pendentes': inscricoes_pendentes(evento).count(),
+        'title': f'Emitir Certificados: {evento.nome}',
+    }
+    return render(request, 'emitir_certificados.html', context)
     
 @login_required
 @user_passes_test(is_organizador)
+def baixar_certificados(request, evento_id):
+    """ 
+    Baixa todos os certificados emitidos do evento em um único ZIP
+    (rota: /evento/<id>/certificados.zip). O arquivo é montado e enviado em
+    pedaços, sem carregar os PDFs na memória.
+    """
+    evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user)
+    
+    resposta = StreamingHttpResponse(gerar_zip_certificados(evento), content_type='application/zip')
+    resposta['Content-Disposition'] = f'attachment; filename="certificados_evento_{evento.id}.zip"'
+    return resposta
+
+def _exportar(request, inscricoes, nome_arquivo):
+    """ Responde com o CSV (padrão) ou, com ?formato=xlsx, com a planilha. """
+    # O CSV é gerado depois que a view (e o RoteamentoMiddleware) terminam:
+    # o banco escolhido agora (réplica ou principal) fica fixo na consulta.
+    inscricoes = inscricoes.using(inscricoes.db)
+    if request.GET.get('formato') == 'xlsx':
+        if not exportacao.xlsx_disponivel():
+            return HttpResponse("Exportação em XLSX indisponível: instale o pacote 'openpyxl'.", status=501)
+        return exportacao.resposta_xlsx(inscricoes, nome_arquivo)
+    return exportacao.resposta_csv(inscricoes, nome_arquivo)
+
+@login_required
+@user_passes_test(is_organizador)
+@leitura_na_replica
+def exportar_inscricoes(request, evento_id):
+    """ 
+    Exporta os inscritos e a presença de um evento (rota: /evento/<id>/exportar/).
+    As linhas são enviadas à medida que são lidas do banco.
+    """
+    evento = get_object_or_404(Evento, pk=evento_id, organizador=request.user)
+    return _exportar(request, Inscricao.objects.filter(evento=evento), f'inscricoes_evento_{evento.id}')
+
+@login_required
+@user_passes_test(is_equipe)
+@leitura_na_replica
+def exportar_todas_inscricoes(request):
+    """ 
+    Exporta as inscrições de todos os eventos (rota: /exportar/inscricoes/).
+    Restrito à equipe (is_staff).
+    """
+    return _exportar(request, Inscricao.objects.all(), 'inscricoes')
+
+@login_required
+@user_passes_test(is_organizador)
+@leitura_na_replica
+def estatisticas_organizador(request):
+    """ 
+    Estatísticas de todos os eventos do Organizador (rota: /estatisticas/).
+    Lidas das tabelas de resumo: o custo não depende da quantidade de inscrições.
+    """
+    context = estatisticas.resumo_organizador(request.user)
+    context['title'] = 'Estatísticas dos Meus Eventos'
+    return render(request, 'estatisticas.html', context)
+
+@login_required
+@user_passes_test(is_organizador)
+@leitura_na_replica
+def estatisticas_evento(request, evento_id):
+    """ 
+    Estatísticas de um evento do Organizador (rota: /evento/<id>/estatisticas/):
+    ocupação, presença, certificados, público e inscrições por dia.
+    """
+    # Os totais do evento vêm no mesmo JOIN
+    evento = get_object_or_404(Evento.objects.select_related('estatistica'), pk=evento_id, organizador=request.user)
+    context = estatisticas.resumo_evento(evento)
+    context['evento'] = evento
+    context['title'] = f'Estatísticas: {evento.nome}'
+    return render(request, 'estatisticas_evento.html', context)
+
+@login_required
+@user_passes_test(is_organizador)
+@leitura_na_replica
 def registros_auditoria(request):
     """ 
     Tela para consultar logs de auditoria (rota: /auditoria/). 
-    Requer acesso ao sistema de logs (futuramente).
+    Filtros por usuário, evento, ação e período, com paginação por chave
+    (data_hora, id) em ordem decrescente. O Organizador vê apenas os registros dos
+    seus eventos e as próprias ações; a equipe (is_staff) vê todos.
     """
-    return HttpResponse("Página de Registros de Auditoria (Logs)")
\ No newline at end of file
+    form = FiltroAuditoriaForm(request.GET or None)
+    registros = RegistroAuditoria.objects.select_related('usuario', 'evento').only(
+        'id', 'acao', 'descricao', 'data_hora', 'usuario__nome', 'usuario__login', 'evento__nome',
+    )
+    if not request.user.is_staff:
+        registros = registros.filter(Q(evento__organizador=request.user) | Q(usuario=request.user))
+    if form.is_bound and form.is_valid():
+        registros = form.filtrar(registros)
+    
+    registros, proximo_cursor = paginar_por_chave(
+        registros, ('-data_hora', '-id'), request.GET.get('cursor'), REGISTROS_POR_PAGINA
+    )
+    
+    # Mantém os filtros atuais nos links de paginação
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    
+    context = {
+        'form': form,
+        'registros': registros,
+        'proximo_cursor': proximo_cursor,
+        'filtros': parametros.urlencode(),
+        'title': 'Registros de Auditoria',
+    }
+    return render(request, 'auditoria.html', context)
+
+def metricas(request):
+    """ 
+    Métricas por view no formato texto do Prometheus (rota: /metricas/).
+    Acesso da equipe (is_staff) ou do coletor, com o token de SGEA_METRICAS_TOKEN.
+    """
+    token = settings.SGEA_METRICAS_TOKEN
+    autorizado = bool(token) and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    )
+    if not (autorizado or is_equipe(request.user)):
+        return HttpResponse("Acesso negado.", status=403)
+    return HttpResponse(
+        metricas_requisicoes.texto_prometheus() + emails.texto_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+# --- Feeds e catálogo JSON (consultados periodicamente por aplicativos) ---
+# GET condicional: com o ETag/Last-Modified de uma consulta agregada, uma consulta
+# sem alterações recebe 304 sem executar a consulta completa (versoes.py).
+
+def _url_evento(request):
+    return lambda evento_id: request.build_absolute_uri(reverse('detalhe_evento', args=[evento_id]))
+
+def _usuario_da_agenda(token):
+    try:
+        return calendario.verificar_token_agenda(token)
+    except signing.BadSignature:
+        raise Http404("Agenda não encontrada.")
+
+@require_safe
+@leitura_na_replica
+@cache_control(no_cache=True)
+@get_condicional(lambda request: versoes.versao_catalogo_publico(timezone.now().date()))
+def calendario_eventos(request):
+    """ Feed iCalendar dos eventos que ainda não começaram (rota: /calendario/eventos.ics). """
+    eventos = Evento.objects.filter(data_inicial__gt=timezone.now().date())
+    # A resposta é gerada depois que a view retorna: o alias (réplica ou principal) é fixado aqui
+    return calendario.resposta_ics(eventos.using(eventos.db), 'SGEA - Eventos', 'eventos', _url_evento(request))
+
+@require_safe
+@leitura_na_replica
+@cache_control(private=True, no_cache=True)
+@get_condicional(lambda request, token: versoes.versao_agenda(_usuario_da_agenda(token), timezone.now().date()))
+def calendario_usuario(request, token):
+    """
+    Feed iCalendar dos eventos (ainda não encerrados) em que o usuário está inscrito
+    (rota: /calendario/<token>.ics). O token assinado substitui o login.
+    """
+    eventos = Evento.objects.filter(
+        inscricoes__usuario_id=_usuario_da_agenda(token), data_final__gte=timezone.now().date(),
+    )
+    return calendario.resposta_ics(eventos.using(eventos.db), 'SGEA - Minha agenda', 'agenda', _url_evento(request))
+
+@require_safe
+@leitura_na_replica
+@cache_control(no_cache=True)
+@get_condicional(lambda request: versoes.versao_catalogo_publico(timezone.now().date()))
+def catalogo_json(request):
+    """
+    Catálogo público em JSON (rota: /catalogo.json), paginado por cursor:
+    'proxima' traz o endereço da página seguinte (ou null na última).
+    """
+    eventos = Evento.objects.filter(
+        data_inicial__gt=timezone.now().date()
+    ).com_vagas_restantes().values(
+        'id', 'nome', 'tipo_evento', 'local', 'data_inicial', 'data_final', 'horario',
+        'quantidade_participantes', 'vagas_restantes', 'atualizado_em',
+    )
+    pagina, proximo_cursor = paginar_por_chave(
+        eventos, catalogo.ORDEM_CATALOGO, request.GET.get('cursor'), EVENTOS_POR_PAGINA_JSON
+    )
+    url_evento = _url_evento(request)
+    for evento in pagina:
+        evento['url'] = url_evento(evento['id'])
+    return JsonResponse({
+        'eventos': pagina,
+        'proxima': request.build_absolute_uri(f"{reverse('catalogo_json')}?cursor={proximo_cursor}") if proximo_cursor else None,
+    })
+
+
+# --- API JSON (aplicativo móvel; serialização e regras auxiliares em api.py) ---
+
+@api.rota('GET', 'POST')
+@leitura_na_replica
+def api_eventos(request):
+    """
+    GET: eventos que ainda não começaram ou, com ?meus=1, todos os do Organizador logado.
+    POST: cria um evento (Organizador), com as validações do FormularioEvento.
+    """
+    if request.method == 'POST':
+        usuario = api.exigir_login(request, 'Organizador')
+        form = FormularioEvento(*api.dados_do_formulario(request))
+        if not form.is_valid():
+            raise api.erro_de_formulario(form)
+        evento = form.save(commit=False)
+        evento.organizador = usuario
+        evento.save()
+        auditoria.registrar(usuario, 'criar_evento', evento)
+        if 'banner' in form.changed_data:
+            banners.agendar_miniaturas(evento)
+        return JsonResponse(api.item(request, api.consulta_eventos().filter(pk=evento.pk), api.CAMPOS_EVENTO), status=201)
+
+    eventos = api.consulta_eventos()
+    if request.GET.get('meus') == '1':
+        eventos = eventos.filter(organizador=api.exigir_login(request, 'Organizador'))
+    else:
+        eventos = eventos.filter(data_inicial__gt=timezone.now().date())
+    return JsonResponse(api.pagina(request, eventos, api.CAMPOS_EVENTO, api.ORDEM_EVENTOS))
+
+@api.rota('GET', 'PATCH')
+@leitura_na_replica
+def api_evento(request, evento_id):
+    """
+    GET: um evento. PATCH: altera os campos enviados (apenas o Organizador do evento);
+    os demais mantêm os valores atuais e o formulário valida o evento completo.
+    """
+    if request.method == 'PATCH':
+        usuario = api.exigir_login(request, 'Organizador')
+        evento = Evento.objects.filter(pk=evento_id, organizador=usuario).first()
+        if evento is None:
+            raise api.ErroApi("Evento não encontrado.", status=404)
+        dados = model_to_dict(evento, fields=[campo for campo in FormularioEvento._meta.fields if campo != 'banner'])
+        dados.update(api.ler_json(request))
+        form = FormularioEvento(dados, instance=evento)
+        if not form.is_valid():
+            raise api.erro_de_formulario(form)
+        form.save()
+        auditoria.registrar(
+            usuario, 'editar_evento', evento,
+            descricao=f"Campos alterados: {', '.join(form.changed_data)}"
+        )
+        if 'quantidade_participantes' in form.changed_data:
+            ListaEspera.objects.promover(evento, maximo=None)
+    return JsonResponse(api.item(request, api.consulta_eventos().filter(pk=evento_id), api.CAMPOS_EVENTO, "Evento não encontrado."))
+
+@api.rota('GET', 'POST')
+@leitura_na_replica
+def api_inscricoes(request):
+    """
+    GET: inscrições do usuário logado. POST {"eventos": [ids]}: inscrição em vários
+    eventos de uma vez (Aluno/Professor), com um resultado por evento.
+    """
+    if request.method == 'POST':
+        usuario = api.exigir_login(request, 'Aluno', 'Professor')
+        resultados = api.inscrever_em_lote(usuario, api.ler_json(request))
+        return JsonResponse({
+            'resultados': resultados,
+            'inscritos': sum(resultado['inscrito'] for resultado in resultados),
+        })
+
+    usuario = api.exigir_login(request)
+    return JsonResponse(api.pagina(request, api.consulta_inscricoes(usuario), api.CAMPOS_INSCRICAO, api.ORDEM_INSCRICOES))
+
+@api.rota('GET', 'DELETE')
+@leitura_na_replica
+def api_inscricao(request, inscricao_id):
+    """ GET: uma inscrição do usuário logado. DELETE: cancela a inscrição (eventos que não começaram). """
+    usuario = api.exigir_login(request)
+    inscricoes = api.consulta_inscricoes(usuario).filter(pk=inscricao_id)
+    if request.method == 'GET':
+        return JsonResponse(api.item(request, inscricoes, api.CAMPOS_INSCRICAO, "Inscrição não encontrada."))
+
+    inscricao = inscricoes.select_related('evento').first()
+    if inscricao is None:
+        raise api.ErroApi("Inscrição não encontrada.", status=404)
+    evento = inscricao.evento
+    # Mesma regra do desinscrever_evento: só eventos que ainda não começaram
+    if evento.data_inicial < timezone.now().date():
+        raise api.ErroApi(f"Não é possível cancelar a inscrição, pois o evento '{evento.nome}' já começou ou terminou.", status=409)
+    if Inscricao.objects.cancelar(usuario, evento):
+        auditoria.registrar(usuario, 'cancelamento', evento)
+    return HttpResponse(status=204)
+
+@api.rota('GET')
+@leitura_na_replica
+def api_certificados(request):
+    """ Certificados do usuário logado. """
+    usuario = api.exigir_login(request)
+    return JsonResponse(api.pagina(request, api.consulta_certificados(usuario), api.CAMPOS_CERTIFICADO, api.ORDEM_CERTIFICADOS))